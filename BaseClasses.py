@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import collections
 import functools
+import itertools
 import logging
 import random
 import secrets
 from argparse import Namespace
+from array import array
 from collections import Counter, deque
-from collections.abc import Collection, MutableSequence
+from collections.abc import Collection, ItemsView, KeysView, MutableSequence, ValuesView
 from enum import IntEnum, IntFlag
 from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Mapping, NamedTuple,
                     Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING)
@@ -17,9 +19,11 @@ from typing_extensions import NotRequired, TypedDict
 import NetUtils
 import Options
 import Utils
+from rule_builder import Rule, compile_rule
 
 if TYPE_CHECKING:
     from entrance_rando import ERPlacementState
+    from rule_profiler import RuleProfiler
     from worlds import AutoWorld
 
 
@@ -54,8 +58,21 @@ class HasNameAndPlayer(Protocol):
     player: int
 
 
+def _ordered_locations(locations: Dict[int, Location]) -> List[Location]:
+    """Returns Locations of a RegionManager index in the order of their location_cache."""
+    return [locations[order] for order in sorted(locations)]
+
+
 class MultiWorld():
     debug_types = False
+    debug_incremental_reachability = False
+    """Check incremental reachability against a full search after every update. Very slow, meant for tests."""
+    debug_location_candidates = False
+    """Check the Locations fill_restrictive picks from its candidate buckets against scanning all of them."""
+    generation_processes: int = 0
+    """Number of worker processes for the generation stages of Worlds with parallel_generation, see AutoWorld.call_all"""
+    rule_profiler: Optional[RuleProfiler] = None
+    """Records the rule evaluations of generation if installed, see rule_profiler.RuleProfiler.install"""
     player_name: Dict[int, str]
     plando_texts: List[Dict[str, str]]
     plando_items: List[List[Dict[str, Any]]]
@@ -67,6 +84,12 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    entrance_dependencies: Dict[int, RuleDependencies]
+    location_dependencies: Dict[int, RuleDependencies]
+    item_indices: Dict[int, Dict[str, int]]
+    """item name to index in the IndexedCounters of each player, for worlds with indexed_item_counts"""
+    sphere_cache: Optional[Spheres] = None
+    """Spheres of the finished fill, see cache_spheres"""
 
     plando_options: PlandoOptions
     early_items: Dict[int, Dict[str, int]]
@@ -100,11 +123,22 @@ class MultiWorld():
         region_cache: Dict[int, Dict[str, Region]]
         entrance_cache: Dict[int, Dict[str, Entrance]]
         location_cache: Dict[int, Dict[str, Location]]
+        filled_locations: Dict[int, Dict[int, Location]]
+        """per player Locations that hold an Item, keyed by their order in location_cache"""
+        unfilled_locations: Dict[int, Dict[int, Location]]
+        """per player Locations that hold no Item, keyed by their order in location_cache"""
+        item_locations: Dict[int, Dict[Tuple[str, int], Dict[int, Location]]]
+        """per player Locations by the name and player of the Item they hold, keyed by their order in location_cache"""
+        _location_counts: Dict[int, int]
 
         def __init__(self, players: int):
             self.region_cache = {player: {} for player in range(1, players+1)}
             self.entrance_cache = {player: {} for player in range(1, players+1)}
             self.location_cache = {player: {} for player in range(1, players+1)}
+            self.filled_locations = {player: {} for player in range(1, players+1)}
+            self.unfilled_locations = {player: {} for player in range(1, players+1)}
+            self.item_locations = {player: {} for player in range(1, players+1)}
+            self._location_counts = {player: 0 for player in range(1, players+1)}
 
         def __iadd__(self, other: Iterable[Region]):
             self.extend(other)
@@ -125,6 +159,69 @@ class MultiWorld():
             self.region_cache[new_id] = {}
             self.entrance_cache[new_id] = {}
             self.location_cache[new_id] = {}
+            self.filled_locations[new_id] = {}
+            self.unfilled_locations[new_id] = {}
+            self.item_locations[new_id] = {}
+            self._location_counts[new_id] = 0
+
+        def add_location(self, location: Location) -> None:
+            player = location.player
+            self.location_cache[player][location.name] = location
+            location._region_manager = self
+            location._cache_order = self._location_counts[player]
+            self._location_counts[player] += 1
+            self._index_location(location, location._item)
+
+        def remove_location(self, location: Location) -> None:
+            del self.location_cache[location.player][location.name]
+            self._unindex_location(location, location._item)
+            location._region_manager = None
+
+        def reindex_locations(self, player: int) -> None:
+            """Rebuilds the indexes of player from location_cache, for when it got replaced as a whole."""
+            self.filled_locations[player] = {}
+            self.unfilled_locations[player] = {}
+            self.item_locations[player] = {}
+            self._location_counts[player] = 0
+            for location in self.location_cache[player].values():
+                location._region_manager = self
+                location._cache_order = self._location_counts[player]
+                self._location_counts[player] += 1
+                self._index_location(location, location._item)
+
+        def move_location(self, location: Location, previous: Optional[Item], item: Optional[Item]) -> None:
+            """Called by Location when its Item changes from previous to item."""
+            self._unindex_location(location, previous)
+            self._index_location(location, item)
+
+        def _index_location(self, location: Location, item: Optional[Item]) -> None:
+            player = location.player
+            if item is None:
+                self.unfilled_locations[player][location._cache_order] = location
+            else:
+                self.filled_locations[player][location._cache_order] = location
+                self.item_locations[player].setdefault((item.name, item.player), {})[location._cache_order] = location
+
+        def _unindex_location(self, location: Location, item: Optional[Item]) -> None:
+            player = location.player
+            if item is None:
+                del self.unfilled_locations[player][location._cache_order]
+            else:
+                del self.filled_locations[player][location._cache_order]
+                locations = self.item_locations[player][item.name, item.player]
+                del locations[location._cache_order]
+                if not locations:
+                    del self.item_locations[player][item.name, item.player]
+
+        def get_item_locations(self, items: Collection[Tuple[str, int]]) -> List[Location]:
+            """Returns the Locations holding any of the Items by name and player, in the order of get_locations."""
+            found: List[Location] = []
+            for player_items in self.item_locations.values():
+                locations: Dict[int, Location] = {}
+                for item in items:
+                    locations.update(player_items.get(item, ()))
+                found += _ordered_locations(locations)
+            return found
 
         def __iter__(self) -> Iterator[Region]:
             for regions in self.region_cache.values():
@@ -159,6 +256,9 @@ class MultiWorld():
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
+        self.entrance_dependencies = collections.defaultdict(RuleDependencies)
+        self.location_dependencies = collections.defaultdict(RuleDependencies)
+        self.item_indices = collections.defaultdict(dict)
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
 
         for player in range(1, players + 1):
@@ -450,30 +550,40 @@ class MultiWorld():
         return [loc.item for loc in self.get_filled_locations()] + self.itempool
 
     def find_item_locations(self, item: str, player: int, resolve_group_locations: bool = False) -> List[Location]:
-        if resolve_group_locations:
-            player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name == item and location.item.player == player]
+        return self.find_items_in_locations({item}, player, resolve_group_locations)
 
     def find_item(self, item: str, player: int) -> Location:
-        return next(location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.item.player == player)
+        return next(iter(self.regions.get_item_locations(((item, player),))))
 
     def find_items_in_locations(self, items: Set[str], player: int, resolve_group_locations: bool = False) -> List[Location]:
         if resolve_group_locations:
             player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name in items and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name in items and location.item.player == player]
+            return [location for location in self.regions.get_item_locations(
+                        [(item, item_player) for item in items for item_player in (player, *player_groups)])
+                    if location.player not in player_groups]
+        return self.regions.get_item_locations([(item, player) for item in items])
 
     def create_item(self, item_name: str, player: int) -> Item:
         return self.worlds[player].create_item(item_name)
 
+    def get_item_index(self, item_name: str, player: int) -> int:
+        indices = self.item_indices[player]
+        index = indices.get(item_name)
+        if index is None:
+            index = indices[item_name] = len(indices)
+        return index
+
+    def index_item_names(self) -> None:
+        """Assigns the lowest item indices to the progression items that exist after create_items,
+        so that the counts of those stay close together."""
+        players = {player for player in self.player_ids if self.worlds[player].indexed_item_counts}
+        if not players:
+            return
+        for item in itertools.chain(self.itempool, *(self.precollected_items[player] for player in players),
+                                    (location.item for location in self.get_filled_locations())):
+            if item.player in players and item.advancement:
+                self.get_item_index(item.name, item.player)
+
     def push_precollected(self, item: Item):
         self.precollected_items[item.player].append(item)
         self.state.collect(item, True)
@@ -504,10 +614,16 @@ class MultiWorld():
                                            for player in self.regions.location_cache))
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        if player is not None:
+            return _ordered_locations(self.regions.unfilled_locations[player])
+        return [location for locations in self.regions.unfilled_locations.values()
+                for location in _ordered_locations(locations)]
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        if player is not None:
+            return _ordered_locations(self.regions.filled_locations[player])
+        return [location for locations in self.regions.filled_locations.values()
+                for location in _ordered_locations(locations)]
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -539,6 +655,11 @@ class MultiWorld():
 
         return False
 
+    def set_rule_profile_stage(self, stage: str) -> None:
+        """Attributes the rule evaluations from now on to stage, if rules are profiled."""
+        if self.rule_profiler:
+            self.rule_profiler.stage = stage
+
     def has_beaten_game(self, state: CollectionState, player: Optional[int] = None) -> bool:
         if player:
             return self.completion_condition[player](state)
@@ -554,8 +675,8 @@ class MultiWorld():
             state = CollectionState(self)
             if self.has_beaten_game(state):
                 return True
-        prog_locations = {location for location in self.get_locations() if location.item
-                          and location.item.advancement and location not in state.locations_checked}
+        prog_locations = {location for location in self.get_filled_locations() if location.item.advancement
+                          and location not in state.locations_checked}
 
         while prog_locations:
             sphere: Set[Location] = set()
@@ -578,6 +699,12 @@ class MultiWorld():
 
         return False
 
+    def cache_spheres(self) -> Spheres:
+        """Computes the Spheres of the finished fill once, for get_spheres, get_sendable_spheres,
+        fulfills_accessibility and the spoiler playthrough to share. Item placements must not change afterwards."""
+        self.sphere_cache = Spheres(self)
+        return self.sphere_cache
+
     def get_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of locations for each logical sphere
@@ -586,24 +713,15 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        spheres = self.sphere_cache or Spheres(self)
+        filled_spheres = [{location for location in sphere if location.item} for sphere in spheres.spheres]
+        while filled_spheres and not filled_spheres[-1]:
+            filled_spheres.pop()
+        yield from filled_spheres
+        unreachable = {location for location in spheres.unreachable if location.item}
+        if unreachable:
+            yield set()
+            yield unreachable
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -612,46 +730,9 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
-        for location in self.get_filled_locations():
-            if type(location.item.code) is int:
-                locations.add(location)
-            else:
-                events.add(location)
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
+        yield from (self.sphere_cache or Spheres(self)).get_sendable_spheres()
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
-
-    def fulfills_accessibility(self, state: Optional[CollectionState] = None):
-        """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
+    def get_accessibility_players(self) -> Dict[str, Set[int]]:
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -659,13 +740,21 @@ class MultiWorld():
         }
         for player, world in self.worlds.items():
             players[world.options.accessibility.current_key].add(player)
+        return players
+
+    def fulfills_accessibility(self, state: Optional[CollectionState] = None):
+        """Check if accessibility rules are fulfilled with current or supplied state."""
+        if not state:
+            if self.sphere_cache:
+                return self.sphere_cache.fulfills_accessibility()
+            state = CollectionState(self)
+        players = self.get_accessibility_players()
 
         beatable_fulfilled = False
 
         def location_condition(location: Location) -> bool:
             """Determine if this location has to be accessible, location is already filtered by location_relevant"""
-            return location.player in players["full"] or \
-                (location.item and location.item.player not in players["minimal"])
+            return location_required(location, players)
 
         def location_relevant(location: Location) -> bool:
             """Determine if this location is relevant to sweep."""
@@ -706,27 +795,653 @@ class MultiWorld():
         return False
 
 
+def location_required(location: Location, players: Dict[str, Set[int]]) -> bool:
+    """Whether location has to be reachable for the accessibility settings in players, of relevant locations."""
+    return location.player in players["full"] or \
+        bool(location.item and location.item.player not in players["minimal"])
+
+
+class Spheres:
+    """Logical spheres of all Locations of a MultiWorld, from a single sweep starting with an empty CollectionState.
+    Each sphere contains the Locations that become reachable once the items of all previous spheres are collected.
+    Locations are only re-tested as described for PendingLocations."""
+    multiworld: MultiWorld
+    spheres: List[Set[Location]]
+    sphere_of: Dict[Location, int]
+    """index into spheres of every reachable Location"""
+    unreachable: Set[Location]
+    state: CollectionState
+    """the state after collecting the items of every reachable Location"""
+    sendable_spheres: Optional[List[Set[Location]]]
+    """see MultiWorld.get_sendable_spheres, computed on first use"""
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self.spheres = []
+        self.sphere_of = {}
+        self.sendable_spheres = None
+        self.state = state = CollectionState(multiworld)
+        locations = multiworld.get_locations()
+        pending = PendingLocations(state, locations)
+        try:
+            sphere = pending.pop_reachable()
+            while sphere:
+                for location in sphere:
+                    self.sphere_of[location] = len(self.spheres)
+                    if location.item:
+                        state.collect(location.item, True, location)
+                self.spheres.append(sphere)
+                sphere = pending.pop_reachable()
+        finally:
+            pending.close()
+        self.unreachable = {location for location in locations if location not in self.sphere_of}
+
+    def get_items(self, sphere: int) -> List[Item]:
+        """Returns the items the state collected in sphere."""
+        return [location.item for location in self.spheres[sphere] if location.item]
+
+    def get_sendable_spheres(self) -> List[Set[Location]]:
+        if self.sendable_spheres is None:
+            self.sendable_spheres = self._compute_sendable_spheres()
+        return self.sendable_spheres
+
+    def _compute_sendable_spheres(self) -> List[Set[Location]]:
+        # events are collected as soon as they are reachable, so they don't start spheres of their own
+        state = CollectionState(self.multiworld)
+        locations: Set[Location] = set()
+        events: Set[Location] = set()
+        for location in self.multiworld.get_filled_locations():
+            if type(location.item.code) is int:
+                locations.add(location)
+            else:
+                events.add(location)
+
+        spheres: List[Set[Location]] = []
+        pending_events = PendingLocations(state, events)
+        pending_locations = PendingLocations(state, locations)
+        try:
+            while locations:
+                done_events = pending_events.pop_reachable()
+                while done_events:
+                    for event in done_events:
+                        state.collect(event.item, True, event)
+                    done_events = pending_events.pop_reachable()
+
+                sphere = pending_locations.pop_reachable()
+                spheres.append(sphere)
+                if not sphere:
+                    spheres.append(locations)  # unreachable locations
+                    break
+
+                for location in sphere:
+                    state.collect(location.item, True, location)
+                locations -= sphere
+        finally:
+            pending_events.close()
+            pending_locations.close()
+        return spheres
+
+    def fulfills_accessibility(self) -> bool:
+        """MultiWorld.fulfills_accessibility for an empty starting state, answered from these spheres."""
+        multiworld = self.multiworld
+        players = multiworld.get_accessibility_players()
+        missing = [location for location in self.unreachable
+                   if location.player in players["full"] or location.advancement]
+        if any(location_required(location, players) for location in missing):
+            logging.warning(f"Could not access required locations for accessibility check. Missing: {missing}")
+            return False
+        return multiworld.has_beaten_game(self.state)
+
+
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class CopyOnWriteDict(dict):
+    """Dict of per-player containers, such as CollectionState.prog_items, whose copies share the containers.
+    Shared containers are kept out of the dict itself, so looking one up misses and clones it through its own copy()
+    into this dict, while lookups of containers it owns stay plain dict lookups. Code that only reads can use peek()
+    to get a container without cloning it."""
+    shared: Dict[Any, Any]
+    """containers that may also be referenced by another CopyOnWriteDict, by key"""
+    peek: Callable[[Any], Any]
+    """returns the container of key, which may be shared and must not be modified"""
+    _all: Dict[Any, Any]
+    """owned and shared containers by key"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.shared = {}
+        self._all = {}
+        self.peek = self._all.__getitem__
+        self.update(*args, **kwargs)
+
+    def __missing__(self, key: Any) -> Any:
+        value = self.shared.pop(key).copy()
+        dict.__setitem__(self, key, value)
+        self._all[key] = value
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.shared.pop(key, None)
+        dict.__setitem__(self, key, value)
+        self._all[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if self.shared.pop(key, None) is None:
+            dict.__delitem__(self, key)
+        del self._all[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._all
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._all)
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def __repr__(self) -> str:
+        return repr(self._all)
+
+    def __eq__(self, other: object) -> bool:
+        return self._all == (other._all if isinstance(other, CopyOnWriteDict) else other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return CopyOnWriteDict, (self._all.copy(),)
+
+    def keys(self) -> KeysView[Any]:  # type: ignore[override]
+        return self._all.keys()
+
+    def values(self) -> ValuesView[Any]:  # type: ignore[override]
+        return ValuesView(self)
+
+    def items(self) -> ItemsView[Any, Any]:  # type: ignore[override]
+        return ItemsView(self)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self._all else default
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key in self._all:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key in self.shared:
+            del self._all[key]
+            return self.shared.pop(key).copy()
+        self._all.pop(key, None)
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, value = self._all.popitem()
+        if self.shared.pop(key, None) is None:
+            dict.__delitem__(self, key)
+        else:
+            value = value.copy()
+        return key, value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.shared.clear()
+        self._all.clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:  # type: ignore[override]
+        if len(args) == 1 and isinstance(args[0], CopyOnWriteDict):
+            other: CopyOnWriteDict = args[0]
+            other._share()
+            for key in other.shared:
+                dict.pop(self, key, None)
+            self.shared.update(other.shared)
+            self._all.update(other.shared)
+            args = ()
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other: Any) -> CopyOnWriteDict:  # type: ignore[override]
+        self.update(other)
+        return self
+
+    def _share(self) -> None:
+        """Moves the containers this dict owns to shared, for another dict to reference them."""
+        self.shared.update(dict.items(self))
+        dict.clear(self)
+
+    def copy(self) -> CopyOnWriteDict:
+        return CopyOnWriteDict(self)
+
+
+class CopyOnWriteAttribute:
+    """Keeps an attribute holding a CopyOnWriteDict one when something, like a world resetting
+    CollectionState.prog_items, assigns a plain dict to it. Only writes are intercepted, reads find the instance
+    attribute directly."""
+    name: str
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    if TYPE_CHECKING:
+        def __get__(self, instance: Any, owner: Any) -> CopyOnWriteDict: ...
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if isinstance(value, dict) and not isinstance(value, CopyOnWriteDict):
+            value = CopyOnWriteDict(value)
+        instance.__dict__[self.name] = value
+
+
+class ChangeTrackingCounter(Counter):
+    """Counter used as CollectionState.prog_items for worlds with incremental_reachability.
+    Records every item name that is written, so that only rules reading those names need to be re-evaluated."""
+    changed: Set[str]
+    """item names written since the last reachable region update of the owning state"""
+    observers: List[Set[str]]
+    """additional sets that receive every written item name, such as those of a running PendingLocations"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.changed = set()
+        self.observers = []
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self.changed.add(key)
+        for observer in self.observers:
+            observer.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.changed.add(key)
+        for observer in self.observers:
+            observer.add(key)
+        super().__delitem__(key)
+
+    def update(self, iterable: Any = None, /, **kwds: int) -> None:
+        # an empty Counter is filled from a mapping through dict.update, which bypasses __setitem__
+        if isinstance(iterable, Mapping) and iterable:
+            self.changed.update(iterable)
+            for observer in self.observers:
+                observer.update(iterable)
+        super().update(iterable, **kwds)
+
+    def copy(self) -> ChangeTrackingCounter:
+        ret = super().copy()
+        ret.changed = self.changed.copy()
+        return ret
+
+
+class IndexedCounter(Counter):
+    """Counter used as CollectionState.prog_items for worlds with indexed_item_counts.
+    Also keeps every count in an array, at the index of the item name in MultiWorld.item_indices, so that rules can
+    check counts through CollectionState.has_index and related methods without hashing item names."""
+    indices: Dict[str, int]
+    """item name to index in counts, shared by all IndexedCounters of the same player"""
+    counts: array
+    """count per index, indices past its end have a count of 0"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        source = args[0] if args else None
+        if isinstance(source, IndexedCounter) and len(args) == 1 and not kwargs:
+            # copy, the counts are taken over as they are
+            super().__init__()
+            self.indices = source.indices
+            self.counts = source.counts[:]
+            dict.update(self, source)
+        else:
+            self.indices = {}
+            self.counts = array("i")
+            super().__init__(*args, **kwargs)
+
+    def _set_count(self, item_name: str, count: int) -> None:
+        index = self.indices.get(item_name)
+        if index is None:
+            index = self.indices[item_name] = len(self.indices)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (len(self.indices) - len(counts)))
+        counts[index] = count
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self._set_count(key, value)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._set_count(key, 0)
+
+    def update(self, iterable: Any = None, /, **kwds: int) -> None:
+        # an empty Counter is filled from a mapping through dict.update, which bypasses __setitem__
+        filled_directly = isinstance(iterable, Mapping) and not self
+        super().update(iterable, **kwds)
+        if filled_directly:
+            for item_name in iterable:
+                self._set_count(item_name, dict.__getitem__(self, item_name))
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self:
+            self._set_count(key, 0)
+        return super().pop(key, *default)
+
+    def popitem(self) -> Tuple[str, int]:
+        key, value = super().popitem()
+        self._set_count(key, 0)
+        return key, value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def clear(self) -> None:
+        super().clear()
+        self.counts = array("i")
+
+
+class IndexedChangeTrackingCounter(IndexedCounter, ChangeTrackingCounter):
+    """Counter used as CollectionState.prog_items for worlds with both incremental_reachability and
+    indexed_item_counts."""
+
+
+def new_prog_items_counter(multiworld: MultiWorld, player: int) -> Counter[str]:
+    """Creates an empty Counter for CollectionState.prog_items of player, of the type requested by its World."""
+    world = multiworld.worlds.get(player)
+    incremental = getattr(world, "incremental_reachability", False)
+    if getattr(world, "indexed_item_counts", False):
+        counter: IndexedCounter = IndexedChangeTrackingCounter() if incremental else IndexedCounter()
+        counter.indices = multiworld.item_indices[player]
+        return counter
+    return ChangeTrackingCounter() if incremental else Counter()
+
+
+class TracedCounter:
+    """Read-only view of a prog_items Counter that reports the item names read through it to a RuleTrace."""
+    __slots__ = ("counter", "trace")
+
+    def __init__(self, counter: Counter[str], trace: RuleTrace) -> None:
+        self.counter = counter
+        self.trace = trace
+
+    def __getitem__(self, item: str) -> int:
+        self.trace.reads.add(item)
+        return self.counter[item]
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.trace.reads.add(item)
+        return self.counter.get(item, default)
+
+    def __contains__(self, item: str) -> bool:
+        self.trace.reads.add(item)
+        return item in self.counter
+
+    def _own(self) -> Counter[str]:
+        # the counter may be shared with copies of the state, so writes have to go through the owning lookup
+        self.counter = self.trace.prog_items[self.trace.player]
+        return self.counter
+
+    # anything that looks at more than one named item at once, or writes, can't be attributed to item names
+    def __setitem__(self, item: str, value: int) -> None:
+        self.trace.traceable = False
+        self._own()[item] = value
+
+    def __delitem__(self, item: str) -> None:
+        self.trace.traceable = False
+        del self._own()[item]
+
+    def __iter__(self) -> Iterator[str]:
+        self.trace.traceable = False
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.trace.traceable = False
+        return len(self.counter)
+
+    def __bool__(self) -> bool:
+        self.trace.traceable = False
+        return bool(self.counter)
+
+    @property
+    def counts(self) -> array:
+        # reading by index can't be attributed to item names either, but doesn't need ownership
+        self.trace.traceable = False
+        return self.counter.counts
+
+    def __getattr__(self, name: str) -> Any:
+        self.trace.traceable = False
+        return getattr(self._own(), name)
+
+
+class TracedRegions:
+    """Stands in for CollectionState.reachable_regions while a rule is evaluated, noting if any Region is looked at."""
+    __slots__ = ("reachable_regions", "trace")
+
+    def __init__(self, reachable_regions: CopyOnWriteDict, trace: RuleTrace) -> None:
+        self.reachable_regions = reachable_regions
+        self.trace = trace
+
+    def __getitem__(self, player: int) -> Set[Region]:
+        self.trace.reads_regions = True
+        return self.reachable_regions[player]
+
+    def peek(self, player: int) -> Set[Region]:
+        self.trace.reads_regions = True
+        return self.reachable_regions.peek(player)
+
+    def __getattr__(self, name: str) -> Any:
+        self.trace.reads_regions = True
+        return getattr(self.reachable_regions, name)
+
+
+class RuleTrace:
+    """Stands in for CollectionState.prog_items while a rule of `player` is evaluated, recording which of that
+    player's item names the rule reads. Any other kind of access marks the rule as not traceable."""
+    __slots__ = ("prog_items", "player", "reads", "traceable", "reads_regions", "view", "regions")
+    prog_items: CopyOnWriteDict
+    player: int
+    reads: Set[str]
+    traceable: bool
+    reads_regions: bool
+    """whether the rule looked at Region reachability, which is only tracked through indirect conditions"""
+    view: Optional[TracedCounter]
+    regions: TracedRegions
+
+    def __init__(self, prog_items: CopyOnWriteDict, player: int, reachable_regions: CopyOnWriteDict) -> None:
+        self.prog_items = prog_items
+        self.player = player
+        self.reads = set()
+        self.traceable = True
+        self.reads_regions = False
+        self.view = None
+        self.regions = TracedRegions(reachable_regions, self)
+
+    def peek(self, player: int) -> Union[TracedCounter, Counter[str]]:
+        if player == self.player:
+            if self.view is None:
+                self.view = TracedCounter(self.prog_items.peek(player), self)
+            return self.view
+        self.traceable = False
+        return self.prog_items.peek(player)
+
+    def __getitem__(self, player: int) -> Union[TracedCounter, Counter[str]]:
+        if player == self.player:
+            return self.peek(player)
+        self.traceable = False
+        return self.prog_items[player]
+
+    def __iter__(self) -> Iterator[int]:
+        self.traceable = False
+        return iter(self.prog_items)
+
+    def __len__(self) -> int:
+        self.traceable = False
+        return len(self.prog_items)
+
+    def __getattr__(self, name: str) -> Any:
+        self.traceable = False
+        return getattr(self.prog_items, name)
+
+
+class RuleDependencies:
+    """Reverse index from item names to the Entrances or Locations of one player whose access rules read them.
+    Filled from traced rule evaluations, so it only ever grows and may contain more dependents than are current."""
+    dependents: Dict[str, Set[Any]]
+    untraceable: Set[Any]
+    """spots whose rule did something that could not be traced, these always have to be re-evaluated"""
+
+    def __init__(self) -> None:
+        self.dependents = {}
+        self.untraceable = set()
+
+    def register(self, spot: Union[Entrance, Location], trace: RuleTrace) -> None:
+        if not trace.traceable:
+            self.untraceable.add(spot)
+            return
+        for item_name in trace.reads:
+            dependents = self.dependents.get(item_name)
+            if dependents is None:
+                self.dependents[item_name] = {spot}
+            else:
+                dependents.add(spot)
+
+    def get_dependents(self, item_names: Iterable[str]) -> Set[Any]:
+        """Returns all spots that read any of item_names, and all untraceable spots."""
+        ret = self.untraceable.copy()
+        for item_name in item_names:
+            dependents = self.dependents.get(item_name)
+            if dependents:
+                ret |= dependents
+        return ret
+
+
+class PendingLocations:
+    """A set of Locations that are not yet reachable in a CollectionState.
+
+    For worlds with incremental_reachability, pop_reachable only re-tests Locations whose Region became reachable
+    or whose access rule read an item name that changed since the previous call. All other Locations are re-tested
+    on every call. Call close() when done, so the state stops reporting changes to this object."""
+    state: CollectionState
+    recheck: Set[Location]
+    """Locations tested on every call"""
+    candidates: Set[Location]
+    """incremental Locations to test on the next call"""
+    region_blocked: Dict[Region, Set[Location]]
+    """incremental Locations waiting on their parent Region"""
+    rule_blocked: Dict[int, Set[Location]]
+    """incremental Locations per player waiting on an item their access rule read"""
+    changed: Dict[int, Set[str]]
+    """item names per player written since the previous call"""
+    counters: Dict[int, ChangeTrackingCounter]
+    """prog_items Counter per player that reports to changed"""
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location]) -> None:
+        self.state = state
+        self.recheck = set()
+        self.candidates = set()
+        self.region_blocked = {}
+        self.rule_blocked = {}
+        self.changed = {}
+        self.counters = {}
+        incremental: Dict[int, bool] = {}
+        for location in locations:
+            player = location.player
+            if player not in incremental:
+                incremental[player] = state.uses_incremental_reachability(player)
+                if incremental[player]:
+                    self.changed[player] = set()
+                    self.rule_blocked[player] = set()
+                    self._observe(player)
+            if incremental[player] and type(location).can_reach is Location.can_reach:
+                self.candidates.add(location)
+            else:
+                self.recheck.add(location)
+
+    def _observe(self, player: int) -> None:
+        counter = self.state.prog_items[player]
+        counter.observers.append(self.changed[player])
+        self.counters[player] = counter
+
+    def __len__(self) -> int:
+        return len(self.recheck) + len(self.candidates) + sum(len(locations) for locations in
+                                                              self.region_blocked.values()) + \
+            sum(len(locations) for locations in self.rule_blocked.values())
+
+    def pop_reachable(self) -> Set[Location]:
+        """Returns and removes all Locations that are reachable in the current state."""
+        state = self.state
+        reachable = {location for location in self.recheck if location.can_reach(state)}
+        self.recheck -= reachable
+
+        candidates = self.candidates
+        self.candidates = set()
+        for region in [region for region in self.region_blocked if region.can_reach(state)]:
+            candidates |= self.region_blocked.pop(region)
+        for player, changed in self.changed.items():
+            rule_blocked = self.rule_blocked[player]
+            if state.prog_items.peek(player) is not self.counters[player]:
+                # the state was copied and then written to, so its Counter was replaced without reporting here
+                self.counters[player].observers.remove(changed)
+                self._observe(player)
+                woken = rule_blocked.copy()
+            else:
+                woken = state.multiworld.location_dependencies[player].get_dependents(changed) & rule_blocked
+            changed.clear()
+            rule_blocked -= woken
+            candidates |= woken
+
+        for location in candidates:
+            parent_region = location.parent_region
+            assert parent_region, f"called can_reach on a Location \"{location}\" with no parent_region"
+            if not parent_region.can_reach(state):
+                self.region_blocked.setdefault(parent_region, set()).add(location)
+                continue
+            reached, trace = state.trace_rule(location.player, location.access_rule)
+            if reached:
+                reachable.add(location)
+            else:
+                if trace.reads_regions:
+                    # unlike Entrances, Locations have no indirect conditions to wake them up on Region changes
+                    trace.traceable = False
+                state.multiworld.location_dependencies[location.player].register(location, trace)
+                self.rule_blocked[location.player].add(location)
+
+        if state.multiworld.debug_incremental_reachability:
+            waiting = set(candidates).union(*self.region_blocked.values(), *self.rule_blocked.values())
+            missed = {location for location in waiting - reachable if location.can_reach(state)}
+            assert not missed, f"Incremental reachability missed reachable locations {missed}"
+        return reachable
+
+    def close(self) -> None:
+        for player, changed in self.changed.items():
+            self.counters[player].observers.remove(changed)
+        self.changed = {}
+        self.counters = {}
+
+
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items = CopyOnWriteAttribute()  # Dict[int, Counter[str]]
     multiworld: MultiWorld
-    reachable_regions: Dict[int, Set[Region]]
-    blocked_connections: Dict[int, Set[Entrance]]
+    reachable_regions = CopyOnWriteAttribute()  # Dict[int, Set[Region]]
+    blocked_connections = CopyOnWriteAttribute()  # Dict[int, Set[Entrance]]
     advancements: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    failed_connections = CopyOnWriteAttribute()  # Dict[int, Set[Entrance]]
+    """subset of blocked_connections whose rule was evaluated by incremental reachability and returned False"""
     allow_partial_entrances: bool
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = CopyOnWriteDict({player: new_prog_items_counter(parent, player)
+                                           for player in parent.get_all_ids()})
         self.multiworld = parent
-        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
-        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.reachable_regions = CopyOnWriteDict({player: set() for player in parent.get_all_ids()})
+        self.blocked_connections = CopyOnWriteDict({player: set() for player in parent.get_all_ids()})
+        self.failed_connections = CopyOnWriteDict({player: set() for player in parent.get_all_ids()})
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
@@ -742,20 +1457,114 @@ class CollectionState():
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        incremental = self.uses_incremental_reachability(player)
+        if incremental:
+            queue = self._get_changed_connections(player)
+        else:
+            queue = deque(self.blocked_connections.peek(player))
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
             reachable_regions.add(start)
             self.blocked_connections[player].update(start.exits)
+            self.failed_connections[player] = set()
             queue.extend(start.exits)
 
-        if world.explicit_indirect_conditions:
+        if incremental:
+            self._update_reachable_regions_incremental(player, queue)
+            if self.multiworld.debug_incremental_reachability:
+                self._verify_reachable_regions(player)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
 
+    def uses_incremental_reachability(self, player: int) -> bool:
+        """Returns True if reachability for player is only re-evaluated for rules reading changed items.
+        Requires the World to opt in through incremental_reachability and explicit_indirect_conditions."""
+        world = self.multiworld.worlds[player]
+        return world.incremental_reachability and world.explicit_indirect_conditions and \
+            isinstance(self.prog_items.peek(player), ChangeTrackingCounter)
+
+    def trace_rule(self, player: int, rule: Callable[[CollectionState], bool]) -> Tuple[bool, RuleTrace]:
+        """Evaluates rule against this state, recording which item names of player it reads."""
+        trace = RuleTrace(self.prog_items, player, self.reachable_regions)
+        self.prog_items = trace  # type: ignore[assignment]
+        self.reachable_regions = trace.regions  # type: ignore[assignment]
+        try:
+            return rule(self), trace
+        finally:
+            self.prog_items = trace.prog_items
+            self.reachable_regions = trace.regions.reachable_regions
+
+    def _get_changed_connections(self, player: int) -> deque:
+        """Connections that may have become passable since the last update: those that were never evaluated,
+        and those whose rule read an item name that changed since."""
+        blocked_connections = self.blocked_connections[player]
+        failed_connections = self.failed_connections[player]
+        changed = self.prog_items[player].changed
+        failed_connections &= blocked_connections
+        candidates = blocked_connections - failed_connections
+        if changed:
+            woken = self.multiworld.entrance_dependencies[player].get_dependents(changed) & failed_connections
+            changed.clear()
+            failed_connections -= woken
+            candidates |= woken
+        return deque(candidates)
+
+    def _update_reachable_regions_incremental(self, player: int, queue: deque):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        failed_connections = self.failed_connections[player]
+        dependencies = self.multiworld.entrance_dependencies[player]
+        # run BFS on the connections that may have changed, remembering what each failed rule read
+        while queue:
+            connection = queue.popleft()
+            if connection not in blocked_connections or connection in failed_connections:
+                continue  # already handled through another path this update
+            new_region = connection.connected_region
+            if new_region in reachable_regions:
+                blocked_connections.remove(connection)
+                continue
+            reached, trace = self.trace_rule(player, connection.can_reach)
+            if not reached or (self.allow_partial_entrances and not new_region):
+                if new_region:
+                    dependencies.register(connection, trace)
+                    failed_connections.add(connection)
+                # partial entrances are left unevaluated, so they are retried once they get connected
+                continue
+            assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+            reachable_regions.add(new_region)
+            blocked_connections.remove(connection)
+            blocked_connections.update(new_region.exits)
+            failed_connections.difference_update(new_region.exits)
+            queue.extend(new_region.exits)
+            self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+            # Retry connections if the new region can unblock them
+            for new_entrance in self.multiworld.indirect_connections.get(new_region, ()):
+                if new_entrance in failed_connections:
+                    failed_connections.remove(new_entrance)
+                    queue.append(new_entrance)
+
+    def _verify_reachable_regions(self, player: int):
+        """Compares the incrementally updated reachable regions of player against a full search from scratch."""
+        world: AutoWorld.World = self.multiworld.worlds[player]
+        start: Region = world.get_region(world.origin_region_name)
+        reference = self.copy()
+        # plain Counters make the reference use full searches for every player
+        reference.prog_items = CopyOnWriteDict({player: Counter(counter)
+                                                for player, counter in reference.prog_items.items()})
+        reference.stale[player] = False
+        reference.reachable_regions[player] = {start}
+        reference.blocked_connections[player] = set(start.exits)
+        reference._update_reachable_regions_explicit_indirect_conditions(player, deque(start.exits))
+        assert reference.reachable_regions[player] == self.reachable_regions[player], \
+            f"Incremental reachability for player {player} disagrees with a full search. " \
+            f"Missing: {reference.reachable_regions[player] - self.reachable_regions[player]}, " \
+            f"Extra: {self.reachable_regions[player] - reference.reachable_regions[player]}"
+
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
@@ -807,11 +1616,12 @@ class CollectionState():
 
     def copy(self) -> CollectionState:
         ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        # per-player data is shared with ret until either state looks it up for writing, the other containers are
+        # still copied in full
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        ret.failed_connections = self.failed_connections.copy()
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
@@ -853,28 +1663,30 @@ class CollectionState():
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None) -> None:
         if locations is None:
             locations = self.multiworld.get_filled_locations()
-        reachable_advancements = True
         # since the loop has a good chance to run more than once, only filter the advancements once
-        locations = {location for location in locations if location.advancement and location not in self.advancements}
-
-        while reachable_advancements:
-            reachable_advancements = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_advancements
-            for advancement in reachable_advancements:
-                self.advancements.add(advancement)
-                assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
-                self.collect(advancement.item, True, advancement)
+        pending = PendingLocations(self, (location for location in locations
+                                          if location.advancement and location not in self.advancements))
+        try:
+            reachable_advancements = pending.pop_reachable()
+            while reachable_advancements:
+                for advancement in reachable_advancements:
+                    self.advancements.add(advancement)
+                    assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
+                    self.collect(advancement.item, True, advancement)
+                reachable_advancements = pending.pop_reachable()
+        finally:
+            pending.close()
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return self.prog_items.peek(player)[item] >= count
 
     # for loops are specifically used in all/any/count methods, instead of all()/any()/sum(), to avoid the overhead of
     # creating and iterating generator instances. In `return all(player_prog_items[item] for item in items)`, the
     # argument to all() would be a new generator instance, for example.
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item in items:
             if not player_prog_items[item]:
                 return False
@@ -882,7 +1694,7 @@ class CollectionState():
 
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item in items:
             if player_prog_items[item]:
                 return True
@@ -890,7 +1702,7 @@ class CollectionState():
 
     def has_all_counts(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if each item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item, count in item_counts.items():
             if player_prog_items[item] < count:
                 return False
@@ -898,19 +1710,19 @@ class CollectionState():
 
     def has_any_count(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if at least one item name is in the state at least as many times as specified."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item, count in item_counts.items():
             if player_prog_items[item] >= count:
                 return True
         return False
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return self.prog_items.peek(player)[item]
 
     def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
         """Returns True if the state contains at least `count` items matching any of the item names from a list."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item_name in items:
             found += player_prog_items[item_name]
             if found >= count:
@@ -921,7 +1733,7 @@ class CollectionState():
         """Returns True if the state contains at least `count` items matching any of the item names from a list.
         Ignores duplicates of the same item."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item_name in items:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -930,7 +1742,7 @@ class CollectionState():
 
     def count_from_list(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         total = 0
         for item_name in items:
             total += player_prog_items[item_name]
@@ -938,7 +1750,7 @@ class CollectionState():
 
     def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state. Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         total = 0
         for item_name in items:
             if player_prog_items[item_name] > 0:
@@ -949,7 +1761,7 @@ class CollectionState():
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         """Returns True if the state contains at least `count` items present in a specified item group."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
             if found >= count:
@@ -961,7 +1773,7 @@ class CollectionState():
         Ignores duplicates of the same item.
         """
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name] > 0
             if found >= count:
@@ -970,7 +1782,7 @@ class CollectionState():
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         return sum(
             player_prog_items[item_name]
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -979,12 +1791,43 @@ class CollectionState():
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self.prog_items.peek(player)
         return sum(
             player_prog_items[item_name] > 0
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
         )
 
+    # item index related, only for worlds with indexed_item_counts. Indices come from World.get_item_index()
+    def has_index(self, index: int, player: int, count: int = 1) -> bool:
+        try:
+            return self.prog_items.peek(player).counts[index] >= count
+        except IndexError:  # index was added after the last write to this counter
+            return False
+
+    def has_all_indices(self, indices: Iterable[int], player: int) -> bool:
+        """Returns True if each index is present at least once."""
+        counts = self.prog_items.peek(player).counts
+        length = len(counts)
+        for index in indices:
+            if index >= length or counts[index] < 1:
+                return False
+        return True
+
+    def has_any_indices(self, indices: Iterable[int], player: int) -> bool:
+        """Returns True if at least one index is present."""
+        counts = self.prog_items.peek(player).counts
+        length = len(counts)
+        for index in indices:
+            if index < length and counts[index] > 0:
+                return True
+        return False
+
+    def count_index(self, index: int, player: int) -> int:
+        try:
+            return self.prog_items.peek(player).counts[index]
+        except IndexError:
+            return 0
+
     # Item related
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
         if location:
@@ -1005,6 +1848,7 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            self.failed_connections[item.player] = set()
             self.stale[item.player] = True
 
 
@@ -1117,13 +1961,13 @@ class Region:
         def __delitem__(self, index: int) -> None:
             location: Location = self._list.__getitem__(index)
             self._list.__delitem__(index)
-            del(self.region_manager.location_cache[location.player][location.name])
+            self.region_manager.remove_location(location)
 
         def insert(self, index: int, value: Location) -> None:
             assert value.name not in self.region_manager.location_cache[value.player], \
                 f"{value.name} already exists in the location cache."
             self._list.insert(index, value)
-            self.region_manager.location_cache[value.player][value.name] = value
+            self.region_manager.add_location(value)
 
     class EntranceRegister(Register):
         def __delitem__(self, index: int) -> None:
@@ -1174,7 +2018,7 @@ class Region:
     def can_reach(self, state: CollectionState) -> bool:
         if state.stale[self.player]:
             state.update_reachable_regions(self.player)
-        return self in state.reachable_regions[self.player]
+        return self in state.reachable_regions.peek(self.player)
 
     @property
     def hint_text(self) -> str:
@@ -1210,7 +2054,7 @@ class Region:
         :param rule: callable to determine access of this connection to go from self to the exiting_region"""
         exit_ = self.create_exit(name if name else f"{self.name} -> {connecting_region.name}")
         if rule:
-            exit_.access_rule = rule
+            exit_.access_rule = compile_rule(rule) if isinstance(rule, Rule) else rule
         exit_.connect(connecting_region)
         return exit_
 
@@ -1276,7 +2120,10 @@ class Location:
     always_allow: Callable[[CollectionState, Item], bool] = staticmethod(lambda state, item: False)
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     item_rule: Callable[[Item], bool] = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    _item: Optional[Item] = None
+    _region_manager: Optional[MultiWorld.RegionManager] = None
+    """the RegionManager indexing this Location while it is in a Region"""
+    _cache_order: int = 0
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1284,6 +2131,16 @@ class Location:
         self.address = address
         self.parent_region = parent
 
+    @property
+    def item(self) -> Optional[Item]:
+        return self._item
+
+    @item.setter
+    def item(self, item: Optional[Item]) -> None:
+        if self._region_manager is not None:
+            self._region_manager.move_location(self, self._item, item)
+        self._item = item
+
     def can_fill(self, state: CollectionState, item: Item, check_access: bool = True) -> bool:
         return ((
             self.always_allow(state, item)
@@ -1318,7 +2175,7 @@ class Location:
 
     @property
     def advancement(self) -> bool:
-        return self.item is not None and self.item.advancement
+        return self._item is not None and self._item.advancement
 
     @property
     def is_event(self) -> bool:
@@ -1328,7 +2185,7 @@ class Location:
     @property
     def native_item(self) -> bool:
         """Returns True if the item in this location matches game."""
-        return self.item is not None and self.item.game == self.game
+        return self._item is not None and self._item.game == self.game
 
     @property
     def hint_text(self) -> str:
@@ -1473,39 +2330,35 @@ class Spoiler:
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
-        prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
+        spheres = multiworld.sphere_cache or Spheres(multiworld)
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
+        # build up spheres of collection radius.
+        # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+        for sphere in spheres.spheres:
+            sphere = {location for location in sphere if location.item and location.item.advancement}
+            if not sphere:
+                continue
             for location in sphere:
                 state.collect(location.item, True, location)
 
-            sphere_candidates -= sphere
             collection_spheres.append(sphere)
             state_cache.append(state.copy())
 
-            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere),
-                          len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in sphere_candidates]):
-                    raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
-                                       f'Something went terribly wrong here.')
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+            logging.debug('Calculated sphere %i, containing %i progress items.', len(collection_spheres), len(sphere))
+
+        unreachables = {location for location in spheres.unreachable if location.item and location.item.advancement}
+        if unreachables:
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           unreachables])
+            if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in unreachables]):
+                raise RuntimeError(f'Not all progression items reachable ({unreachables}). '
+                                   f'Something went terribly wrong here.')
+            else:
+                self.unreachables = unreachables
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
@@ -196,7 +196,9 @@ class CommonContext:
             self.lookup_type: typing.Literal["item", "location"] = lookup_type
             self._unknown_item: typing.Callable[[int], str] = lambda key: f"Unknown {lookup_type} (ID: {key})"
             self._archipelago_lookup: typing.Dict[int, str] = {}
-            self._flat_store: typing.Dict[int, str] = Utils.KeyedDefaultDict(self._unknown_item)
+            # the lookup of each game, the most recently updated one first
+            self._flat_store: typing.ChainMap[int, str] = collections.ChainMap(
+                Utils.KeyedDefaultDict(self._unknown_item))
             self._game_store: typing.Dict[str, typing.ChainMap[int, str]] = collections.defaultdict(
                 lambda: collections.ChainMap(self._archipelago_lookup, Utils.KeyedDefaultDict(self._unknown_item)))
             self.warned: bool = False
@@ -249,12 +251,21 @@ class CommonContext:
 
             return self.lookup_in_game(code, self.ctx.slot_info[slot].game)
 
-        def update_game(self, game: str, name_to_id_lookup_table: typing.Dict[str, int]) -> None:
+        def update_game(self, game: str, name_to_id_lookup_table: typing.Mapping[str, int]) -> None:
             """Overrides existing lookup tables for a particular game."""
-            id_to_name_lookup_table = Utils.KeyedDefaultDict(self._unknown_item)
-            id_to_name_lookup_table.update({code: name for name, code in name_to_id_lookup_table.items()})
-            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table)
-            self._flat_store.update(id_to_name_lookup_table)  # Only needed for legacy lookup method.
+            id_to_name_lookup_table: typing.Mapping[int, str]
+            if isinstance(name_to_id_lookup_table, Utils.DataPackageNames):
+                # from a data package file, which can look up ids without a dict
+                id_to_name_lookup_table = name_to_id_lookup_table.id_to_name
+            else:
+                id_to_name_lookup_table = Utils.ReverseLookup(name_to_id_lookup_table)
+            previous = self._game_store.get(game)
+            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table,
+                                                          Utils.KeyedDefaultDict(self._unknown_item))
+            # Only needed for legacy lookup method.
+            if previous is not None:
+                self._flat_store.maps[:] = [lookup for lookup in self._flat_store.maps if lookup is not previous.maps[1]]
+            self._flat_store.maps.insert(0, id_to_name_lookup_table)
             if game == "Archipelago":
                 # Keep track of the Archipelago data package separately so if it gets updated in a custom datapackage,
                 # it updates in all chain maps automatically.
@@ -624,9 +635,6 @@ class CommonContext:
 
     def consume_network_data_package(self, data_package: dict):
         self.update_data_package(data_package)
-        current_cache = Utils.persistent_load().get("datapackage", {}).get("games", {})
-        current_cache.update(data_package["games"])
-        Utils.persistent_store("datapackage", "games", current_cache)
         logger.info(f"Got new ID/Name DataPackage for {', '.join(data_package['games'])}")
         for game, game_data in data_package["games"].items():
             Utils.store_data_package_for_checksum(game, game_data)
@@ -1,4 +1,5 @@
 import collections
+import heapq
 import itertools
 import logging
 import typing
@@ -8,7 +9,7 @@ from BaseClasses import CollectionState, Item, Location, LocationProgressType, M
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
-from worlds.generic.Rules import add_item_rule
+from worlds.generic.Rules import add_item_rule, is_item_only_rule
 
 
 class FillError(RuntimeError):
@@ -33,6 +34,149 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class PoolSweep:
+    """
+    Keeps the maximum exploration state of a fill step up to date, base_state with the remaining item pool collected
+    and swept, without starting over from base_state for every placement.
+
+    A checkpoint is swept with the pool except the items that get placed next. Every state is then a copy of the
+    checkpoint that only collects the rest of the pool and sweeps from there. Collecting can't be undone, so once the
+    pool lost an item the checkpoint collected, or a Location it collected from got a different Item, a new checkpoint
+    is swept from base_state.
+    """
+    base_state: CollectionState
+    player: typing.Optional[int]
+    """if set, only the filled Locations of this player get swept"""
+    checkpoint: typing.Optional[CollectionState]
+    checkpoint_items: typing.Set[int]
+    """ids of the Items collected into the checkpoint from the pool"""
+    full_sweeps: int
+    incremental_sweeps: int
+    window: typing.ClassVar[int] = 16
+    """how many of the next Items of each player fill_restrictive leaves out of a checkpoint"""
+
+    def __init__(self, base_state: CollectionState, player: typing.Optional[int] = None) -> None:
+        self.base_state = base_state
+        self.player = player
+        self.checkpoint = None
+        self.checkpoint_items = set()
+        self.full_sweeps = 0
+        self.incremental_sweeps = 0
+
+    def get_locations(self) -> typing.Optional[typing.List[Location]]:
+        return None if self.player is None else self.base_state.multiworld.get_filled_locations(self.player)
+
+    def get_state(self, pool: typing.Sequence[Item], upcoming: typing.Iterable[Item] = ()) -> CollectionState:
+        """
+        Returns base_state with pool collected and swept, like sweep_from_pool does.
+
+        :param pool: Items assumed to be collectable.
+        :param upcoming: Items of pool that likely get placed soon, they are left out of a new checkpoint.
+        """
+        pool_items = {id(item) for item in pool}
+        if self.checkpoint is None or not self.checkpoint_items <= pool_items:
+            upcoming_items = {id(item) for item in upcoming}
+            self.checkpoint = sweep_from_pool(self.base_state, [item for item in pool
+                                                                if id(item) not in upcoming_items],
+                                              self.get_locations())
+            self.checkpoint_items = pool_items - upcoming_items
+            self.full_sweeps += 1
+        else:
+            self.incremental_sweeps += 1
+        return sweep_from_pool(self.checkpoint, [item for item in pool if id(item) not in self.checkpoint_items],
+                               self.get_locations())
+
+    def location_changed(self, location: Location) -> None:
+        """Has to be called when location lost or changed the Item the checkpoint might have collected from it."""
+        if self.checkpoint is not None and location in self.checkpoint.advancements:
+            self.checkpoint = None
+
+
+class LocationCandidates:
+    """
+    The open Locations of a fill step, grouped into buckets by the player they take Items from in single player
+    placement and by whether they are excluded, in the order of the list they came from.
+
+    Finds the first Location of the list that can_fill an Item, like scanning the list does, while only looking into
+    the buckets that can take the Item. Results of item_rules marked with item_only_rule are remembered per Location
+    and kind of Item, and reachability per Location for the state it was checked in.
+    """
+    locations: typing.List[Location]
+    buckets: typing.Dict[typing.Tuple[typing.Optional[int], bool], typing.Dict[int, Location]]
+    """Locations by the player they take Items from and whether they are excluded, keyed by position"""
+    positions: typing.Dict[int, int]
+    """position in locations by id of the Location"""
+    single_player_placement: bool
+    rule_results: typing.Dict[typing.Tuple[int, str, int, int], bool]
+    """item_rule results by id of the Location and name, player and classification of the Item"""
+    state: typing.Optional[CollectionState]
+    reachable: typing.Dict[int, bool]
+    """can_reach results in state by id of the Location"""
+
+    def __init__(self, locations: typing.List[Location], single_player_placement: bool = False) -> None:
+        self.locations = locations
+        self.single_player_placement = single_player_placement
+        self.buckets = {}
+        self.positions = {}
+        for position, location in enumerate(locations):
+            self.buckets.setdefault(self.get_bucket(location), {})[position] = location
+            self.positions[id(location)] = position
+        self.rule_results = {}
+        self.state = None
+        self.reachable = {}
+
+    @staticmethod
+    def is_plain(location: Location) -> bool:
+        """Whether location has the can_fill of Location and always_allow never lets an Item bypass the other rules."""
+        return type(location).can_fill is Location.can_fill and location.always_allow is Location.always_allow
+
+    def get_bucket(self, location: Location) -> typing.Tuple[typing.Optional[int], bool]:
+        return (location.player if self.single_player_placement else None,
+                self.is_plain(location) and location.progress_type == LocationProgressType.EXCLUDED)
+
+    def can_fill(self, state: CollectionState, location: Location, item: Item, check_access: bool) -> bool:
+        """Location.can_fill for a Location of a bucket that can take item, from remembered results if possible."""
+        if not self.is_plain(location):
+            return location.can_fill(state, item, check_access)
+        item_rule = location.item_rule
+        if is_item_only_rule(item_rule):
+            key = (id(location), item.name, item.player, item.classification)
+            allowed = self.rule_results.get(key)
+            if allowed is None:
+                allowed = self.rule_results[key] = bool(item_rule(item))
+        else:
+            # may read anything, such as the Items placed in other Locations
+            allowed = bool(item_rule(item))
+        if not allowed or not check_access:
+            return allowed
+        reachable = self.reachable.get(id(location))
+        if reachable is None:
+            reachable = self.reachable[id(location)] = location.can_reach(state)
+        return reachable
+
+    def pop_fillable(self, state: CollectionState, item: Item, check_access: bool = True) -> typing.Optional[Location]:
+        """Removes and returns the first Location that can_fill item, if there is one."""
+        if state is not self.state:
+            self.state = state
+            self.reachable = {}
+        buckets = [bucket for (player, excluded), bucket in self.buckets.items()
+                   if (player is None or player == item.player) and not (excluded and (item.advancement or
+                                                                                         item.useful))]
+        candidates = iter(buckets[0].items()) if len(buckets) == 1 else heapq.merge(
+            *(bucket.items() for bucket in buckets))
+        spot = next((location for _, location in candidates if self.can_fill(state, location, item, check_access)),
+                    None)
+        if state.multiworld.debug_location_candidates:
+            expected = next((location for location in self.locations
+                             if (not self.single_player_placement or location.player == item.player)
+                             and location.can_fill(state, item, check_access)), None)
+            assert spot is expected, f"Location candidates chose {spot} instead of {expected} for {item}"
+        if spot is not None:
+            self.locations.remove(spot)
+            del self.buckets[self.get_bucket(spot)][self.positions.pop(id(spot))]
+        return spot
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -63,6 +207,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     total = min(len(item_pool), len(locations))
     placed = 0
 
+    pool_sweep: typing.Optional[PoolSweep] = None
+    candidates = LocationCandidates(locations, single_player_placement)
+
     while any(reachable_items.values()) and locations:
         if one_item_per_player:
             # grab one item per player
@@ -80,9 +227,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     item_pool.pop(p)
                     break
 
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+        if pool_sweep is None:
+            pool_sweep = PoolSweep(base_state, item.player if single_player_placement else None)
+        # reachable_items get placed from the back
+        maximum_exploration_state = pool_sweep.get_state(
+            item_pool + unplaced_items, (item for items in reachable_items.values()
+                                         for item in itertools.islice(reversed(items), PoolSweep.window)))
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
 
@@ -103,15 +253,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill = candidates.pop_fillable(maximum_exploration_state, item_to_place, perform_access_check)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # try swapping this item with previously placed items in a safe way then in an unsafe way
@@ -150,6 +293,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                                 # Add this item to the existing placement, and
                                 # add the old item to the back of the queue
                                 spot_to_fill = placements.pop(i)
+                                pool_sweep.location_changed(spot_to_fill)
 
                                 swap_count += 1
                                 swapped_items[placed_item.player, placed_item.name, unsafe] = swap_count
@@ -185,6 +329,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
     if total > 1000:
         _log_fill_progress(name, placed, total)
+    if pool_sweep:
+        logging.debug(f"Fill step ({name}) swept from base_state {pool_sweep.full_sweeps} times "
+                      f"and from a checkpoint {pool_sweep.incremental_sweeps} times.")
 
     if cleanup_required:
         # validate all placements and remove invalid ones
@@ -463,7 +610,9 @@ def distribute_items_restrictive(multiworld: MultiWorld,
     itempool = sorted(multiworld.itempool)
     multiworld.random.shuffle(itempool)
 
+    multiworld.set_rule_profile_stage("distribute_early_items")
     fill_locations, itempool = distribute_early_items(multiworld, fill_locations, itempool)
+    multiworld.set_rule_profile_stage("progression fill")
 
     progitempool: typing.List[Item] = []
     usefulitempool: typing.List[Item] = []
@@ -548,6 +697,7 @@ def distribute_items_restrictive(multiworld: MultiWorld,
             location.locked = True
     del mark_for_locking, lock_later
 
+    multiworld.set_rule_profile_stage("remaining fill")
     inaccessible_location_rules(multiworld, multiworld.state, defaultlocations)
 
     remaining_fill(multiworld, excludedlocations, filleritempool, "Remaining Excluded",
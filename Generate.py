@@ -51,6 +51,12 @@ def mystery_argparse():
                         help="List of options that can be set manually. Can be combined, for example \"bosses, items\"")
     parser.add_argument("--skip_prog_balancing", action="store_true",
                         help="Skip progression balancing step during generation.")
+    parser.add_argument("--parallel_generation", type=int, default=0,
+                        help="Run the early generation stages of Worlds and delta patch creation that support it "
+                             "in this many processes.")
+    parser.add_argument("--profile_rules", action="store_true",
+                        help="Count the calls and time of every access rule, item rule and completion condition, and "
+                             "write a JSON and flamegraph report of them into the output.")
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
@@ -166,6 +172,8 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     erargs.skip_output = args.skip_output
     erargs.name = {}
     erargs.csv_output = args.csv_output
+    erargs.parallel_generation = args.parallel_generation
+    erargs.profile_rules = args.profile_rules
 
     settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
         {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
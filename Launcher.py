@@ -30,8 +30,11 @@ import settings
 import Utils
 from Utils import (init_logging, is_frozen, is_linux, is_macos, is_windows, local_path, messagebox, open_filename,
                    user_path)
+from worlds import load_all_worlds
 from worlds.LauncherComponents import Component, components, icon_paths, SuffixIdentifier, Type
 
+load_all_worlds()  # components, and the patches and clients they open, are registered by the worlds themselves
+
 
 def open_host_yaml():
     s = settings.get_settings()
@@ -2,11 +2,8 @@ import collections
 import concurrent.futures
 import logging
 import os
-import pickle
 import tempfile
 import time
-import zipfile
-import zlib
 from typing import Dict, List, Optional, Set, Tuple, Union
 
 import worlds
@@ -14,9 +11,10 @@ from BaseClasses import CollectionState, Item, Location, LocationProgressType, M
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, distribute_planned, \
     flood_items
 from Options import StartInventoryPool
-from Utils import __version__, output_path, version_tuple, get_settings
+from Utils import __version__, dump_multidata, output_path, parse_multidata_compression, version_tuple, get_settings
 from settings import get_settings
 from worlds import AutoWorld
+from worlds.Files import DeltaDiffService, OutputArchive
 from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
@@ -26,6 +24,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
     assert isinstance(baked_server_options, dict)
+    # checked before generating, so that a broken setting doesn't fail the output after everything else is done
+    multidata_compression = parse_multidata_compression(get_settings().generator.multidata_compression)
     if args.outputpath:
         os.makedirs(args.outputpath, exist_ok=True)
         output_path.cached_path = args.outputpath
@@ -37,6 +37,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
     multiworld.plando_options = args.plando_options
+    multiworld.generation_processes = args.parallel_generation
     multiworld.plando_items = args.plando_items.copy()
     multiworld.plando_texts = args.plando_texts.copy()
     multiworld.plando_connections = args.plando_connections.copy()
@@ -53,30 +54,36 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # from the manifest, so that worlds that aren't used don't need to be imported
+    manifests = {name: manifest for name, manifest in worlds.world_manifest.items()
+                 if name in AutoWorld.AutoWorldRegister.world_types}
+    logger.info(f"Found {len(manifests)} World Types:")
+    longest_name = max(len(text) for text in manifests)
 
+    item_ids = {name: manifest["data_package"]["item_name_to_id"].values() for name, manifest in manifests.items()}
+    location_ids = {name: manifest["data_package"]["location_name_to_id"].values()
+                    for name, manifest in manifests.items()}
     max_item = 0
     max_location = 0
-    for cls in AutoWorld.AutoWorldRegister.world_types.values():
-        if cls.item_id_to_name:
-            max_item = max(max_item, max(cls.item_id_to_name))
-            max_location = max(max_location, max(cls.location_id_to_name))
+    for name in manifests:
+        if item_ids[name]:
+            max_item = max(max_item, max(item_ids[name]))
+            max_location = max(max_location, max(location_ids[name]))
 
     item_digits = len(str(max_item))
     location_digits = len(str(max_location))
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(ids) for ids in item_ids.values())))
+    location_count = len(str(max(len(ids) for ids in location_ids.values())))
     del max_item, max_location
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
-        if not cls.hidden and len(cls.item_names) > 0:
-            logger.info(f" {name:{longest_name}}: {len(cls.item_names):{item_count}} "
-                        f"Items (IDs: {min(cls.item_id_to_name):{item_digits}} - "
-                        f"{max(cls.item_id_to_name):{item_digits}}) | "
-                        f"{len(cls.location_names):{location_count}} "
-                        f"Locations (IDs: {min(cls.location_id_to_name):{location_digits}} - "
-                        f"{max(cls.location_id_to_name):{location_digits}})")
+    for name, manifest in manifests.items():
+        if not manifest["hidden"] and len(item_ids[name]) > 0:
+            logger.info(f" {name:{longest_name}}: {len(item_ids[name]):{item_count}} "
+                        f"Items (IDs: {min(item_ids[name]):{item_digits}} - "
+                        f"{max(item_ids[name]):{item_digits}}) | "
+                        f"{len(location_ids[name]):{location_count}} "
+                        f"Locations (IDs: {min(location_ids[name]):{location_digits}} - "
+                        f"{max(location_ids[name]):{location_digits}})")
 
     del item_digits, location_digits, item_count, location_count
 
@@ -115,6 +122,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
     logger.info('Creating Items.')
     AutoWorld.call_all(multiworld, "create_items")
+    multiworld.index_item_names()
 
     logger.info('Calculating Access Rules.')
 
@@ -192,24 +200,33 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     if any(multiworld.item_links.values()):
         multiworld._all_state = None
 
+    if args.profile_rules:
+        from rule_profiler import RuleProfiler
+        RuleProfiler().install(multiworld)
+
     logger.info("Running Item Plando.")
+    multiworld.set_rule_profile_stage("distribute_planned")
 
     distribute_planned(multiworld)
 
     logger.info('Running Pre Main Fill.')
 
+    multiworld.set_rule_profile_stage("pre_fill")
     AutoWorld.call_all(multiworld, "pre_fill")
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
+    multiworld.set_rule_profile_stage("fill")
     if multiworld.algorithm == 'flood':
         flood_items(multiworld)  # different algo, biased towards early game progress items
     elif multiworld.algorithm == 'balanced':
         distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
+    multiworld.set_rule_profile_stage("post_fill")
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
+        multiworld.set_rule_profile_stage("balance_multiworld_progression")
         balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
@@ -218,24 +235,49 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     multiworld.random.passthrough = False
 
     if args.skip_output:
+        if multiworld.rule_profiler:
+            multiworld.rule_profiler.log_summary()
+            for name, data in multiworld.rule_profiler.get_files(f"AP_{multiworld.seed_name}").items():
+                with open(output_path(name), "wb") as f:
+                    f.write(data)
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
         return multiworld
 
     logger.info(f'Beginning output...')
+    multiworld.set_rule_profile_stage("output")
+    # the fill is final from here on, so the accessibility check, multidata and spoiler can share one sweep
+    multiworld.cache_spheres()
     outfilebase = 'AP_' + multiworld.seed_name
 
+    zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
+    logger.info(f"Writing output into {zipfilename}")
     output = tempfile.TemporaryDirectory()
-    with output as temp_dir:
+    # files are moved into the archive as soon as they are done, containers are written into it directly
+    with output as temp_dir, OutputArchive(zipfilename, temp_dir) as archive:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        parallel_output = AutoWorld.ParallelOutput(multiworld, output_players, temp_dir)
+        # the worker processes are forked once before the output threads start and shared by the delta patches
+        with parallel_output, DeltaDiffService(pool=parallel_output.pool) as diff_service, \
+                concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
+            def write_output(player: int) -> None:
+                if player in parallel_output.players:
+                    parallel_output.wait(player)
+                else:
+                    AutoWorld.call_single(multiworld, "generate_output", player,
+                                          parallel_output.get_output_directory(player))
+                archive.add_directory(parallel_output.get_output_directory(player))
+
+            def write_stage_output() -> None:
+                AutoWorld.call_stage(multiworld, "generate_output", temp_dir)
+                archive.add_directory(temp_dir)
+
+            output_file_futures = [pool.submit(write_stage_output)]
             for player in output_players:
                 # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                output_file_futures.append(pool.submit(write_output, player))
 
             # collect ER hint info
             er_hint_data: Dict[int, Dict[int, str]] = {}
@@ -339,11 +381,9 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                # compressed already
+                archive.write_file(f'{outfilebase}.archipelago', dump_multidata(multidata, *multidata_compression),
+                                   compress=False)
 
             output_file_futures.append(pool.submit(write_multidata))
             if not check_accessibility_task.result():
@@ -358,19 +398,25 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                     logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
                 future.result()
 
+        if parallel_output.players:
+            logger.info(f"Output of {len(parallel_output.players)} players was written in "
+                        f"{parallel_output.processes} worker processes.")
+        for game, taken in sorted(diff_service.times.items()):
+            logger.info(f"Creating {diff_service.counts[game]} delta patches of {game} took {taken:.4f} seconds.")
+
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
+            multiworld.set_rule_profile_stage("spoiler playthrough")
             multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
             multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
+            archive.add_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
 
-        zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
-        logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-            for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+        if multiworld.rule_profiler:
+            multiworld.rule_profiler.log_summary()
+            for name, data in multiworld.rule_profiler.get_files(outfilebase).items():
+                archive.write_file(name, data)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -12,6 +12,7 @@ import inspect
 import itertools
 import logging
 import math
+import mmap
 import operator
 import pickle
 import random
@@ -49,6 +50,10 @@ from BaseClasses import ItemClassification
 min_client_version = Version(0, 1, 6)
 colorama.just_fix_windows_console()
 
+shared_name_indices: typing.MutableMapping[typing.Tuple[str, str, str], Utils.FuzzyNameIndex] = \
+    weakref.WeakValueDictionary()
+"""name indices by game, data package checksum and kind of names, shared by the rooms of this process"""
+
 
 def remove_from_list(container, value):
     try:
@@ -121,6 +126,8 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
 
 class Client(Endpoint):
     version = Version(0, 0, 0)
+    team: typing.Optional[int]
+    slot: typing.Optional[int]
     tags: typing.List[str]
     remote_items: bool
     remote_start_inventory: bool
@@ -163,6 +170,130 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class SaveJournal:
+    """
+    Tracks what changed in a save since the last record, so a save can append a compact record instead of pickling
+    everything. Records are replayed on top of the last full save with replay_save_journal.
+    """
+    journaled_keys: typing.ClassVar[typing.FrozenSet[str]] = \
+        frozenset(("received_items", "hints", "location_checks", "stored_data"))
+    """keys of Context.get_save that records only contain the changes of, the rest is small and stored whole if it
+    changed"""
+    compact_ratio: float = 1.0
+    """ask for a full save once the records add up to this fraction of the last full save"""
+
+    generation: int
+    """incremented with each full save, records of an older generation are outdated"""
+    location_checks: typing.List[typing.Tuple[int, int, typing.Set[int]]]
+    stored_data: typing.Dict[str, typing.Any]
+    received_item_counts: typing.Dict[typing.Tuple[int, int, bool], int]
+    hints: typing.Dict[team_slot, typing.FrozenSet[Hint]]
+    """hints as of the last record, hints change in too many places to track them individually"""
+    state: typing.Dict[str, bytes]
+    """pickled values of the keys that aren't journaled as of the last record, to only record those that changed"""
+    save_size: int
+    records_size: int
+
+    def __init__(self, generation: int = 0) -> None:
+        self.generation = generation
+        self.location_checks = []
+        self.stored_data = {}
+        self.received_item_counts = {}
+        self.hints = {}
+        self.state = {}
+        self.save_size = 0
+        self.records_size = 0
+
+    def add_location_checks(self, team: int, slot: int, locations: typing.Set[int]) -> None:
+        self.location_checks.append((team, slot, locations))
+
+    def set_stored_data(self, key: str, value: typing.Any) -> None:
+        self.stored_data[key] = value
+
+    def should_compact(self) -> bool:
+        return not self.save_size or self.records_size > self.save_size * self.compact_ratio
+
+    def on_full_save(self, save: typing.Dict[str, typing.Any], save_size: int) -> None:
+        """Starts a new generation of records on top of save, which was written with save_size bytes."""
+        self.generation = save["journal_generation"]
+        self.location_checks = []
+        self.stored_data = {}
+        self.received_item_counts = {key: len(items) for key, items in save["received_items"].items()}
+        self.hints = {key: frozenset(hints) for key, hints in save["hints"].items()}
+        self.state = {key: pickle.dumps(value) for key, value in save.items() if key not in self.journaled_keys}
+        self.save_size = save_size
+        self.records_size = 0
+
+    def get_record(self, save: typing.Dict[str, typing.Any]) -> bytes:
+        """Returns the encoded changes from the last record to save, which is a result of Context.get_save."""
+        location_checks, self.location_checks = self.location_checks, []
+        stored_data, self.stored_data = self.stored_data, {}
+        received_items = []
+        for key, items in save["received_items"].items():
+            start = self.received_item_counts.get(key, 0)
+            if len(items) > start:
+                received_items.append((key, start, items[start:]))
+                self.received_item_counts[key] = len(items)
+        hints = {}
+        for key, key_hints in save["hints"].items():
+            key_hints = frozenset(key_hints)
+            if self.hints.get(key) != key_hints:
+                hints[key] = self.hints[key] = key_hints
+        state = {}
+        for key, value in save.items():
+            if key not in self.journaled_keys:
+                # comparing pickles may see a change where there is none, but never misses one
+                pickled = pickle.dumps(value)
+                if self.state.get(key) != pickled:
+                    state[key] = value
+                    self.state[key] = pickled
+        record = encode_save_journal_record({
+            "journal_generation": self.generation,
+            "location_checks": location_checks,
+            "received_items": received_items,
+            "hints": hints,
+            "stored_data": stored_data,
+            "state": state,
+        })
+        self.records_size += len(record)
+        return record
+
+
+def encode_save_journal_record(record: typing.Dict[str, typing.Any]) -> bytes:
+    data = zlib.compress(pickle.dumps(record))
+    return len(data).to_bytes(4, "little") + data
+
+
+def decode_save_journal(data: bytes) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """Yields the records of an encoded journal, stopping at a record that was not completely written."""
+    position = 0
+    while position + 4 <= len(data):
+        size = int.from_bytes(data[position:position + 4], "little")
+        position += 4
+        if position + size > len(data):
+            break
+        yield restricted_loads(zlib.decompress(data[position:position + size]))
+        position += size
+
+
+def replay_save_journal(save: typing.Dict[str, typing.Any], records: typing.Iterable[typing.Dict[str, typing.Any]]) \
+        -> typing.Dict[str, typing.Any]:
+    """Applies records of the same generation as save to save, resulting in the save at the time of the last record."""
+    for record in records:
+        if record["journal_generation"] != save.get("journal_generation", 0):
+            continue
+        for team, slot, locations in record["location_checks"]:
+            save["location_checks"].setdefault((team, slot), set()).update(locations)
+        for key, start, items in record["received_items"]:
+            received_items = save["received_items"].setdefault(key, [])
+            del received_items[start:]
+            received_items.extend(items)
+        save["hints"].update({key: set(hints) for key, hints in record["hints"].items()})
+        save["stored_data"].update(record["stored_data"])
+        save.update(record["state"])
+    return save
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -181,6 +312,7 @@ class Context:
     endpoints: list[Client]
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
+    received_items: typing.Dict[typing.Tuple[int, int, bool], typing.List[NetworkItem]]
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
@@ -197,14 +329,20 @@ class Context:
     all_item_and_group_names: typing.Dict[str, typing.Set[str]]
     all_location_and_group_names: typing.Dict[str, typing.Set[str]]
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
+    name_indices: typing.Dict[typing.Tuple[str, str], Utils.FuzzyNameIndex]
+    """index of names by game and kind of names, built when first looked up"""
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    sphere_index: typing.Dict[int, typing.Dict[int, int]]
+    """sphere of each location by player, built from spheres on load"""
+    sphere_sizes: typing.List[int]
+    """amount of locations in each sphere"""
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
                  hint_cost: int, item_cheat: bool, release_mode: str = "disabled", collect_mode="disabled",
                  remaining_mode: str = "disabled", auto_shutdown: typing.SupportsFloat = 0, compatibility: int = 2,
-                 log_network: bool = False, logger: logging.Logger = logging.getLogger()):
+                 log_network: bool = False, logger: logging.Logger = logging.getLogger(), journal_save: bool = False):
         self.logger = logger
         super(Context, self).__init__()
         self.slot_info = {}
@@ -216,6 +354,13 @@ class Context:
         self.data_filename = None
         self.save_filename = None
         self.saving = False
+        self.journal_save = journal_save
+        self.save_journal: typing.Optional[SaveJournal] = None
+        self.new_item_slots: typing.Set[team_slot] = set()  # slots with items their clients were not sent yet
+        self.new_items_scheduled = False
+        self.changed_hint_slots: typing.Set[team_slot] = set()  # slots with hints their watchers were not sent yet
+        self.encode_times: typing.Counter[str] = collections.Counter()
+        self.encode_counts: typing.Counter[str] = collections.Counter()
         self.player_names: typing.Dict[team_slot, str] = {}
         self.player_name_lookup: typing.Dict[str, team_slot] = {}
         self.connect_names = {}  # names of slots clients can connect to
@@ -234,6 +379,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # hints by (team, finding player, location), so checking a location only rechecks the hints pointing at it
+        self.hints_by_location: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -263,6 +410,8 @@ class Context:
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
         self.spheres = []
+        self.sphere_index = {}
+        self.sphere_sizes = []
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -276,6 +425,7 @@ class Context:
         self.location_names = collections.defaultdict(
             lambda: Utils.KeyedDefaultDict(lambda code: f'Unknown location (ID:{code})'))
         self.non_hintable_names = collections.defaultdict(frozenset)
+        self.name_indices = {}
 
         self._load_game_data()
 
@@ -284,12 +434,13 @@ class Context:
         import worlds
         self.gamespackage = worlds.network_data_package["games"]
 
-        self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
-                                 worlds.AutoWorldRegister.world_types.items()}
-        self.location_name_groups = {world_name: world.location_name_groups for world_name, world in
-                                     worlds.AutoWorldRegister.world_types.items()}
-        for world_name, world in worlds.AutoWorldRegister.world_types.items():
-            self.non_hintable_names[world_name] = world.hint_blacklist
+        # from the manifest, so that worlds don't need to be imported
+        self.item_name_groups = {world_name: manifest["data_package"]["item_name_groups"]
+                                 for world_name, manifest in worlds.world_manifest.items()}
+        self.location_name_groups = {world_name: manifest["data_package"]["location_name_groups"]
+                                     for world_name, manifest in worlds.world_manifest.items()}
+        for world_name, manifest in worlds.world_manifest.items():
+            self.non_hintable_names[world_name] = frozenset(manifest["hint_blacklist"])
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
@@ -297,6 +448,7 @@ class Context:
             del game_package["location_name_groups"]
 
     def _init_game_data(self):
+        self.name_indices.clear()
         for game_name, game_package in self.gamespackage.items():
             if "checksum" in game_package:
                 self.checksums[game_name] = game_package["checksum"]
@@ -322,11 +474,45 @@ class Context:
     def location_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
+    def get_name_index(self, game: str, kind: str) -> Utils.FuzzyNameIndex:
+        """Returns the index for fuzzy lookups of a known game's names,
+        kind being one of "items", "locations", "items_and_groups" or "locations_and_groups"."""
+        index = self.name_indices.get((game, kind))
+        if index is None:
+            checksum = self.checksums.get(game)
+            if checksum:
+                index = shared_name_indices.get((game, checksum, kind))
+            if index is None:
+                if kind == "items":
+                    names = self.item_names_for_game(game)
+                elif kind == "locations":
+                    names = self.location_names_for_game(game)
+                elif kind == "items_and_groups":
+                    names = self.all_item_and_group_names[game]
+                elif kind == "locations_and_groups":
+                    names = self.all_location_and_group_names[game]
+                else:
+                    raise ValueError(f"Unknown kind of names {kind}")
+                index = Utils.FuzzyNameIndex(names)
+                if checksum:
+                    shared_name_indices[game, checksum, kind] = index
+            self.name_indices[game, kind] = index
+        return index
+
     # General networking
-    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
+    def encode_msgs(self, msgs: typing.List[dict]) -> str:
+        """Encodes msgs with dumper, counting the time spent per command of the first message."""
+        start = time.perf_counter()
+        data = self.dumper(msgs)
+        cmd = msgs[0].get("cmd", "") if msgs else ""
+        self.encode_times[cmd] += time.perf_counter() - start
+        self.encode_counts[cmd] += 1
+        return data
+
+    async def send_msgs(self, endpoint: Endpoint, msgs: typing.List[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
+        msg = self.encode_msgs(msgs)
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -369,7 +555,7 @@ class Context:
 
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
+        data = self.encode_msgs(msgs)
         endpoints = (
             endpoint
             for endpoint in self.endpoints
@@ -383,7 +569,7 @@ class Context:
 
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
+        data = self.encode_msgs(msgs)
         endpoints = (
             endpoint
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
@@ -392,8 +578,8 @@ class Context:
         async_start(self.broadcast_send_encoded_msgs(endpoints, data))
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        data = self.encode_msgs(msgs)
+        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
@@ -428,24 +614,23 @@ class Context:
                     raise Exception("No .archipelago found in archive.")
         else:
             with open(multidatapath, 'rb') as f:
-                data = f.read()
+                # sections are decompressed straight from the mapped file, it is unmapped once they are all loaded
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
         self._load(self.decompress(data), {}, use_embedded_server_options)
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: typing.Union[bytes, mmap.mmap]) -> typing.MutableMapping[str, typing.Any]:
+        return Utils.load_multidata(data)
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
-              use_embedded_server_options: bool):
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any],
+              game_data_packages: typing.Dict[str, typing.Any], use_embedded_server_options: bool):
 
         self.read_data = {}
         # there might be a better place to put this.
-        self.read_data["race_mode"] = lambda: decoded_obj.get("race_mode", 0)
+        race_mode = decoded_obj.get("race_mode", 0)
+        self.read_data["race_mode"] = lambda: race_mode
         mdata_ver = decoded_obj["minimum_versions"]["server"]
         if mdata_ver > version_tuple:
             raise RuntimeError(f"Supplied Multidata (.archipelago) requires a server of at least version {mdata_ver},"
@@ -478,7 +663,7 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        self.locations = self._load_locations(decoded_obj)
         self.slot_data = decoded_obj['slot_data']
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
@@ -491,6 +676,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.index_hints()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -521,6 +707,11 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.sphere_index = NetUtils.get_sphere_index(self.spheres)
+        self.sphere_sizes = [sum(len(locations) for locations in sphere.values()) for sphere in self.spheres]
+
+    def _load_locations(self, decoded_obj: typing.MutableMapping[str, typing.Any]) -> LocationStore:
+        return LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
 
     # saving
 
@@ -537,9 +728,21 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            encoded_save = pickle.dumps(self.get_save())
+            if self.save_journal and not exit_save and not self.save_journal.should_compact():
+                with open(self.save_filename + ".journal", "ab") as f:
+                    f.write(self.save_journal.get_record(self.get_save()))
+                return True
+            if self.save_journal:
+                self.save_journal.generation += 1
+            save = self.get_save()
+            encoded_save = zlib.compress(pickle.dumps(save))
             with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+                f.write(encoded_save)
+            if self.save_journal:
+                # records of the previous generation are ignored from here on, even if removing them fails
+                with open(self.save_filename + ".journal", "wb"):
+                    pass
+                self.save_journal.on_full_save(save, len(encoded_save))
         except Exception as e:
             self.logger.exception(e)
             return False
@@ -554,10 +757,18 @@ class Context:
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            if self.journal_save:
+                # starts out with a full save, so there are no records of a previous run in the new generation
+                self.save_journal = SaveJournal()
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                try:
+                    with open(self.save_filename + ".journal", "rb") as f:
+                        save_data = replay_save_journal(save_data, decode_save_journal(f.read()))
+                except FileNotFoundError:
+                    pass
+                self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -595,8 +806,7 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
-    def get_save(self) -> dict:
-        self.recheck_hints()
+    def get_save(self) -> typing.Dict[str, typing.Any]:
         d = {
             "version": self.save_version,
             "connect_names": self.connect_names,
@@ -613,6 +823,7 @@ class Context:
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
+            "journal_generation": self.save_journal.generation if self.save_journal else 0,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
@@ -641,6 +852,8 @@ class Context:
             {tuple(key): datetime.datetime.fromtimestamp(value, datetime.timezone.utc) for key, value
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
+        self.recheck_hints()
+        self.index_hints()
         self.random.setstate(savedata["random_state"])
 
         if "game_options" in savedata:
@@ -659,6 +872,10 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+
+        if self.save_journal:
+            # the next full save starts a newer generation than any records found next to this save
+            self.save_journal.generation = savedata.get("journal_generation", 0)
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -688,6 +905,7 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.reindex_hint(hint_team, hint, new_hint)
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -695,20 +913,58 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Set[team_slot]) -> None:
+        """Refreshes only the hints pointing at the specified locations of the slot, adding each (team, slot) pair that
+        has at least one hint modified to 'changed'."""
+        for location in locations:
+            hints = self.hints_by_location.get((team, slot, location))
+            if not hints:
+                continue
+            for hint in tuple(hints):
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    changed.add((team, player))
+                    self.replace_hint(team, player, hint, new_hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
-        self.recheck_hints(team, slot)
+        # hints get rechecked as their locations get checked
         return self.hints[team, slot]
 
+    def index_hints(self) -> None:
+        """Rebuilds hints_by_location from hints."""
+        self.hints_by_location = {}
+        for (team, _), hints in self.hints.items():
+            for hint in hints:
+                self.hints_by_location.setdefault((team, hint.finding_player, hint.location), set()).add(hint)
+
+    def reindex_hint(self, team: int, old_hint: typing.Optional[Hint], new_hint: Hint) -> None:
+        hints = self.hints_by_location.setdefault((team, new_hint.finding_player, new_hint.location), set())
+        hints.discard(old_hint)
+        hints.add(new_hint)
+
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.sphere_index.get(player, {}).get(location_id)
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
 
+    def get_checked_spheres(self, team: int, slot: int) -> typing.Dict[int, int]:
+        """Get the sphere of every checked location of the slot, empty if spheres are not available."""
+        return NetUtils.get_checked_spheres(self.sphere_index, slot, self.location_checks[team, slot])
+
+    def get_sphere_completion(self, team: int) -> typing.List[typing.Tuple[int, int]]:
+        """Get the amount of checked locations and of all locations in each sphere for the team."""
+        return NetUtils.get_sphere_completion(self.sphere_index, self.sphere_sizes,
+                                              {slot: locations for (checked_team, slot), locations
+                                               in self.location_checks.items() if checked_team == team})
+
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
 
@@ -751,12 +1007,15 @@ class Context:
             return
         new_hint_events: typing.Set[int] = set()
         concerns = collections.defaultdict(list)
+        concerned_hints: typing.DefaultDict[int, typing.Set[Hint]] = collections.defaultdict(set)
         for hint in sorted(hints, key=operator.attrgetter('found'), reverse=True):
             data = (hint, hint.as_network_message())
             for player in self.slot_set(hint.receiving_player):
                 concerns[player].append(data)
-            if not hint.local and data not in concerns[hint.finding_player]:
+                concerned_hints[player].add(hint)
+            if not hint.local and hint not in concerned_hints[hint.finding_player]:
                 concerns[hint.finding_player].append(data)
+                concerned_hints[hint.finding_player].add(hint)
 
             # only remember hints that were not already found at the time of creation
             if not hint.found:
@@ -764,6 +1023,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.reindex_hint(team, None, hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -774,23 +1034,24 @@ class Context:
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
-                clients = filter(lambda c: not c.no_text, self.clients[team].get(slot, []))
+                clients = [client for client in self.clients[team].get(slot, []) if not client.no_text]
                 if not clients:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
+                data = self.encode_msgs(client_hints)
                 for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                    async_start(self.send_encoded_msgs(client, data))
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
+        for hint in self.hints_by_location.get((team, finding_player, seeked_location), ()):
+            return hint
         return None
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.reindex_hint(team, old_hint, new_hint)
     
     # "events"
 
@@ -812,10 +1073,19 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
-        key: str = f"_read_hints_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
-        if targets:
-            self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
+        """Sends the hints of the slot to clients watching them at the end of the current event loop iteration,
+        so hints changing many times in one iteration, such as during a release, get encoded once."""
+        if not self.changed_hint_slots:
+            asyncio.get_running_loop().call_soon(self._send_changed_hints)
+        self.changed_hint_slots.add((team, slot))
+
+    def _send_changed_hints(self):
+        changed_hint_slots, self.changed_hint_slots = self.changed_hint_slots, set()
+        for team, slot in changed_hint_slots:
+            key: str = f"_read_hints_{team}_{slot}"
+            targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+            if targets:
+                self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
@@ -825,8 +1095,8 @@ class Context:
 
 
 def update_aliases(ctx: Context, team: int):
-    cmd = ctx.dumper([{"cmd": "RoomUpdate",
-                       "players": ctx.get_players_package()}])
+    cmd = ctx.encode_msgs([{"cmd": "RoomUpdate",
+                            "players": ctx.get_players_package()}])
 
     for clients in ctx.clients[team].values():
         for client in clients:
@@ -1013,20 +1283,29 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends clients of slots that received items since the last call their new items at the end of the current event
+    loop iteration, so that checks registered in the same iteration get merged into one packet per client."""
+    if ctx.new_item_slots and not ctx.new_items_scheduled:
+        ctx.new_items_scheduled = True
+        asyncio.get_running_loop().call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context):
+    ctx.new_items_scheduled = False
+    new_item_slots, ctx.new_item_slots = ctx.new_item_slots, set()
+    for team, slot in new_item_slots:
+        for client in ctx.clients[team].get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                async_start(ctx.send_msgs(client, [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1074,6 +1353,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.new_item_slots.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1111,6 +1391,8 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.add_location_checks(team, slot, new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1118,7 +1400,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1577,12 +1859,13 @@ class ClientMessageProcessor(CommonCommandProcessor):
             names = self.ctx.item_names_for_game(self.ctx.games[self.client.slot])
             item_name, usable, response = get_intended_text(
                 item_name,
-                names
+                self.ctx.get_name_index(self.ctx.games[self.client.slot], "items")
             )
             if usable:
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_item_slots.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1601,9 +1884,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
         auto_status = HintStatus.HINT_UNSPECIFIED if for_location else HintStatus.HINT_PRIORITY
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.get_rechecked_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1634,9 +1915,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             if game not in self.ctx.all_item_and_group_names:
                 self.output("Can't look up item/location for unknown game. Hint for ID instead.")
                 return False
-            names = self.ctx.all_location_and_group_names[game] \
-                if for_location else \
-                self.ctx.all_item_and_group_names[game]
+            names = self.ctx.get_name_index(game, "locations_and_groups" if for_location else "items_and_groups")
             hint_name, usable, response = get_intended_text(input_text, names)
 
             if usable:
@@ -2000,7 +2279,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             tags = set(args.get("tags", []))
             slots = set(args.get("slots", []))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
+            msg = ctx.encode_msgs([args])
 
             for bounceclient in ctx.endpoints:
                 if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
@@ -2036,6 +2315,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            if ctx.save_journal:
+                ctx.save_journal.set_stored_data(args["key"], value)
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", True):
                 targets.add(client)
@@ -2213,7 +2494,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
             team, slot = self.ctx.player_name_lookup[seeked_player]
             item_name = " ".join(item_name)
             names = self.ctx.item_names_for_game(self.ctx.games[slot])
-            item_name, usable, response = get_intended_text(item_name, names)
+            item_name, usable, response = get_intended_text(
+                item_name, self.ctx.get_name_index(self.ctx.games[slot], "items"))
             if usable:
                 amount: int = int(amount)
                 if amount > 100:
@@ -2248,7 +2530,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 location, usable, response = int(full_name), True, None
             elif self.ctx.location_names_for_game(game) is not None:
-                location, usable, response = get_intended_text(full_name, self.ctx.location_names_for_game(game))
+                location, usable, response = get_intended_text(full_name,
+                                                               self.ctx.get_name_index(game, "locations"))
             else:
                 self.output("Can't look up location for unknown game. Send by ID instead.")
                 return False
@@ -2279,7 +2562,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 item, usable, response = int(full_name), True, None
             elif game in self.ctx.all_item_and_group_names:
-                item, usable, response = get_intended_text(full_name, self.ctx.all_item_and_group_names[game])
+                item, usable, response = get_intended_text(full_name,
+                                                           self.ctx.get_name_index(game, "items_and_groups"))
             else:
                 self.output("Can't look up item for unknown game. Hint for ID instead.")
                 return False
@@ -2318,7 +2602,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 location, usable, response = int(full_name), True, None
             elif game in self.ctx.all_location_and_group_names:
-                location, usable, response = get_intended_text(full_name, self.ctx.all_location_and_group_names[game])
+                location, usable, response = get_intended_text(
+                    full_name, self.ctx.get_name_index(game, "locations_and_groups"))
             else:
                 self.output("Can't look up location for unknown game. Hint for ID instead.")
                 return False
@@ -2390,6 +2675,15 @@ class ServerCommandProcessor(CommonCommandProcessor):
                         f"approximately totaling {Utils.format_SI_prefix(total, power=1024)}B")
         self.output("\n".join(texts))
 
+    def _cmd_encoding(self) -> bool:
+        """Debug Tool: list the time spent encoding packets to clients, by command."""
+        total = sum(self.ctx.encode_times.values())
+        texts = [f"Encoded {sum(self.ctx.encode_counts.values())} packets in {total:.3f} seconds"]
+        for cmd, seconds in self.ctx.encode_times.most_common():
+            texts.append(f"{cmd}: {self.ctx.encode_counts[cmd]} packets in {seconds:.3f} seconds")
+        self.output("\n".join(texts))
+        return True
+
 
 async def console(ctx: Context):
     import sys
@@ -2421,6 +2715,9 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--journal_save', default=defaults["journal_save"], action='store_true',
+                        help="Append changes to a journal next to the save file, "
+                             "only rewriting the full save once the journal gets large.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2514,7 +2811,7 @@ async def main(args: argparse.Namespace):
     ctx = Context(args.host, args.port, args.server_password, args.password, args.location_check_points,
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.remaining_mode,
-                  args.auto_shutdown, args.compatibility, args.log_network)
+                  args.auto_shutdown, args.compatibility, args.log_network, journal_save=args.journal_save)
     data_filename = args.multidata
 
     if not data_filename:
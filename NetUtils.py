@@ -2,9 +2,16 @@ from __future__ import annotations
 
 import typing
 import enum
+import math
+import struct
 import warnings
 from json import JSONEncoder, JSONDecoder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
@@ -113,7 +120,37 @@ _encode = JSONEncoder(
 ).encode
 
 
+def _orjson_default(obj: typing.Any) -> typing.Any:
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _has_non_finite_float(obj: typing.Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite_float(key) or _has_non_finite_float(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return any(_has_non_finite_float(value) for value in obj)
+    return False
+
+
 def encode(obj: typing.Any) -> str:
+    if orjson:
+        try:
+            # orjson calls the default hook only for types it does not support itself, such as NamedTuples and sets
+            encoded = orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # such as integers beyond 64 bit, which the json module can still encode
+        else:
+            # orjson writes NaN and Infinity as null, the json module keeps them, so only look for them if there is one
+            if b"null" not in encoded or not _has_non_finite_float(obj):
+                return encoded.decode()
     return _encode(_scan_for_TypedTuples(obj))
 
 
@@ -390,6 +427,45 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+def get_sphere_index(spheres: typing.Iterable[typing.Mapping[int, typing.Iterable[int]]]) \
+        -> typing.Dict[int, typing.Dict[int, int]]:
+    """Turns the spheres of multidata, each being { player: { location_id, ... } },
+    into { player: { location_id: sphere, ... } }."""
+    index: typing.Dict[int, typing.Dict[int, int]] = {}
+    for sphere_number, sphere in enumerate(spheres):
+        for player, locations in sphere.items():
+            index.setdefault(player, {}).update(dict.fromkeys(locations, sphere_number))
+    return index
+
+
+def get_checked_spheres(sphere_index: typing.Mapping[int, typing.Mapping[int, int]], player: int,
+                        checked_locations: typing.Iterable[int]) -> typing.Dict[int, int]:
+    """Returns { location_id: sphere, ... } of the checked locations of player that are in sphere_index,
+    as built by get_sphere_index."""
+    spheres = sphere_index.get(player, {})
+    return {location: spheres[location] for location in checked_locations if location in spheres}
+
+
+def get_sphere_completion(sphere_index: typing.Mapping[int, typing.Mapping[int, int]],
+                          sphere_sizes: typing.Sequence[int],
+                          checked_locations: typing.Mapping[int, typing.Iterable[int]]) \
+        -> typing.List[typing.Tuple[int, int]]:
+    """Returns (checked, total) for each sphere, from the checked locations of each player of a team."""
+    checked = [0] * len(sphere_sizes)
+    for player, locations in checked_locations.items():
+        for sphere in get_checked_spheres(sphere_index, player, locations).values():
+            checked[sphere] += 1
+    return list(zip(checked, sphere_sizes))
+
+
+# flat LocationStore buffer, matching the native structs of _speedups: header, (start, count) per player id
+# starting at 0, then (location, sender, receiver, item, flags) sorted by sender and location
+_location_store_magic = b"APLocSt1"
+_location_store_header = struct.Struct("@8s4Q")
+_location_store_index_entry = struct.Struct("@NN")
+_location_store_entry = struct.Struct("@qIIqI0q")
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
@@ -403,6 +479,40 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    def to_buffer(self) -> bytes:
+        """Returns the locations as one position-independent buffer, see from_buffer."""
+        index: typing.List[bytes] = [_location_store_index_entry.pack(0, 0)]
+        entries: typing.List[bytes] = []
+        for sender in range(1, len(self) + 1):
+            locations = self.get(sender, {})
+            index.append(_location_store_index_entry.pack(len(entries), len(locations)))
+            entries.extend(_location_store_entry.pack(location, sender, receiver, item, flags)
+                           for location, (item, receiver, flags) in sorted(locations.items()))
+        header = _location_store_header.pack(_location_store_magic, _location_store_entry.size,
+                                             _location_store_index_entry.size, len(entries), len(index))
+        return b"".join((header, *index, *entries))
+
+    @classmethod
+    def from_buffer(cls, buffer: typing.Any) -> _LocationStore:
+        """Creates a store from a buffer of to_buffer. Unlike _speedups.LocationStore, this copies the data."""
+        view = memoryview(buffer).cast("B")
+        if len(view) < _location_store_header.size:
+            raise ValueError("Buffer too small for a LocationStore")
+        magic, entry_size, index_entry_size, entry_count, sender_index_size = \
+            _location_store_header.unpack_from(view)
+        if magic != _location_store_magic or entry_size != _location_store_entry.size \
+                or index_entry_size != _location_store_index_entry.size:
+            raise ValueError("Buffer is not a LocationStore of this version")
+        entries_offset = _location_store_header.size + index_entry_size * sender_index_size
+        if sender_index_size < 2 or len(view) != entries_offset + entry_size * entry_count:
+            raise ValueError("Invalid LocationStore buffer size")
+        locations: typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]] = {
+            sender: {} for sender in range(1, sender_index_size)
+        }
+        for location, sender, receiver, item, flags in _location_store_entry.iter_unpack(view[entries_offset:]):
+            locations[sender][location] = item, receiver, flags
+        return cls(locations)
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
         for finding_player, check_data in self.items():
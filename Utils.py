@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import json
 import typing
 import builtins
@@ -12,9 +13,14 @@ import pickle
 import functools
 import io
 import collections
+import collections.abc
+import enum
 import importlib
 import logging
+import mmap
+import struct
 import warnings
+import zlib
 
 from argparse import Namespace
 from settings import Settings, get_settings
@@ -28,6 +34,7 @@ except ImportError:
     from yaml import Loader as UnsafeLoader, SafeLoader, Dumper
 
 if typing.TYPE_CHECKING:
+    import mmap
     import tkinter
     import pathlib
     from BaseClasses import Region
@@ -339,11 +346,204 @@ def get_file_safe_name(name: str) -> str:
     return "".join(c for c in name if c not in '<>:"/\\|?*')
 
 
-def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Dict[str, Any]:
+class DataPackageIds(typing.Mapping[int, str]):
+    """id -> name table of a data package file, names get decoded when looked up."""
+    __slots__ = ("_names",)
+
+    def __init__(self, names: DataPackageNames) -> None:
+        self._names = names
+
+    def _find(self, code: int) -> int:
+        names = self._names
+        position = bisect.bisect_left(names._id_order, code, key=names._ids.__getitem__)
+        if position < len(names._id_order) and names._ids[names._id_order[position]] == code:
+            return names._id_order[position]
+        return -1
+
+    def __getitem__(self, code: int) -> str:
+        index = self._find(code) if isinstance(code, int) else -1
+        if index < 0:
+            raise KeyError(code)
+        return self._names._name(index)
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, int) and self._find(code) >= 0
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._names._ids)
+
+    def __len__(self) -> int:
+        return len(self._names._ids)
+
+
+class DataPackageNames(typing.Mapping[str, int]):
+    """name -> id table of a data package file, read from memory mapped arrays without building a dict."""
+    __slots__ = ("_ids", "_id_order", "_name_order", "_offsets", "_blob", "id_to_name")
+
+    id_to_name: DataPackageIds
+    """the reverse table"""
+
+    def __init__(self, ids: typing.Sequence[int], id_order: typing.Sequence[int], name_order: typing.Sequence[int],
+                 offsets: typing.Sequence[int], blob: memoryview) -> None:
+        self._ids = ids
+        self._id_order = id_order
+        self._name_order = name_order
+        self._offsets = offsets
+        self._blob = blob
+        self.id_to_name = DataPackageIds(self)
+
+    def _name(self, index: int) -> str:
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def _encoded_name(self, index: int) -> bytes:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+    def _find(self, name: str) -> int:
+        encoded = name.encode()
+        position = bisect.bisect_left(self._name_order, encoded, key=self._encoded_name)
+        if position < len(self._name_order) and self._encoded_name(self._name_order[position]) == encoded:
+            return self._name_order[position]
+        return -1
+
+    def __getitem__(self, name: str) -> int:
+        index = self._find(name) if isinstance(name, str) else -1
+        if index < 0:
+            raise KeyError(name)
+        return self._ids[index]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name) >= 0
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return map(self._name, range(len(self._ids)))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class DataPackageFile(typing.Mapping[str, Any]):
+    """
+    A game's data package from its binary file. item_name_to_id and location_name_to_id are DataPackageNames,
+    the rest is decoded from JSON when first accessed.
+
+    Layout, little endian: b"APDP", format version, item count, location count, each a uint32.
+    Then for items and locations: ids as int64, indices sorted by id and indices sorted by utf-8 name as uint32,
+    name offsets as uint32 and the utf-8 names, each part padded to 8 bytes. Last is everything else as JSON.
+    """
+    magic: typing.ClassVar[bytes] = b"APDP"
+    format_version: typing.ClassVar[int] = 1
+    table_keys: typing.ClassVar[typing.Tuple[str, str]] = ("item_name_to_id", "location_name_to_id")
+
+    _buffer: memoryview
+    _tables: Dict[str, DataPackageNames]
+    _rest_offset: int
+    _rest: Optional[Dict[str, Any]]
+
+    def __init__(self, buffer: typing.Union[bytes, memoryview, "mmap.mmap"]) -> None:
+        self._buffer = memoryview(buffer)
+        if self._buffer[:4] != self.magic:
+            raise ValueError("Not a data package file")
+        version, *counts = struct.unpack_from("<III", self._buffer, 4)
+        if version != self.format_version:
+            raise ValueError(f"Unsupported data package file version {version}")
+        self._tables = {}
+        offset = 16
+        for key, count in zip(self.table_keys, counts):
+            ids = self._array("q", offset, count)
+            offset += count * 8
+            id_order = self._array("I", offset, count)
+            offset += _pad8(count * 4)
+            name_order = self._array("I", offset, count)
+            offset += _pad8(count * 4)
+            offsets = self._array("I", offset, count + 1)
+            offset += _pad8((count + 1) * 4)
+            blob = self._buffer[offset:offset + offsets[count]]
+            offset += _pad8(offsets[count])
+            self._tables[key] = DataPackageNames(ids, id_order, name_order, offsets, blob)
+        self._rest_offset = offset
+        self._rest = None
+
+    def _array(self, typecode: str, offset: int, count: int) -> typing.Sequence[int]:
+        view = self._buffer[offset:offset + count * struct.calcsize(typecode)]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        import array
+        swapped = array.array(typecode, view.tobytes())
+        swapped.byteswap()
+        return swapped
+
+    @property
+    def rest(self) -> Dict[str, Any]:
+        if self._rest is None:
+            self._rest = json.loads(str(self._buffer[self._rest_offset:], "utf-8"))
+        return self._rest
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._tables:
+            return self._tables[key]
+        return self.rest[key]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return itertools.chain(self._tables, self.rest)
+
+    def __len__(self) -> int:
+        return len(self._tables) + len(self.rest)
+
+    @classmethod
+    def dump(cls, data: typing.Mapping[str, Any]) -> bytes:
+        import array
+        parts: typing.List[bytes] = [cls.magic, struct.pack("<III", cls.format_version,
+                                                            *(len(data[key]) for key in cls.table_keys))]
+
+        def add(part: bytes) -> None:
+            parts.append(part)
+            parts.append(bytes(-len(part) % 8))
+
+        for key in cls.table_keys:
+            table: typing.Mapping[str, int] = data[key]
+            encoded_names = [name.encode() for name in table]
+            ids = array.array("q", table.values())
+            id_order = array.array("I", sorted(range(len(ids)), key=ids.__getitem__))
+            name_order = array.array("I", sorted(range(len(ids)), key=encoded_names.__getitem__))
+            offsets = array.array("I", [0])
+            offsets.extend(itertools.accumulate(map(len, encoded_names)))
+            for numbers in (ids, id_order, name_order, offsets):
+                if sys.byteorder != "little":
+                    numbers.byteswap()
+                add(numbers.tobytes())
+            add(b"".join(encoded_names))
+        parts.append(json.dumps({key: value for key, value in data.items() if key not in cls.table_keys},
+                                ensure_ascii=False, separators=(",", ":")).encode())
+        return b"".join(parts)
+
+    @classmethod
+    def load(cls, path: str) -> DataPackageFile:
+        """Maps the file into memory, so only the parts that get looked up are read."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _pad8(size: int) -> int:
+    return size + -size % 8
+
+
+def _data_package_path(game: str, checksum: str, extension: str) -> str:
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    return cache_path("datapackage", get_file_safe_name(game), f"{checksum}.{extension}")
+
+
+def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> typing.Mapping[str, Any]:
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        path = cache_path("datapackage", get_file_safe_name(game), f"{checksum}.json")
+        path = _data_package_path(game, checksum, "apdp")
+        if os.path.exists(path):
+            try:
+                return DataPackageFile.load(path)
+            except Exception as e:
+                logging.debug(f"Could not load data package: {e}")
+
+        # fall back to the JSON cache of older versions
+        path = _data_package_path(game, checksum, "json")
         if os.path.exists(path):
             try:
                 with open(path, "r", encoding="utf-8-sig") as f:
@@ -360,16 +560,19 @@ def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) ->
     return {}
 
 
-def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
+def store_data_package_for_checksum(game: str, data: typing.Mapping[str, Any]) -> None:
+    """Writes the data package to a binary file named after its checksum, once, as the content can't change."""
     checksum = data.get("checksum")
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        game_folder = cache_path("datapackage", get_file_safe_name(game))
-        os.makedirs(game_folder, exist_ok=True)
+        path = _data_package_path(game, checksum, "apdp")
+        if os.path.exists(path):
+            return
         try:
-            with open(os.path.join(game_folder, f"{checksum}.json"), "w", encoding="utf-8-sig") as f:
-                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(DataPackageFile.dump(data))
+            os.replace(temp_path, path)
         except Exception as e:
             logging.debug(f"Could not store data package: {e}")
 
@@ -482,6 +685,33 @@ class KeyedDefaultDict(collections.defaultdict):
         return value
 
 
+class ReverseLookup(typing.Mapping[typing.Any, typing.Any]):
+    """value -> key view of a mapping, which only gets built when first looked up in"""
+    __slots__ = ("_mapping", "_reversed")
+
+    def __init__(self, mapping: typing.Mapping[typing.Any, typing.Any]) -> None:
+        self._mapping = mapping
+        self._reversed: typing.Optional[Dict[typing.Any, typing.Any]] = None
+
+    @property
+    def reversed(self) -> Dict[typing.Any, typing.Any]:
+        if self._reversed is None:
+            self._reversed = {value: key for key, value in self._mapping.items()}
+        return self._reversed
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        return self.reversed[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.reversed
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return iter(self.reversed)
+
+    def __len__(self) -> int:
+        return len(self.reversed)
+
+
 def get_text_between(text: str, start: str, end: str) -> str:
     return text[text.index(start) + len(start): text.rindex(end)]
 
@@ -602,6 +832,159 @@ class VersionException(Exception):
     pass
 
 
+multidata_format_version = 4
+"""Version of the .archipelago container written by dump_multidata. 3 and older are a single compressed pickle,
+4 has sections compressed with the codec in its header."""
+
+
+class MultiDataCodec(enum.IntEnum):
+    """Compression of multidata sections, stored in the header of multidata format 4."""
+    ZLIB = 0
+    LZMA = 1
+    ZSTD = 2
+    """needs the optional zstandard module to write and to load"""
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        if self == MultiDataCodec.ZLIB:
+            return zlib.compress(data, 6 if level is None else level)
+        if self == MultiDataCodec.LZMA:
+            import lzma
+            return lzma.compress(data, preset=6 if level is None else level)
+        import zstandard
+        return zstandard.ZstdCompressor(3 if level is None else level).compress(data)
+
+    def decompress(self, data: Union[bytes, memoryview]) -> bytes:
+        if self == MultiDataCodec.ZLIB:
+            return zlib.decompress(data)
+        if self == MultiDataCodec.LZMA:
+            import lzma
+            return lzma.decompress(data)
+        try:
+            import zstandard
+        except ImportError as e:
+            raise VersionException("This multidata is compressed with zstd, which needs the zstandard module.") from e
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+def parse_multidata_compression(compression: str) -> typing.Tuple[MultiDataCodec, Optional[int]]:
+    """Parses "codec" or "codec:level", as in host.yaml's generator.multidata_compression.
+    Falls back to zlib with its default level if zstd is asked for without the zstandard module."""
+    name, _, level = compression.partition(":")
+    try:
+        codec = MultiDataCodec[name.strip().upper()]
+        parsed_level = int(level) if level.strip() else None
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid multidata compression \"{compression}\", expected codec or codec:level with "
+                         f"codec being one of {', '.join(codec.name.lower() for codec in MultiDataCodec)}.") from None
+    if codec == MultiDataCodec.ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            logging.warning("Multidata compression zstd needs the zstandard module, using zlib instead.")
+            return MultiDataCodec.ZLIB, None
+    return codec, parsed_level
+
+
+class MultiData(collections.abc.MutableMapping):
+    """
+    Multidata stored as sections, one per top-level key, each pickled and compressed on its own.
+    A section is only decompressed when its key is first accessed, so readers only pay for what they use.
+
+    Layout: format version byte, codec byte, 4 byte little endian index size, pickled index of
+    key -> (offset, size) relative to the end of the index, then the sections.
+    """
+    codec: MultiDataCodec
+    _sections: Dict[str, Optional[memoryview]]
+    """compressed sections by key, None for values set after loading"""
+    _decoded: Dict[str, Any]
+
+    def __init__(self, data: Union[bytes, memoryview, "mmap.mmap"]):
+        view = memoryview(data)
+        self.codec = MultiDataCodec(view[1])
+        index_size = int.from_bytes(view[2:6], "little")
+        start = 6 + index_size
+        index: Dict[str, typing.Tuple[int, int]] = restricted_loads(view[6:start])
+        self._sections = {key: view[start + offset:start + offset + size] for key, (offset, size) in index.items()}
+        self._decoded = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._decoded[key]
+        except KeyError:
+            value = self._decoded[key] = restricted_loads(self.codec.decompress(self._sections[key]))
+            return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._sections[key] = None
+        self._decoded[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._sections[key]
+        self._decoded.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sections
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def dump(self, codec: Optional[MultiDataCodec] = None, level: Optional[int] = None) -> bytes:
+        """Encodes this multidata again. Sections that were never accessed are copied without decompressing them,
+        unless they have to be recompressed with a different codec."""
+        if codec is None:
+            codec = self.codec
+        sections: Dict[str, bytes] = {}
+        for key, section in self._sections.items():
+            if key in self._decoded:
+                sections[key] = codec.compress(_pickle_section(self._decoded[key]), level)
+            elif codec == self.codec:
+                sections[key] = bytes(section)
+            else:
+                sections[key] = codec.compress(self.codec.decompress(section), level)
+        return _dump_multidata_sections(sections, codec)
+
+
+def _pickle_section(value: Any) -> bytes:
+    # multidata holds no large buffers, so protocol 5 is used without out-of-band buffers
+    return pickle.dumps(value, 5)
+
+
+def _dump_multidata_sections(sections: Dict[str, bytes], codec: MultiDataCodec) -> bytes:
+    index: Dict[str, typing.Tuple[int, int]] = {}
+    offset = 0
+    for key, section in sections.items():
+        index[key] = offset, len(section)
+        offset += len(section)
+    encoded_index = pickle.dumps(index)
+    return b"".join((bytes([multidata_format_version, codec]), len(encoded_index).to_bytes(4, "little"),
+                     encoded_index, *sections.values()))
+
+
+def dump_multidata(multidata: typing.Mapping[str, Any], codec: Optional[MultiDataCodec] = None,
+                   level: Optional[int] = None) -> bytes:
+    """Encodes multidata into the current .archipelago format. Without a codec, loaded multidata keeps its codec
+    and other multidata uses zlib. level is the codec's compression level, its default if None."""
+    if isinstance(multidata, MultiData):
+        return multidata.dump(codec, level)
+    if codec is None:
+        codec = MultiDataCodec.ZLIB
+    return _dump_multidata_sections({key: codec.compress(_pickle_section(value), level)
+                                     for key, value in multidata.items()}, codec)
+
+
+def load_multidata(data: Union[bytes, memoryview, "mmap.mmap"]) -> typing.MutableMapping[str, Any]:
+    """Decodes the contents of an .archipelago file. Sectioned data is decompressed lazily, see MultiData."""
+    format_version = data[0]
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    if format_version < 4:
+        return restricted_loads(zlib.decompress(data[1:]))
+    return MultiData(data)
+
+
 def chaining_prefix(index: int, labels: typing.Sequence[str]) -> str:
     text = ""
     max_label = len(labels) - 1
@@ -646,8 +1029,95 @@ def get_fuzzy_results(input_word: str, word_list: typing.Collection[str], limit:
     )
 
 
-def get_intended_text(input_text: str, possible_answers) -> typing.Tuple[str, bool, str]:
-    picks = get_fuzzy_results(input_text, possible_answers, limit=2)
+class FuzzyNameIndex:
+    """
+    Finds the same results as get_fuzzy_results over a fixed collection of names, but only computes the edit distance
+    for names that can still rank among the results. As every edit changes the count of at most one character on
+    each side, the characters a name shares with the input bound how close it can get.
+    Not modified after creation, so one index can be shared by everything searching the same names.
+    """
+    __slots__ = ("names", "_lowered", "_first_lowered", "_by_length", "_characters", "__weakref__")
+
+    names: typing.Tuple[str, ...]
+    """in the order of the collection the index was created from, which decides between equally close names"""
+    _lowered: typing.Tuple[str, ...]
+    _first_lowered: Dict[str, int]
+    _by_length: Dict[typing.Tuple[int, int], typing.List[int]]
+    """indices of names by length of the lowered and of the original name"""
+    _characters: Dict[typing.Tuple[str, int], typing.List[int]]
+    """indices of the lowered names containing a character at least that many times"""
+
+    def __init__(self, names: typing.Iterable[str]) -> None:
+        self.names = tuple(names)
+        self._lowered = tuple(name.lower() for name in self.names)
+        self._first_lowered = {}
+        self._by_length = {}
+        self._characters = {}
+        for index, (name, lowered) in enumerate(zip(self.names, self._lowered)):
+            self._first_lowered.setdefault(lowered, index)
+            self._by_length.setdefault((len(lowered), len(name)), []).append(index)
+            for character, count in collections.Counter(lowered).items():
+                for occurrence in range(1, count + 1):
+                    self._characters.setdefault((character, occurrence), []).append(index)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_exact(self, input_word: str) -> Optional[str]:
+        """Returns the first name that equals input_word ignoring case."""
+        index = self._first_lowered.get(input_word.lower())
+        return None if index is None else self.names[index]
+
+    def get_fuzzy_results(self, input_word: str, limit: typing.Optional[int] = None) \
+            -> typing.List[typing.Tuple[str, int]]:
+        if not limit or limit >= len(self.names):
+            return get_fuzzy_results(input_word, self.names, limit)
+        from jellyfish import damerau_levenshtein_distance
+
+        lowered = input_word.lower()
+        shared: typing.Counter[int] = collections.Counter()
+        for character, count in collections.Counter(lowered).items():
+            for occurrence in range(1, count + 1):
+                shared.update(self._characters.get((character, occurrence), ()))
+
+        def best_ratio(lowered_length: int, length: int, shared_characters: int) -> float:
+            least_edits = max(len(lowered), lowered_length) - shared_characters
+            return 1 - least_edits / max(len(input_word), length, 1)
+
+        # names sharing characters get their own bound, the others are bound by their length only
+        candidates: typing.List[typing.Tuple[float, typing.Sequence[int], bool]] = [
+            (best_ratio(len(self._lowered[index]), len(self.names[index]), shared_characters), (index,), False)
+            for index, shared_characters in shared.items()]
+        candidates.extend((best_ratio(lowered_length, length, 0), indices, True)
+                          for (lowered_length, length), indices in self._by_length.items())
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        picks: typing.List[typing.Tuple[float, int]] = []
+        for ratio_bound, indices, by_length in candidates:
+            if len(picks) == limit and ratio_bound < picks[-1][0]:
+                break
+            for index in indices:
+                if by_length and index in shared:
+                    continue
+                ratio = 1 - (damerau_levenshtein_distance(lowered, self._lowered[index])
+                             / max(len(input_word), len(self.names[index])))
+                if len(picks) < limit or ratio > picks[-1][0] or (ratio == picks[-1][0] and index < picks[-1][1]):
+                    picks.append((ratio, index))
+                    picks.sort(key=lambda pick: (-pick[0], pick[1]))
+                    del picks[limit:]
+        return [(self.names[index], int(ratio * 100)) for ratio, index in picks]
+
+
+def get_intended_text(input_text: str, possible_answers: typing.Union[typing.Collection[str], FuzzyNameIndex]) \
+        -> typing.Tuple[str, bool, str]:
+    if isinstance(possible_answers, FuzzyNameIndex):
+        if len(possible_answers) > 1:
+            exact = possible_answers.get_exact(input_text)
+            if exact is not None:
+                return exact, True, "Perfect Match"
+        picks = possible_answers.get_fuzzy_results(input_text, limit=2)
+    else:
+        picks = get_fuzzy_results(input_text, possible_answers, limit=2)
     if len(picks) > 1:
         dif = picks[0][1] - picks[1][1]
         if picks[0][1] == 100:
@@ -82,6 +82,7 @@ def register():
     # has automatic patch integration
     import worlds.AutoWorld
     import worlds.Files
+    worlds.load_all_worlds()  # the website lists every game
     app.jinja_env.filters['supports_apdeltapatch'] = lambda game_name: \
         game_name in worlds.Files.AutoPatchRegister.patch_types
 
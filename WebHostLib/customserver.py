@@ -5,7 +5,9 @@ import collections
 import datetime
 import functools
 import logging
+import mmap
 import multiprocessing
+import os
 import pickle
 import random
 import socket
@@ -13,6 +15,7 @@ import threading
 import time
 import typing
 import sys
+import uuid
 
 import websockets
 from pony.orm import commit, db_session, select
@@ -20,9 +23,11 @@ from pony.orm import commit, db_session, select
 import Utils
 
 from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
+from MultiServer import SaveJournal, decode_save_journal, replay_save_journal
+from NetUtils import LocationStore
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveJournalRecord, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -59,6 +64,7 @@ class DBCommandProcessor(ServerCommandProcessor):
 
 class WebHostContext(Context):
     room_id: int
+    seed_id: uuid.UUID
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -66,7 +72,7 @@ class WebHostContext(Context):
         self.static_server_data = static_server_data
         super(WebHostContext, self).__init__("", 0, "", "", 1,
                                              40, True, "enabled", "enabled",
-                                             "enabled", 0, 2, logger=logger)
+                                             "enabled", 0, 2, logger=logger, journal_save=True)
         del self.static_server_data
         self.main_loop = asyncio.get_running_loop()
         self.video = {}
@@ -86,6 +92,35 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
+    def _load_locations(self, decoded_obj: typing.MutableMapping[str, typing.Any]) -> LocationStore:
+        # the store of a seed is written to a cache file once and mapped by every room hosting it afterwards,
+        # sharing one copy in the page cache and skipping decompression and construction on room starts
+        path = Utils.cache_path("locations", f"{self.seed_id}.bin")
+        try:
+            with open(path, "rb") as f:
+                locations = LocationStore.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            os.utime(path)  # keeps it from being cleaned up while the seed is in use
+        except FileNotFoundError:
+            pass
+        except ValueError as e:  # written by an incompatible version
+            self.logger.debug(f"Rebuilding location cache {path}: {e}")
+        except OSError as e:
+            self.logger.warning(f"Could not read location cache {path}: {e}")
+        else:
+            # free the decoded section like the base implementation does, del doesn't decompress a lazy one
+            del decoded_obj["locations"]
+            return locations
+        locations = super()._load_locations(decoded_obj)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(locations.to_buffer())
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write location cache {path}: {e}")
+        return locations
+
     def listen_to_db_commands(self):
         cmdprocessor = DBCommandProcessor(self)
 
@@ -103,6 +138,7 @@ class WebHostContext(Context):
     def load(self, room_id: int):
         self.room_id = room_id
         room = Room.get(id=room_id)
+        self.seed_id = room.seed.id
         if room.last_port:
             self.port = room.last_port
         else:
@@ -150,16 +186,27 @@ class WebHostContext(Context):
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
-            savegame_data = Room.get(id=self.room_id).multisave
+            if self.journal_save:
+                self.save_journal = SaveJournal()
+            savegame_data = load_room_save(Room.get(id=self.room_id))
             if savegame_data:
-                self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
+                self.set_save(savegame_data)
             self._start_async_saving(atexit_save=False)
         threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
         room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
+        if self.save_journal and not exit_save and not self.save_journal.should_compact():
+            SaveJournalRecord(room=room, data=self.save_journal.get_record(self.get_save()))
+        else:
+            if self.save_journal:
+                self.save_journal.generation += 1
+            save = self.get_save()
+            room.multisave = pickle.dumps(save)
+            select(record for record in SaveJournalRecord if record.room == room).delete(bulk=True)
+            if self.save_journal:
+                self.save_journal.on_full_save(save, len(room.multisave))
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
@@ -171,6 +218,15 @@ class WebHostContext(Context):
         return d
 
 
+def load_room_save(room: Room) -> typing.Optional[dict]:
+    """Returns the save of a room with its journal replayed, None if there is no save yet."""
+    if not room.multisave:
+        return None
+    journal = select(record for record in SaveJournalRecord if record.room == room).order_by(SaveJournalRecord.id)
+    records = (record for journal_record in journal for record in decode_save_journal(journal_record.data))
+    return replay_save_journal(restricted_loads(room.multisave), records)
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
@@ -224,6 +280,24 @@ def set_up_logging(room_id) -> logging.Logger:
     return logger
 
 
+def cleanup_location_cache(max_age: datetime.timedelta = datetime.timedelta(days=7)) -> None:
+    """Deletes the location caches of seeds no room was started for within max_age, and leftover temporary files."""
+    try:
+        files = list(os.scandir(Utils.cache_path("locations")))
+    except FileNotFoundError:
+        return
+    for file in files:
+        if file.name.endswith((".bin", ".tmp")):
+            last_change = datetime.datetime.fromtimestamp(file.stat().st_mtime)
+            if datetime.datetime.now() - last_change > max_age:
+                try:
+                    os.unlink(file.path)
+                except Exception as e:
+                    logging.exception(e)
+                else:
+                    logging.debug(f"Deleted old location cache {file.path}")
+
+
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
                        host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
@@ -246,6 +320,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     if "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded in the custom server.")
 
+    threading.Thread(target=cleanup_location_cache, name="LocationCacheCleaner").start()
+
     import gc
     ssl_context = load_server_cert(cert_file, cert_key_file) if cert_file else None
     del cert_file, cert_key_file, ponyconfig
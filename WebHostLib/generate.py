@@ -136,6 +136,8 @@ def gen_game(gen_options: dict, meta: Optional[Dict[str, Any]] = None, owner=Non
         erargs.skip_prog_balancing = False
         erargs.skip_output = False
         erargs.csv_output = False
+        erargs.parallel_generation = 0
+        erargs.profile_rules = False
 
         name_counter = Counter()
         for player, (playerfile, settings) in enumerate(gen_options.items(), 1):
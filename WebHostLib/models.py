@@ -26,6 +26,7 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    multisave_journal = Set('SaveJournalRecord')
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
@@ -33,6 +34,12 @@ class Room(db.Entity):
     last_port = Optional(int, default=lambda: 0)
 
 
+class SaveJournalRecord(db.Entity):
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    data = Required(buffer)
+
+
 class Seed(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     rooms = Set(Room)
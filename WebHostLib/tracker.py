@@ -1,7 +1,7 @@
 import datetime
 import collections
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
@@ -9,9 +9,11 @@ from flask import make_response, render_template, request, Request, Response
 from werkzeug.exceptions import abort
 
 from MultiServer import Context, get_saving_second
-from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
+from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType, get_checked_spheres, \
+    get_sphere_completion, get_sphere_index
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
+from .customserver import load_room_save
 from .models import GameDataPackage, Room
 
 # Multisave is currently updated, at most, every minute.
@@ -49,7 +51,7 @@ class TrackerData:
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
     """
     room: Room
-    _multidata: Dict[str, Any]
+    _multidata: MutableMapping[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
@@ -57,7 +59,7 @@ class TrackerData:
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
         self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        self._multisave = load_room_save(room) or {}
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -297,6 +299,32 @@ class TrackerData:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    @_cache_results
+    def get_sphere_index(self) -> Dict[int, Dict[int, int]]:
+        """Retrieves the sphere of each location as { player: { location_id: sphere, ... } }."""
+        return get_sphere_index(self.get_spheres())
+
+    @_cache_results
+    def get_sphere_sizes(self) -> List[int]:
+        """Retrieves the amount of locations in each sphere."""
+        return [sum(len(locations) for locations in sphere.values()) for sphere in self.get_spheres()]
+
+    @_cache_results
+    def get_checked_sphere_locations(self, team: int) -> List[Tuple[int, int, int]]:
+        """Retrieves (sphere, player, location_id) of each checked location of a team, sorted by sphere."""
+        sphere_index = self.get_sphere_index()
+        return sorted((sphere, player, location_id) for player in sphere_index
+                      for location_id, sphere in get_checked_spheres(
+                          sphere_index, player, self.get_player_checked_locations(team, player)).items())
+
+    @_cache_results
+    def get_sphere_completion(self, team: int) -> List[Tuple[int, int]]:
+        """Retrieves (checked, total) locations of each sphere for a team."""
+        sphere_index = self.get_sphere_index()
+        return get_sphere_completion(sphere_index, self.get_sphere_sizes(),
+                                     {player: self.get_player_checked_locations(team, player)
+                                      for player in sphere_index})
+
 
 def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -> Optional[Response]:
     if not room:
@@ -13,7 +13,8 @@ import warnings
 from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
-from libc.stdint cimport int64_t, uint32_t
+from libc.stdint cimport int64_t, uint32_t, uint64_t
+from libc.string cimport memcmp, memcpy
 from collections import defaultdict
 
 cdef extern from *:
@@ -69,6 +70,19 @@ cdef struct IndexEntry:
     size_t count
 
 
+cdef struct BufferHeader:
+    # flat buffer layout: BufferHeader, IndexEntry[sender_index_size], LocationEntry[entry_count]
+    # sizes are stored so a buffer from a different build or platform gets rejected instead of misread
+    char magic[8]
+    uint64_t entry_size
+    uint64_t index_entry_size
+    uint64_t entry_count
+    uint64_t sender_index_size
+
+
+cdef const char* BUFFER_MAGIC = b"APLocSt1"
+
+
 if TYPE_CHECKING:
     State = Dict[Tuple[int, int], Set[int]]
 else:
@@ -96,6 +110,7 @@ cdef class LocationStore:
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
     cdef PyObject** _raw_proxies  # 8K/1000 players, faster access to _proxies, but does not keep a ref
+    cdef object _buffer  # keeps the buffer alive that entries and sender_index point into, if created from one
 
     def get_size(self):
         from sys import getsizeof
@@ -110,7 +125,6 @@ cdef class LocationStore:
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
         self._mem = Pool()
-        cdef object key
         self._keys = []
         self._items = []
         self._proxies = []
@@ -172,13 +186,21 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        self.sender_index_size = max_sender + 1
+        self.entry_count = count
+        self._len = sender_count
+        self._build_caches()
+
+    cdef _build_caches(self):
         # build pyobject caches
+        cdef object key
+        cdef size_t i
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
-        for i in range(1, max_sender + 1):
+        for i in range(1, self.sender_index_size):
             assert self.sender_index[i].count == 0 or (
-                    self.sender_index[i].start < count and
-                    self.sender_index[i].start + self.sender_index[i].count <= count)
+                    self.sender_index[i].start < self.entry_count and
+                    self.sender_index[i].start + self.sender_index[i].count <= self.entry_count)
             key = i  # allocate python integer
             proxy = PlayerLocationProxy(self, i)
             self._keys.append(key)
@@ -186,9 +208,68 @@ cdef class LocationStore:
             self._proxies.append(proxy)
             self._raw_proxies[i] = <PyObject*>proxy
 
-        self.sender_index_size = max_sender + 1
-        self.entry_count = count
-        self._len = sender_count
+    # flat buffer
+    def to_buffer(self) -> bytes:
+        """Returns the entries and index as one position-independent buffer, see from_buffer."""
+        cdef BufferHeader header
+        memcpy(header.magic, BUFFER_MAGIC, 8)
+        header.entry_size = sizeof(LocationEntry)
+        header.index_entry_size = sizeof(IndexEntry)
+        header.entry_count = self.entry_count
+        header.sender_index_size = self.sender_index_size
+        cdef size_t index_size = sizeof(IndexEntry) * self.sender_index_size
+        cdef size_t entries_size = sizeof(LocationEntry) * self.entry_count
+        buffer = bytearray(sizeof(BufferHeader) + index_size + entries_size)
+        cdef unsigned char[::1] view = buffer
+        memcpy(&view[0], &header, sizeof(BufferHeader))
+        memcpy(&view[sizeof(BufferHeader)], self.sender_index, index_size)
+        if entries_size:
+            memcpy(&view[sizeof(BufferHeader) + index_size], self.entries, entries_size)
+        return bytes(buffer)
+
+    @staticmethod
+    def from_buffer(buffer: Any) -> LocationStore:
+        """
+        Creates a store using the data of a buffer from to_buffer in place, without copying it.
+        The buffer, e.g. bytes, an mmap or SharedMemory.buf, is kept alive by the store and must not be modified.
+        """
+        cdef const unsigned char[::1] view = buffer
+        cdef size_t size = view.shape[0]
+        if size < sizeof(BufferHeader):
+            raise ValueError("Buffer too small for a LocationStore")
+        cdef const BufferHeader* header = <const BufferHeader*>&view[0]
+        if memcmp(header.magic, BUFFER_MAGIC, 8) or header.entry_size != sizeof(LocationEntry) \
+                or header.index_entry_size != sizeof(IndexEntry):
+            raise ValueError("Buffer is not a LocationStore of this version")
+        if <size_t>&view[0] % sizeof(ap_id_t):
+            raise ValueError("Buffer is not aligned")
+        if header.sender_index_size < 2 or header.sender_index_size > MAX_PLAYER_ID + 1 or \
+                size != sizeof(BufferHeader) + sizeof(IndexEntry) * header.sender_index_size + \
+                sizeof(LocationEntry) * header.entry_count:
+            raise ValueError("Invalid LocationStore buffer size")
+
+        cdef size_t i
+        cdef LocationStore self = LocationStore.__new__(LocationStore)
+        self._mem = Pool()
+        self._keys = []
+        self._items = []
+        self._proxies = []
+        self._buffer = view
+        self.entry_count = header.entry_count
+        self.sender_index_size = header.sender_index_size
+        self.sender_index = <IndexEntry*>&view[sizeof(BufferHeader)]
+        if self.entry_count:
+            self.entries = <LocationEntry*>&view[sizeof(BufferHeader) + sizeof(IndexEntry) * self.sender_index_size]
+        self._raw_proxies = <PyObject**>self._mem.alloc(self.sender_index_size, sizeof(PyObject*))
+        self._len = self.sender_index_size - 1
+        if self.sender_index[0].count:
+            raise ValueError("Invalid player id 0 for location")
+        for i in range(1, self.sender_index_size):
+            if self.sender_index[i].count and (self.sender_index[i].start >= self.entry_count or
+                    self.sender_index[i].start + self.sender_index[i].count > self.entry_count):
+                raise ValueError("Invalid LocationStore buffer index")
+        self._build_caches()
+        return self
 
     # fake dict access
     def __len__(self) -> int:
@@ -0,0 +1,488 @@
+"""
+Access rules as objects that can be combined, simplified and inspected.
+
+Rules are called with a CollectionState like any other access_rule. Unlike lambdas they know the item names and regions
+they read, compare equal by their arguments and can be pickled for worker processes. set_rule, add_rule and
+Region.connect assign them compiled into plain closures, which are faster to call than the rule objects, keeping the rule
+on the closure for get_rule. worlds.generic.Rules.add_rule merges them into one flat And instead of nesting closures.
+
+This module does not import BaseClasses at runtime, so BaseClasses can use it.
+"""
+import typing
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+if typing.TYPE_CHECKING:
+    from BaseClasses import CollectionState, MultiWorld
+
+__all__ = [
+    "Rule", "True_", "False_", "Has", "HasAll", "HasAny", "HasGroup", "CanReachRegion", "And", "Or", "Count",
+    "compile_rule", "get_rule",
+]
+
+RuleFunction = Callable[["CollectionState"], bool]
+Dependencies = Dict[int, Set[str]]
+"""names by player"""
+
+
+def _merge_dependencies(dependencies: Iterable[Dependencies]) -> Dependencies:
+    ret: Dependencies = {}
+    for names_by_player in dependencies:
+        for player, names in names_by_player.items():
+            ret.setdefault(player, set()).update(names)
+    return ret
+
+
+class Rule:
+    """Base of all rules. Rules are immutable and compare equal when they are of the same type with equal arguments."""
+    __slots__ = ()
+    cost: int
+    """rough relative cost of evaluating the rule, cheaper rules are checked first after simplify()"""
+
+    def __call__(self, state: "CollectionState") -> bool:
+        raise NotImplementedError
+
+    def compile(self) -> RuleFunction:
+        """Returns a function that evaluates this rule, without the overhead of calling the rule object."""
+        call = self.__call__
+        return lambda state: call(state)
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        """The arguments to the constructor that create this rule."""
+        raise NotImplementedError
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        """The item names per player this rule can read. A change to any other item can't change its result."""
+        return {}
+
+    def get_region_dependencies(self) -> Dependencies:
+        """The Region names per player whose reachability this rule can read."""
+        return {}
+
+    def simplify(self) -> "Rule":
+        """Returns an equivalent rule that is cheaper or equally cheap to evaluate."""
+        return self
+
+    def __and__(self, other: "Rule") -> "Rule":
+        return And(self, other).simplify()
+
+    def __or__(self, other: "Rule") -> "Rule":
+        return Or(self, other).simplify()
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and self.get_arguments() == typing.cast(Rule, other).get_arguments()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.get_arguments()))
+
+    def __reduce__(self) -> Tuple[typing.Any, ...]:
+        return type(self), self.get_arguments()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(map(repr, self.get_arguments()))})"
+
+
+class True_(Rule):
+    """Always fulfilled."""
+    __slots__ = ()
+    cost = 0
+
+    def __call__(self, state: "CollectionState") -> bool:
+        return True
+
+    def compile(self) -> RuleFunction:
+        return lambda state: True
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return ()
+
+
+class False_(Rule):
+    """Never fulfilled."""
+    __slots__ = ()
+    cost = 0
+
+    def __call__(self, state: "CollectionState") -> bool:
+        return False
+
+    def compile(self) -> RuleFunction:
+        return lambda state: False
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return ()
+
+
+class Has(Rule):
+    """player has at least count of item."""
+    __slots__ = ("item", "player", "count")
+    item: str
+    player: int
+    count: int
+    cost = 1
+
+    def __init__(self, item: str, player: int, count: int = 1) -> None:
+        self.item = item
+        self.player = player
+        self.count = count
+
+    # reads prog_items like CollectionState.has, saving the call to it, and the same goes for HasAll and HasAny
+    def __call__(self, state: "CollectionState") -> bool:
+        return state.prog_items.peek(self.player)[self.item] >= self.count
+
+    def compile(self) -> RuleFunction:
+        item, player, count = self.item, self.player, self.count
+        return lambda state: state.prog_items.peek(player)[item] >= count
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.item, self.player, self.count
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        return {self.player: {self.item}}
+
+    def simplify(self) -> Rule:
+        return True_() if self.count <= 0 else self
+
+
+class HasAll(Rule):
+    """player has each of items at least once."""
+    __slots__ = ("items", "player", "cost")
+    items: Tuple[str, ...]
+    player: int
+
+    def __init__(self, items: Iterable[str], player: int) -> None:
+        self.items = tuple(dict.fromkeys(items))
+        self.player = player
+        self.cost = len(self.items)
+
+    def __call__(self, state: "CollectionState") -> bool:
+        player_prog_items = state.prog_items.peek(self.player)
+        for item in self.items:
+            if not player_prog_items[item]:
+                return False
+        return True
+
+    def compile(self) -> RuleFunction:
+        items, player = self.items, self.player
+
+        def has_all(state: "CollectionState") -> bool:
+            player_prog_items = state.prog_items.peek(player)
+            for item in items:
+                if not player_prog_items[item]:
+                    return False
+            return True
+        return has_all
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.items, self.player
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        return {self.player: set(self.items)} if self.items else {}
+
+    def simplify(self) -> Rule:
+        if not self.items:
+            return True_()
+        if len(self.items) == 1:
+            return Has(self.items[0], self.player)
+        return self
+
+
+class HasAny(Rule):
+    """player has at least one of items."""
+    __slots__ = ("items", "player", "cost")
+    items: Tuple[str, ...]
+    player: int
+
+    def __init__(self, items: Iterable[str], player: int) -> None:
+        self.items = tuple(dict.fromkeys(items))
+        self.player = player
+        self.cost = len(self.items)
+
+    def __call__(self, state: "CollectionState") -> bool:
+        player_prog_items = state.prog_items.peek(self.player)
+        for item in self.items:
+            if player_prog_items[item]:
+                return True
+        return False
+
+    def compile(self) -> RuleFunction:
+        items, player = self.items, self.player
+
+        def has_any(state: "CollectionState") -> bool:
+            player_prog_items = state.prog_items.peek(player)
+            for item in items:
+                if player_prog_items[item]:
+                    return True
+            return False
+        return has_any
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.items, self.player
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        return {self.player: set(self.items)} if self.items else {}
+
+    def simplify(self) -> Rule:
+        if not self.items:
+            return False_()
+        if len(self.items) == 1:
+            return Has(self.items[0], self.player)
+        return self
+
+
+class HasGroup(Rule):
+    """player has at least count items of the World's item_name_groups[group]."""
+    __slots__ = ("group", "player", "count")
+    group: str
+    player: int
+    count: int
+    cost = 4
+
+    def __init__(self, group: str, player: int, count: int = 1) -> None:
+        self.group = group
+        self.player = player
+        self.count = count
+
+    def __call__(self, state: "CollectionState") -> bool:
+        return state.has_group(self.group, self.player, self.count)
+
+    def compile(self) -> RuleFunction:
+        group, player, count = self.group, self.player, self.count
+        return lambda state: state.has_group(group, player, count)
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.group, self.player, self.count
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        return {self.player: set(multiworld.worlds[self.player].item_name_groups[self.group])}
+
+    def simplify(self) -> Rule:
+        return True_() if self.count <= 0 else self
+
+
+class CanReachRegion(Rule):
+    """The Region named region of player is reachable."""
+    __slots__ = ("region", "player")
+    region: str
+    player: int
+    cost = 8
+
+    def __init__(self, region: str, player: int) -> None:
+        self.region = region
+        self.player = player
+
+    def __call__(self, state: "CollectionState") -> bool:
+        return state.can_reach_region(self.region, self.player)
+
+    def compile(self) -> RuleFunction:
+        region, player = self.region, self.player
+        return lambda state: state.can_reach_region(region, player)
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.region, self.player
+
+    def get_region_dependencies(self) -> Dependencies:
+        return {self.player: {self.region}}
+
+
+class _Aggregate(Rule):
+    """A rule combining other rules, evaluated through a function compiled from theirs."""
+    __slots__ = ("rules", "cost", "_function")
+    rules: Tuple[Rule, ...]
+    _function: RuleFunction
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules = tuple(rules)
+        self.cost = sum(rule.cost for rule in self.rules)
+        self._function = self.compile()
+
+    def __call__(self, state: "CollectionState") -> bool:
+        return self._function(state)
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return self.rules
+
+    def get_item_dependencies(self, multiworld: "MultiWorld") -> Dependencies:
+        return _merge_dependencies(rule.get_item_dependencies(multiworld) for rule in self.rules)
+
+    def get_region_dependencies(self) -> Dependencies:
+        return _merge_dependencies(rule.get_region_dependencies() for rule in self.rules)
+
+    def _simplify_rules(self) -> List[Rule]:
+        """The simplified rules, with those of the same type as self flattened into them."""
+        rules: List[Rule] = []
+        for rule in self.rules:
+            rule = rule.simplify()
+            if type(rule) is type(self):
+                rules.extend(typing.cast(_Aggregate, rule).rules)
+            else:
+                rules.append(rule)
+        return rules
+
+
+class And(_Aggregate):
+    """All of rules are fulfilled. Nested Ands are flattened into one."""
+    __slots__ = ()
+
+    def __init__(self, *rules: Rule) -> None:
+        super().__init__(
+            inner for rule in rules for inner in (rule.rules if isinstance(rule, And) else (rule,)))
+
+    def compile(self) -> RuleFunction:
+        functions = tuple(rule.compile() for rule in self.rules)
+        if len(functions) == 2:
+            first, second = functions
+            return lambda state: first(state) and second(state)
+        if len(functions) == 3:
+            first, second, third = functions
+            return lambda state: first(state) and second(state) and third(state)
+
+        def all_of(state: "CollectionState") -> bool:
+            for function in functions:
+                if not function(state):
+                    return False
+            return True
+        return all_of
+
+    def simplify(self) -> Rule:
+        """Drops True_ and duplicates, merges Has and HasAll of a player into one HasAll or the highest count of an
+        item, and orders the rest by cost."""
+        items: Dict[int, Dict[str, int]] = {}
+        others: Dict[Rule, None] = {}
+        for rule in self._simplify_rules():
+            if isinstance(rule, False_):
+                return rule
+            if isinstance(rule, Has):
+                counts = items.setdefault(rule.player, {})
+                counts[rule.item] = max(counts.get(rule.item, 0), rule.count)
+            elif isinstance(rule, HasAll):
+                counts = items.setdefault(rule.player, {})
+                for item in rule.items:
+                    counts.setdefault(item, 1)
+            elif not isinstance(rule, True_):
+                others[rule] = None
+        rules: List[Rule] = []
+        for player, counts in items.items():
+            rules.append(HasAll((item for item, count in counts.items() if count == 1), player).simplify())
+            rules.extend(Has(item, player, count) for item, count in counts.items() if count > 1)
+        rules.extend(others)
+        rules = [rule for rule in rules if not isinstance(rule, True_)]
+        if not rules:
+            return True_()
+        if len(rules) == 1:
+            return rules[0]
+        return And(*sorted(rules, key=lambda rule: rule.cost))
+
+
+class Or(_Aggregate):
+    """Any of rules is fulfilled. Nested Ors are flattened into one."""
+    __slots__ = ()
+
+    def __init__(self, *rules: Rule) -> None:
+        super().__init__(
+            inner for rule in rules for inner in (rule.rules if isinstance(rule, Or) else (rule,)))
+
+    def compile(self) -> RuleFunction:
+        functions = tuple(rule.compile() for rule in self.rules)
+        if len(functions) == 2:
+            first, second = functions
+            return lambda state: first(state) or second(state)
+        if len(functions) == 3:
+            first, second, third = functions
+            return lambda state: first(state) or second(state) or third(state)
+
+        def any_of(state: "CollectionState") -> bool:
+            for function in functions:
+                if function(state):
+                    return True
+            return False
+        return any_of
+
+    def simplify(self) -> Rule:
+        """Drops False_ and duplicates, merges Has and HasAny of a player into one HasAny or the lowest count of an
+        item, and orders the rest by cost."""
+        items: Dict[int, Dict[str, int]] = {}
+        others: Dict[Rule, None] = {}
+        for rule in self._simplify_rules():
+            if isinstance(rule, True_):
+                return rule
+            if isinstance(rule, Has):
+                counts = items.setdefault(rule.player, {})
+                counts[rule.item] = min(counts.get(rule.item, rule.count), rule.count)
+            elif isinstance(rule, HasAny):
+                counts = items.setdefault(rule.player, {})
+                for item in rule.items:
+                    counts[item] = 1
+            elif not isinstance(rule, False_):
+                others[rule] = None
+        rules: List[Rule] = []
+        for player, counts in items.items():
+            rules.append(HasAny((item for item, count in counts.items() if count == 1), player).simplify())
+            rules.extend(Has(item, player, count) for item, count in counts.items() if count > 1)
+        rules.extend(others)
+        rules = [rule for rule in rules if not isinstance(rule, False_)]
+        if not rules:
+            return False_()
+        if len(rules) == 1:
+            return rules[0]
+        return Or(*sorted(rules, key=lambda rule: rule.cost))
+
+
+class Count(_Aggregate):
+    """At least count of rules are fulfilled."""
+    __slots__ = ("count",)
+    count: int
+
+    def __init__(self, count: int, *rules: Rule) -> None:
+        self.count = count
+        super().__init__(rules)
+
+    def compile(self) -> RuleFunction:
+        functions = tuple(rule.compile() for rule in self.rules)
+        count = self.count
+
+        def count_of(state: "CollectionState") -> bool:
+            found = 0
+            for function in functions:
+                if function(state):
+                    found += 1
+                    if found >= count:
+                        return True
+            return found >= count
+        return count_of
+
+    def get_arguments(self) -> Tuple[typing.Any, ...]:
+        return (self.count, *self.rules)
+
+    def simplify(self) -> Rule:
+        """Counts True_ as fulfilled and drops False_, then turns into And, Or, True_ or False_ where the count
+        allows it."""
+        count = self.count
+        rules: List[Rule] = []
+        for rule in self.rules:
+            rule = rule.simplify()
+            if isinstance(rule, True_):
+                count -= 1
+            elif not isinstance(rule, False_):
+                rules.append(rule)
+        if count <= 0:
+            return True_()
+        if count > len(rules):
+            return False_()
+        if count == len(rules):
+            return And(*rules).simplify()
+        if count == 1:
+            return Or(*rules).simplify()
+        return Count(count, *sorted(rules, key=lambda rule: rule.cost))
+
+
+def compile_rule(rule: Rule) -> RuleFunction:
+    """Compiles rule into a function to assign as access_rule, which keeps rule as its rule attribute."""
+    function = rule.compile()
+    function.rule = rule  # type: ignore[attr-defined]
+    return function
+
+
+def get_rule(function: Callable[..., bool]) -> Optional[Rule]:
+    """The Rule that function is, or was compiled from by compile_rule."""
+    if isinstance(function, Rule):
+        return function
+    return getattr(function, "rule", None)
@@ -0,0 +1,184 @@
+"""
+Opt-in profiling of the rules evaluated during generation, see Generate.py --profile_rules.
+
+RuleProfiler.install wraps every Location and Entrance access_rule, Location item_rule and completion_condition with a
+function counting its calls and time. Stages are marked through MultiWorld.set_rule_profile_stage. Nothing is wrapped
+unless a profiler is installed, so generation without it runs the rules as they are.
+
+The report attributes the cost per stage, per world and per rule. A rule is identified by its code, so the lambdas a
+world creates in a loop add up to one rule. The folded report has one line of self time in microseconds per stack of
+stage, world and nested rules, as flamegraph.pl and speedscope read it.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import typing
+from typing import Any, Callable, Dict, List, Tuple
+
+if typing.TYPE_CHECKING:
+    from BaseClasses import MultiWorld
+
+__all__ = ["RuleProfiler", "get_rule_name"]
+
+Frame = Tuple[str, str]
+"""world and rule of a profiled rule evaluation"""
+
+
+def get_rule_name(rule: Callable[..., Any]) -> str:
+    """A name for rule that is the same for all functions created from the same code."""
+    from rule_builder import get_rule
+
+    rule_object = get_rule(rule)
+    if rule_object is not None:
+        return repr(rule_object)
+    if isinstance(rule, functools.partial):
+        return get_rule_name(rule.func)
+    function = getattr(rule, "__func__", rule)  # bound methods
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return type(rule).__qualname__
+    if code.co_filename.startswith("<"):
+        # code compiled at runtime, like the rules of Ocarina of Time, has no place in a file to tell it apart
+        return f"{function.__qualname__} of {code.co_filename} at {id(code):#x}"
+    return f"{function.__module__}:{code.co_firstlineno} {function.__qualname__}"
+
+
+class _Stack(threading.local):
+    """The profiled rules being evaluated by one thread, as output runs rules in several threads at once."""
+    frames: List[Frame]
+    """outermost first"""
+    child_times: List[float]
+    """time spent in profiled rules called by each of the rules in frames"""
+
+    def __init__(self) -> None:
+        self.frames = []
+        self.child_times = []
+
+
+class RuleProfiler:
+    stage: str
+    """the part of generation rule evaluations are attributed to"""
+    stack: _Stack
+    """the profiled rules being evaluated by the current thread"""
+    lock: threading.Lock
+    """guards the recorded evaluations against threads recording at the same time"""
+    rules: Dict[Tuple[str, str, str], List[Any]]
+    """calls and cumulative seconds by stage, world and rule"""
+    spots: Dict[Tuple[str, str], List[Any]]
+    """calls and cumulative seconds by world and spot, over all stages"""
+    stacks: Dict[Tuple[str, ...], float]
+    """self seconds by stage and the frames of the stack"""
+
+    def __init__(self) -> None:
+        self.stage = "before fill"
+        self.stack = _Stack()
+        self.lock = threading.Lock()
+        self.rules = {}
+        self.spots = {}
+        self.stacks = {}
+
+    def install(self, multiworld: "MultiWorld") -> None:
+        """Wraps the rules of all Locations, Entrances and completion conditions of multiworld. Rules replaced later
+        on are not profiled."""
+        from BaseClasses import Entrance, Location
+
+        multiworld.rule_profiler = self
+        worlds = {player: f"{multiworld.get_player_name(player)} ({multiworld.game[player]})"
+                  for player in multiworld.player_ids}
+
+        def get_world(player: int) -> str:
+            return worlds.get(player) or multiworld.get_player_name(player)
+
+        for location in multiworld.get_locations():
+            world = get_world(location.player)
+            if location.access_rule is not Location.access_rule:
+                location.access_rule = self.wrap(location.access_rule, world, "access_rule", location.name)
+            if location.item_rule is not Location.item_rule:
+                location.item_rule = self.wrap(location.item_rule, world, "item_rule", location.name)
+        for entrance in multiworld.get_entrances():
+            if entrance.access_rule is not Entrance.access_rule:
+                entrance.access_rule = self.wrap(entrance.access_rule, get_world(entrance.player), "access_rule",
+                                                 entrance.name)
+        for player, condition in multiworld.completion_condition.items():
+            multiworld.completion_condition[player] = self.wrap(condition, get_world(player), "completion_condition",
+                                                                "completion_condition")
+
+    def wrap(self, rule: Callable[..., bool], world: str, kind: str, spot: str) -> Callable[..., bool]:
+        """Returns a function evaluating rule that records the evaluations."""
+        frame = (world, f"{kind} {get_rule_name(rule)}")
+        spot_key = (world, f"{kind} of {spot}")
+        thread_stack = self.stack
+        perf_counter = time.perf_counter
+
+        def profiled_rule(*args: Any) -> bool:
+            stack = thread_stack.frames
+            child_times = thread_stack.child_times
+            stack.append(frame)
+            child_times.append(0.)
+            start = perf_counter()
+            try:
+                return rule(*args)
+            finally:
+                taken = perf_counter() - start
+                self.record(frame, spot_key, taken, taken - child_times.pop(), stack)
+                stack.pop()
+                if child_times:
+                    child_times[-1] += taken
+
+        profiled_rule.__wrapped__ = rule  # type: ignore[attr-defined]
+        return profiled_rule
+
+    def record(self, frame: Frame, spot: Tuple[str, str], taken: float, self_taken: float,
+               stack: List[Frame]) -> None:
+        stage = self.stage
+        stack_key = (stage, *(name for world_rule in stack for name in world_rule))
+        # the time of recursive evaluations is already part of the outer one
+        cumulative = 0. if frame in stack[:-1] else taken
+        with self.lock:
+            self.stacks[stack_key] = self.stacks.get(stack_key, 0.) + self_taken
+            for counters, key in ((self.rules, (stage, *frame)), (self.spots, spot)):
+                counter = counters.get(key)
+                if counter is None:
+                    counters[key] = [1, cumulative]
+                else:
+                    counter[0] += 1
+                    counter[1] += cumulative
+
+    def get_report(self) -> Dict[str, Any]:
+        """The recorded evaluations, hottest first."""
+        stages: Dict[str, List[float]] = {}
+        for (stage, *frames), taken in self.stacks.items():
+            counter = stages.setdefault(stage, [0, 0.])
+            counter[1] += taken
+        for (stage, _, _), (calls, _) in self.rules.items():
+            stages[stage][0] += calls
+        return {
+            "stages": [{"stage": stage, "calls": calls, "self_seconds": taken}
+                       for stage, (calls, taken) in stages.items()],
+            "rules": [{"stage": stage, "world": world, "rule": rule, "calls": calls, "seconds": taken}
+                      for (stage, world, rule), (calls, taken) in
+                      sorted(self.rules.items(), key=lambda entry: entry[1][1], reverse=True)],
+            "spots": [{"world": world, "spot": spot, "calls": calls, "seconds": taken}
+                      for (world, spot), (calls, taken) in
+                      sorted(self.spots.items(), key=lambda entry: entry[1][1], reverse=True)],
+        }
+
+    def get_folded(self) -> str:
+        """The self time of every stack in microseconds, in the folded format of flamegraph.pl."""
+        return "".join(f"{';'.join(frame.replace(';', ',') for frame in stack)} {round(taken * 1_000_000)}\n"
+                       for stack, taken in sorted(self.stacks.items()))
+
+    def get_files(self, name: str) -> Dict[str, bytes]:
+        """The report files by file name, using name as the base name."""
+        return {
+            f"{name}_Rule_Profile.json": json.dumps(self.get_report(), indent=1).encode(),
+            f"{name}_Rule_Profile.folded": self.get_folded().encode(),
+        }
+
+    def log_summary(self, count: int = 10) -> None:
+        logger = logging.getLogger("performance")
+        for entry in self.get_report()["rules"][:count]:
+            logger.info(f"{entry['seconds']:.4f} seconds in {entry['calls']} calls of {entry['rule']} of "
+                        f"{entry['world']} during {entry['stage']}.")
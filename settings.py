@@ -23,24 +23,22 @@ __all__ = [
 
 no_gui = False
 skip_autosave = False
-_world_settings_name_cache: Dict[str, str] = {}  # TODO: cache on disk and update when worlds change
+_world_settings_name_cache: Dict[str, str] = {}  # settings key -> game, from the world manifest
 _world_settings_name_cache_updated = False
 _lock = Lock()
 
 
 def _update_cache() -> None:
-    """Load all worlds and update world_settings_name_cache"""
+    """Update world_settings_name_cache from the world manifest"""
     global _world_settings_name_cache_updated
     if _world_settings_name_cache_updated:
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        from worlds import world_manifest
+        for game, manifest in world_manifest.items():
+            if manifest["has_settings"]:
+                _world_settings_name_cache[manifest["settings_key"]] = game
     finally:
         _world_settings_name_cache_updated = True
 
@@ -603,6 +601,7 @@ class ServerOptions(Group):
     multidata: Optional[str] = None
     savefile: Optional[str] = None
     disable_save: bool = False
+    journal_save: bool = False
     loglevel: str = "info"
     logtime: bool = False
     server_password: Optional[ServerPassword] = None
@@ -666,6 +665,14 @@ class GeneratorOptions(Group):
         OFF = 0
         ON = 1
 
+    class MultidataCompression(str):
+        """
+        Compression of the .archipelago multidata, as codec or codec:level. Servers of older versions can't load it.
+        zlib -> levels 0 to 9
+        lzma -> levels 0 to 9, smallest and slowest
+        zstd -> levels 1 to 22, fastest, requires the zstandard module on every machine that loads the seed
+        """
+
     class PanicMethod(str):
         """
         What to do if the current item placements appear unsolvable.
@@ -683,6 +690,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    multidata_compression: MultidataCompression = MultidataCompression("zlib:6")
     loglevel: str = "info"
     logtime: bool = False
 
@@ -734,6 +742,8 @@ class Settings(Group):
     bizhawkclient_options: BizHawkClientOptions = BizHawkClientOptions()
 
     _filename: Optional[str] = None
+    _loaded_worlds_only: bool = False
+    """Don't import worlds for their settings, sections of worlds that were not imported stay as they were read"""
 
     def __getattribute__(self, key: str) -> Any:
         if key.startswith("_") or key in self.__class__.__dict__:
@@ -751,9 +761,13 @@ class Settings(Group):
             if key not in _world_settings_name_cache:
                 # not a world group
                 return super().__getattribute__(key)
-            # directly import world and grab settings class
-            world_mod, world_cls_name = _world_settings_name_cache[key].rsplit(".", 1)
-            world = cast(type, getattr(__import__(world_mod, fromlist=[world_cls_name]), world_cls_name))
+            # import world and grab settings class
+            from worlds.AutoWorld import AutoWorldRegister
+            if self._loaded_worlds_only and \
+                    not AutoWorldRegister.world_types.is_registered(_world_settings_name_cache[key]):
+                return super().__getattribute__(key)
+            world = cast(type, AutoWorldRegister.world_types[_world_settings_name_cache[key]])
+            world_mod, world_cls_name = world.__module__, world.__name__
             assert getattr(world, "settings_key") == key
             try:
                 cls_or_name = world.__annotations__["settings"]
@@ -815,6 +829,8 @@ class Settings(Group):
                 assert "pytest" not in main_file and "unittest" not in main_file, \
                        f"Auto-saving {self._filename} during unittests"
             if self._filename and self.changed and not skip_autosave:
+                # worlds can't be imported anymore while the interpreter shuts down
+                self._loaded_worlds_only = True
                 self.save()
 
         if not skip_autosave:
@@ -849,7 +865,11 @@ class Settings(Group):
     def dump(self, f: TextIO, level: int = 0) -> None:
         # load all world setting classes
         _update_cache()
-        for key in _world_settings_name_cache:
+        for key, game in _world_settings_name_cache.items():
+            if self._loaded_worlds_only:
+                from worlds.AutoWorld import AutoWorldRegister
+                if not AutoWorldRegister.world_types.is_registered(game):
+                    continue
             self.__getattribute__(key)  # load all worlds
         super().dump(f, level)
 
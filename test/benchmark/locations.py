@@ -48,56 +48,104 @@ def run_locations_benchmark():
                 gc.collect()
             return t.dif
 
-        def main(self):
-            for game in sorted(AutoWorld.AutoWorldRegister.world_types):
-                summary_data: typing.Dict[str, collections.Counter[str]] = {
-                    "empty_state": collections.Counter(),
-                    "all_state": collections.Counter(),
-                }
-                try:
-                    multiworld = MultiWorld(1)
-                    multiworld.game[1] = game
-                    multiworld.player_name = {1: "Tester"}
-                    multiworld.set_seed(0)
-                    multiworld.state = CollectionState(multiworld)
-                    args = argparse.Namespace()
-                    for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
-                        setattr(args, name, {
-                            1: option.from_any(getattr(option, "default"))
-                        })
-                    multiworld.set_options(args)
+        def item_count_test(self, multiworld: MultiWorld, state: CollectionState, indexed_item_counts: bool) -> float:
+            """Checks every progression item of the world in state, by name with Counters and by index with
+            IndexedCounters, for about rule_iterations checks in total."""
+            names = sorted({item.name for item in multiworld.itempool if item.advancement})
+            if not names:
+                return 0.0
+            rounds = max(1, self.rule_iterations // len(names))
+            with TimeIt(f"{multiworld.game[1]} {rounds} runs of checking {len(names)} progression items "
+                        f"{'by index' if indexed_item_counts else 'by name'}", logger) as t:
+                if indexed_item_counts:
+                    indices = [multiworld.get_item_index(name, 1) for name in names]
+                    for _ in range(rounds):
+                        for index in indices:
+                            state.has_index(index, 1)
+                else:
+                    for _ in range(rounds):
+                        for name in names:
+                            state.has(name, 1)
+            return t.dif
 
+        def run_game(self, game: str,
+                     indexed_item_counts: bool) -> typing.Optional[typing.Tuple[float, float, float]]:
+            """Returns the summed time per location in empty_state and all_state and the time of checking progression
+            items, None if there are no locations."""
+            summary_data: typing.Dict[str, collections.Counter[str]] = {
+                "empty_state": collections.Counter(),
+                "all_state": collections.Counter(),
+            }
+            world_type = AutoWorld.AutoWorldRegister.world_types[game]
+            multiworld = MultiWorld(1)
+            multiworld.game[1] = game
+            multiworld.player_name = {1: "Tester"}
+            multiworld.set_seed(0)
+            args = argparse.Namespace()
+            for name, option in world_type.options_dataclass.type_hints.items():
+                setattr(args, name, {
+                    1: option.from_any(getattr(option, "default"))
+                })
+            multiworld.set_options(args)
+            multiworld.worlds[1].indexed_item_counts = indexed_item_counts
+            multiworld.state = CollectionState(multiworld)
+
+            gc.collect()
+            for step in self.gen_steps:
+                with TimeIt(f"{game} step {step}", logger):
+                    call_all(multiworld, step)
                     gc.collect()
-                    for step in self.gen_steps:
-                        with TimeIt(f"{game} step {step}", logger):
-                            call_all(multiworld, step)
-                            gc.collect()
-
-                    locations = sorted(multiworld.get_unfilled_locations())
-                    if not locations:
-                        continue
-
-                    all_state = multiworld.get_all_state(False)
-                    for location in locations:
-                        time_taken = self.location_test(location, multiworld.state, "empty_state")
-                        summary_data["empty_state"][location.name] = time_taken
-
-                        time_taken = self.location_test(location, all_state, "all_state")
-                        summary_data["all_state"][location.name] = time_taken
-
-                    total_empty_state = sum(summary_data["empty_state"].values())
-                    total_all_state = sum(summary_data["all_state"].values())
-
-                    logger.info(f"{game} took {total_empty_state/len(locations):.4f} "
-                                f"seconds per location in empty_state and {total_all_state/len(locations):.4f} "
-                                f"in all_state. (all times summed for {self.rule_iterations} runs.)")
-                    logger.info(f"Top times in empty_state:\n"
-                                f"{self.format_times_from_counter(summary_data['empty_state'])}")
-                    logger.info(f"Top times in all_state:\n"
-                                f"{self.format_times_from_counter(summary_data['all_state'])}")
-
-                except Exception as e:
-                    logger.exception(e)
+                if step == "create_items":
+                    multiworld.index_item_names()
+
+            locations = sorted(multiworld.get_unfilled_locations())
+            if not locations:
+                return None
+
+            all_state = multiworld.get_all_state(False)
+            for location in locations:
+                time_taken = self.location_test(location, multiworld.state, "empty_state")
+                summary_data["empty_state"][location.name] = time_taken
+
+                time_taken = self.location_test(location, all_state, "all_state")
+                summary_data["all_state"][location.name] = time_taken
+
+            total_empty_state = sum(summary_data["empty_state"].values())
+            total_all_state = sum(summary_data["all_state"].values())
+
+            logger.info(f"{game} took {total_empty_state/len(locations):.4f} "
+                        f"seconds per location in empty_state and {total_all_state/len(locations):.4f} "
+                        f"in all_state. (all times summed for {self.rule_iterations} runs.)")
+            logger.info(f"Top times in empty_state:\n"
+                        f"{self.format_times_from_counter(summary_data['empty_state'])}")
+            logger.info(f"Top times in all_state:\n"
+                        f"{self.format_times_from_counter(summary_data['all_state'])}")
+            item_counts = self.item_count_test(multiworld, all_state, indexed_item_counts)
+            return total_empty_state / len(locations), total_all_state / len(locations), item_counts
+
+        def main(self):
+            results: typing.Dict[str, typing.Dict[bool, typing.Tuple[float, float, float]]] = {}
+            for game in sorted(AutoWorld.AutoWorldRegister.world_types):
+                # before and after: the prog_items the world asks for, and IndexedCounters
+                for indexed_item_counts in (False, True):
+                    try:
+                        times = self.run_game(game, indexed_item_counts)
+                    except Exception as e:
+                        logger.exception(e)
+                        break
+                    if times is None:
+                        break
+                    results.setdefault(game, {})[indexed_item_counts] = times
+
+            logger.info("Seconds per location in empty_state and all_state, and for checking progression items by name "
+                        "and by index, with Counter and with IndexedCounter:")
+            for game, times in results.items():
+                if len(times) < 2:
+                    continue
+                empty_before, all_before, items_before = times[False]
+                empty_after, all_after, items_after = times[True]
+                logger.info(f"  {game}: {empty_before:.4f} -> {empty_after:.4f}, {all_before:.4f} -> {all_after:.4f}, "
+                            f"{items_before:.4f} -> {items_after:.4f}")
 
     runner = BenchmarkRunner()
     runner.main()
@@ -0,0 +1,69 @@
+def run_patch_benchmark(size: int = 8 * 1024 * 1024, tokens: int = 100_000):
+    """Time applying each kind of token to a file of the given size and the peak memory of patching a file from a
+    container on disk."""
+    import logging
+    import os
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    from Utils import init_logging
+    from worlds.Files import APPatchExtension, APProcedurePatch, APTokenMixin, APTokenTypes
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    source = random.Random(0).randbytes(size)
+
+    class BenchmarkPatch(APProcedurePatch, APTokenMixin):
+        hash = "benchmark"
+        procedure = [("apply_tokens", ["token_data.bin"]), ("calc_snes_crc", [])]
+        result_file_ending = ".bin"
+
+        @classmethod
+        def get_source_data(cls) -> bytes:
+            return source
+
+    rng = random.Random(0)
+    arguments = {
+        APTokenTypes.WRITE: lambda: rng.randbytes(16),
+        APTokenTypes.COPY: lambda: (256, rng.randrange(size - 256)),
+        APTokenTypes.RLE: lambda: (256, rng.randrange(256)),
+        APTokenTypes.AND_8: lambda: rng.randrange(256),
+        APTokenTypes.OR_8: lambda: rng.randrange(256),
+        APTokenTypes.XOR_8: lambda: rng.randrange(256),
+    }
+    all_tokens = BenchmarkPatch()
+    for token_type, argument in arguments.items():
+        patch = BenchmarkPatch()
+        for _ in range(tokens):
+            offset = rng.randrange(size - 256)
+            data = argument()
+            patch.write_token(token_type, offset, data)
+            all_tokens.write_token(token_type, offset, data)
+        patch.write_file("token_data.bin", patch.get_token_binary())
+        start = time.perf_counter()
+        APPatchExtension.apply_tokens(patch, source, "token_data.bin")
+        logger.info(f"{tokens} {token_type.name} tokens took {time.perf_counter() - start:.4f} seconds.")
+    all_tokens.write_file("token_data.bin", all_tokens.get_token_binary())
+
+    with tempfile.TemporaryDirectory() as directory:
+        all_tokens.path = os.path.join(directory, "benchmark.apbenchmark")
+        all_tokens.write()
+        start = time.perf_counter()
+        BenchmarkPatch(all_tokens.path).patch(os.path.join(directory, "benchmark.bin"))
+        taken = time.perf_counter() - start
+        # tracing slows down every allocation, so memory is measured in a separate run
+        tracemalloc.start()
+        BenchmarkPatch(all_tokens.path).patch(os.path.join(directory, "benchmark.bin"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    logger.info(f"Patching {size / 1024 / 1024:.1f} MiB with {len(all_tokens._tokens)} tokens from disk took "
+                f"{taken:.4f} seconds, peaking at {peak / 1024 / 1024:.1f} MiB.")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_patch_benchmark()
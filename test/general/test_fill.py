@@ -3,11 +3,12 @@ import unittest
 
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
-from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
+from Fill import FillError, LocationCandidates, PoolSweep, balance_multiworld_progression, fill_restrictive, \
+    distribute_early_items, distribute_items_restrictive, swap_location_item, sweep_from_pool
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
-from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
+from worlds.generic.Rules import CollectionRule, add_item_rule, is_item_only_rule, item_only_rule, \
+    locality_rules, set_rule
 
 
 class PlayerDefinition(object):
@@ -463,6 +464,39 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_pool_sweep(self):
+        """Test that PoolSweep finds the same state as sweeping the remaining pool from the base state"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, prog_item_count=6)
+        region = player1.menu
+        for item in player1.prog_items:
+            region = player1.generate_region(region, 2, lambda state, name=item.name: state.has(name, 1))
+        pool = player1.prog_items.copy()
+        pool_sweep = PoolSweep(multiworld.state)
+
+        def assert_same_state(upcoming: List[Item]) -> None:
+            expected = sweep_from_pool(multiworld.state, pool)
+            state = pool_sweep.get_state(pool, upcoming)
+            self.assertEqual(expected.prog_items[1], state.prog_items[1])
+            self.assertEqual(expected.advancements, state.advancements)
+            self.assertEqual(expected.reachable_regions[1], state.reachable_regions[1])
+
+        assert_same_state(pool[-2:])
+        # each item goes into the Region its predecessor in the pool unlocks
+        while len(pool) > 1:
+            item = pool.pop()
+            multiworld.push_item(player1.regions[len(pool)].locations[0], item, False)
+            assert_same_state(pool[-2:])
+        self.assertGreater(pool_sweep.incremental_sweeps, 0)
+
+        # a checkpoint collecting everything, then Items get swapped out of Locations it collected from
+        pool_sweep = PoolSweep(multiworld.state)
+        assert_same_state([])
+        swap_location_item(player1.regions[3].locations[0], player1.regions[5].locations[0])
+        pool_sweep.location_changed(player1.regions[3].locations[0])
+        pool_sweep.location_changed(player1.regions[5].locations[0])
+        assert_same_state([])
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -858,3 +892,64 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
 
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
+
+
+class TestLocationCandidates(unittest.TestCase):
+    def tearDown(self) -> None:
+        MultiWorld.debug_location_candidates = False
+
+    def test_same_placements_as_scan(self) -> None:
+        """Test that fill picks the same Locations from its candidate buckets as scanning every open Location does"""
+        MultiWorld.debug_location_candidates = True
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                multiworld = generate_test_multiworld(3)
+                multiworld.random.seed(seed)
+                for player in multiworld.player_ids:
+                    player_data = generate_player_data(multiworld, player, 20, prog_item_count=6, basic_item_count=19)
+                    key = player_data.prog_items[0].name
+                    player_data.generate_region(player_data.menu, 5, lambda state, key=key, player=player:
+                                                state.has(key, player))
+                    for item in player_data.basic_items[:5]:
+                        item.classification = ItemClassification.useful
+                    for location in player_data.locations[:4]:
+                        location.progress_type = LocationProgressType.EXCLUDED
+                    add_item_rule(player_data.locations[5], lambda item, player=player: item.player != player)
+                    options = multiworld.worlds[player].options
+                    options.local_items.value = set(names(player_data.basic_items[5:10]))
+                    options.non_local_items.value = {player_data.prog_items[-1].name}
+                locality_rules(multiworld)
+
+                distribute_items_restrictive(multiworld)
+                self.assertTrue(all(item.location for item in multiworld.itempool))
+
+    def test_rules_reading_placements(self) -> None:
+        """Test that item rules are evaluated again for every Item unless they are marked as item only"""
+        multiworld = generate_test_multiworld()
+        player_data = generate_player_data(multiworld, 1, 3, basic_item_count=2)
+        shop, other, forbidding = player_data.locations
+        first, duplicate = player_data.basic_items
+        duplicate.name = first.name
+        shop.item_rule = lambda item: other.item is None or other.item.name != item.name
+        calls = []
+        forbidding.item_rule = item_only_rule(lambda item: calls.append(item) or item.name != "Sword")
+        candidates = LocationCandidates(player_data.locations)
+
+        self.assertTrue(candidates.can_fill(multiworld.state, shop, first, False))
+        multiworld.push_item(other, first, False)
+        self.assertFalse(candidates.can_fill(multiworld.state, shop, duplicate, False))
+
+        self.assertTrue(candidates.can_fill(multiworld.state, forbidding, first, False))
+        self.assertTrue(candidates.can_fill(multiworld.state, forbidding, duplicate, False))
+        self.assertEqual([first], calls)
+
+    def test_locality_rules_item_only(self) -> None:
+        """Test that the item rules of locality_rules are marked as only depending on the Item"""
+        multiworld = generate_test_multiworld(2)
+        player_data = generate_player_data(multiworld, 1, 2, prog_item_count=1)
+        custom, plain = player_data.locations
+        add_item_rule(custom, lambda item: item.player == 1)
+        multiworld.worlds[1].options.local_items.value = set(names(player_data.prog_items))
+        locality_rules(multiworld)
+        self.assertTrue(is_item_only_rule(plain.item_rule))
+        self.assertFalse(is_item_only_rule(custom.item_rule))
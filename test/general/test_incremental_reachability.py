@@ -0,0 +1,110 @@
+import itertools
+import unittest
+
+from BaseClasses import (ChangeTrackingCounter, CollectionState, Item, ItemClassification, Location, MultiWorld,
+                         PendingLocations, Region)
+from . import generate_test_multiworld
+
+
+class TestIncrementalReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        MultiWorld.debug_incremental_reachability = True
+        self.multiworld = generate_test_multiworld()
+        self.multiworld.worlds[1].incremental_reachability = True
+        self.rule_calls = 0
+
+        menu = self.multiworld.get_region("Menu", 1)
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.lake = Region("Lake", 1, self.multiworld)
+        self.island = Region("Island", 1, self.multiworld)
+        self.multiworld.regions += [self.cave, self.lake, self.island]
+
+        def cave_rule(state: CollectionState) -> bool:
+            self.rule_calls += 1
+            return state.has("Lamp", 1)
+
+        menu.connect(self.cave, rule=cave_rule)
+        menu.connect(self.lake, rule=lambda state: state.has_all(("Flippers", "Lamp"), 1))
+        island_entrance = self.lake.connect(self.island, rule=lambda state: state.can_reach_region("Cave", 1))
+        self.multiworld.register_indirect_condition(self.cave, island_entrance)
+
+        self.chest = Location(1, "Chest", None, self.island)
+        self.chest.access_rule = lambda state: state.has("Key", 1)
+        self.island.locations.append(self.chest)
+        self.chest.place_locked_item(Item("Treasure", ItemClassification.progression, None, 1))
+
+    def tearDown(self) -> None:
+        MultiWorld.debug_incremental_reachability = False
+
+    def create_items(self):
+        return [Item(name, ItemClassification.progression, None, 1) for name in ("Lamp", "Flippers", "Key", "Junk")]
+
+    def test_matches_full_search(self) -> None:
+        """Every order of collecting items reaches the same regions as the full search, which debug mode checks."""
+        for items in itertools.permutations(self.create_items()):
+            with self.subTest(items=[item.name for item in items]):
+                state = CollectionState(self.multiworld)
+                for item in items:
+                    state.collect(item)
+                    self.assertTrue(state.can_reach(self.multiworld.get_region("Menu", 1)))
+                self.assertTrue(state.can_reach(self.island))
+                self.assertTrue(state.has("Treasure", 1))
+
+    def test_unrelated_item_skips_rule(self) -> None:
+        """Collecting an item no rule reads does not re-evaluate blocked entrances."""
+        MultiWorld.debug_incremental_reachability = False  # the check itself evaluates every rule
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(self.cave))
+        calls = self.rule_calls
+        state.collect(self.create_items()[3], True)  # Junk
+        self.assertFalse(state.can_reach(self.cave))
+        self.assertEqual(calls, self.rule_calls)
+        state.collect(self.create_items()[0], True)  # Lamp
+        self.assertTrue(state.can_reach(self.cave))
+        self.assertEqual(calls + 1, self.rule_calls)
+
+    def test_copy_keeps_changes(self) -> None:
+        """Changes collected before a copy are still re-evaluated in the copy."""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(self.cave))
+        state.collect(self.create_items()[0], True)
+        copied = state.copy()
+        self.assertTrue(copied.can_reach(self.cave))
+        self.assertTrue(state.can_reach(self.cave))
+
+    def test_remove(self) -> None:
+        """Removing an item makes the world unreachable again."""
+        state = CollectionState(self.multiworld)
+        lamp = self.create_items()[0]
+        state.collect(lamp, True)
+        self.assertTrue(state.can_reach(self.cave))
+        state.remove(lamp)
+        self.assertFalse(state.can_reach(self.cave))
+
+    def test_copy_during_sweep(self) -> None:
+        """Items collected after the state was copied mid-sweep still wake up the locations that need them."""
+        state = CollectionState(self.multiworld)
+        for item in self.create_items()[:2]:
+            state.collect(item, True)
+        pending = PendingLocations(state, [self.chest])
+        try:
+            self.assertEqual(set(), pending.pop_reachable())
+            state.copy()
+            state.collect(self.create_items()[2], True)  # Key
+            self.assertEqual({self.chest}, pending.pop_reachable())
+        finally:
+            pending.close()
+
+    def test_counter_update(self) -> None:
+        """Items written through update and subtract are recorded as changed."""
+        counter = ChangeTrackingCounter()
+        observer = set()
+        counter.observers.append(observer)
+        counter.update({"Lamp": 2})
+        counter.update(["Key"])
+        self.assertEqual({"Lamp", "Key"}, counter.changed)
+        counter.changed.clear()
+        counter.subtract({"Lamp": 1})
+        self.assertEqual({"Lamp"}, counter.changed)
+        self.assertEqual({"Lamp", "Key"}, observer)
+        self.assertEqual(1, counter["Lamp"])
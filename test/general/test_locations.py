@@ -1,7 +1,9 @@
 import unittest
 from collections import Counter
+from BaseClasses import MultiWorld
+from Fill import swap_location_item
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_items, generate_locations, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -72,3 +74,54 @@ class TestBase(unittest.TestCase):
                         for location in locations:
                             self.assertIn(location, world_type.location_name_to_id)
                         self.assertNotIn(group_name, world_type.location_name_to_id)
+
+
+class TestLocationIndexes(unittest.TestCase):
+    def assert_matches_scan(self, multiworld: MultiWorld) -> None:
+        locations = list(multiworld.get_locations())
+        self.assertEqual([location for location in locations if location.item],
+                         multiworld.get_filled_locations())
+        self.assertEqual([location for location in locations if not location.item],
+                         multiworld.get_unfilled_locations())
+        for player in multiworld.player_ids:
+            self.assertEqual([location for location in multiworld.get_locations(player) if location.item],
+                             multiworld.get_filled_locations(player))
+            self.assertEqual([location for location in multiworld.get_locations(player) if not location.item],
+                             multiworld.get_unfilled_locations(player))
+        for item in [location.item for location in locations if location.item]:
+            self.assertEqual([location for location in locations
+                              if location.item and location.item.name == item.name and
+                              location.item.player == item.player],
+                             multiworld.find_item_locations(item.name, item.player))
+        self.assertEqual([location.item for location in locations if location.item] + multiworld.itempool,
+                         multiworld.get_items())
+
+    def test_indexes_match_scan(self) -> None:
+        """Tests that the filled, unfilled and Item indexes answer like scanning all Locations does."""
+        multiworld = generate_test_multiworld(2)
+        for player in multiworld.player_ids:
+            generate_locations(6, player, multiworld.get_region("Menu", player))
+        locations = list(multiworld.get_locations())
+        items = generate_items(4, 1, True) + generate_items(4, 2)
+        self.assert_matches_scan(multiworld)
+
+        for location, item in zip(reversed(locations), items):
+            multiworld.push_item(location, item, False)
+        self.assert_matches_scan(multiworld)
+
+        swap_location_item(locations[-1], locations[-5])
+        self.assert_matches_scan(multiworld)
+
+        locations[-2].item = None
+        locations[0].place_locked_item(items[1])
+        self.assert_matches_scan(multiworld)
+        self.assertIs(locations[0], multiworld.find_item(items[1].name, items[1].player))
+
+        # removing a Location takes it out of the indexes, adding it back puts it last
+        region = multiworld.get_region("Menu", 2)
+        region.locations.remove(locations[-1])
+        self.assert_matches_scan(multiworld)
+        region.locations.append(locations[-1])
+        self.assert_matches_scan(multiworld)
+        locations[-1].item = None
+        self.assert_matches_scan(multiworld)
@@ -0,0 +1,137 @@
+import functools
+import os
+import tempfile
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region
+from worlds.AutoWorld import AutoWorldRegister, ParallelOutput, World, call_all
+from . import setup_multiworld
+
+
+def has_key(player: int, state: CollectionState) -> bool:
+    return state.has("Key", player)
+
+
+class ParallelWorld(World):
+    game = "Parallel Test Game"
+    item_name_to_id = {"Key": 1, "Gem": 2}
+    location_name_to_id = {"Chest": 1, "Vault": 2}
+    hidden = True
+    parallel_generation = True
+    parallel_output = True
+    use_lambda_rule = False
+
+    def generate_early(self) -> None:
+        self.gem_count = self.random.randint(1, 5)
+
+    def create_regions(self) -> None:
+        menu = Region("Menu", self.player, self.multiworld)
+        vault = Region("Vault Room", self.player, self.multiworld)
+        menu.locations.append(Location(self.player, "Chest", 1, menu))
+        vault.locations.append(Location(self.player, "Vault", 2, vault))
+        self.multiworld.regions += [menu, vault]
+        menu.connect(vault)
+
+    def create_item(self, name: str) -> Item:
+        return Item(name, ItemClassification.progression, self.item_name_to_id[name], self.player)
+
+    def create_items(self) -> None:
+        self.multiworld.itempool += [self.create_item("Key")] + [self.create_item("Gem") for _ in range(self.gem_count)]
+
+    def set_rules(self) -> None:
+        entrance = self.get_entrance("Menu -> Vault Room")
+        if self.use_lambda_rule:
+            entrance.access_rule = lambda state: state.has("Key", self.player)
+        else:
+            entrance.access_rule = functools.partial(has_key, self.player)
+        self.multiworld.completion_condition[self.player] = functools.partial(has_key, self.player)
+
+    def generate_output(self, output_directory: str) -> None:
+        with open(os.path.join(output_directory, f"{self.player}.txt"), "w") as f:
+            f.write(f"{self.gem_count} {self.random.random()} {os.getpid()}")
+
+
+class LambdaWorld(ParallelWorld):
+    game = "Parallel Lambda Test Game"
+    item_name_to_id = ParallelWorld.item_name_to_id
+    location_name_to_id = ParallelWorld.location_name_to_id
+    use_lambda_rule = True
+
+
+# only registered while these tests run, so the tests going through all registered worlds don't pick them up
+test_worlds = [AutoWorldRegister.world_types.pop(world_type.game) for world_type in (ParallelWorld, LambdaWorld)]
+
+
+class TestParallelGeneration(unittest.TestCase):
+    steps = ("generate_early", "create_regions", "create_items", "set_rules")
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        for world_type in test_worlds:
+            AutoWorldRegister.world_types[world_type.game] = world_type
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        for world_type in test_worlds:
+            del AutoWorldRegister.world_types[world_type.game]
+
+    def generate(self, processes: int):
+        multiworld = setup_multiworld([ParallelWorld, LambdaWorld, ParallelWorld], (), seed=1)
+        multiworld.generation_processes = processes
+        for step in self.steps:
+            call_all(multiworld, step)
+        return multiworld
+
+    def test_same_result_as_in_order(self) -> None:
+        """Running the stages in worker processes gives the same result as running them in order."""
+        in_order = self.generate(0)
+        with self.assertLogs("performance", "INFO") as logs:
+            parallel = self.generate(2)
+        self.assertIn("for 3 players ran in 2 worker processes", logs.output[0])
+        # the lambda rule of player 2 can't be pickled, so its set_rules runs in the main process
+        self.assertIn("for 2 players ran in 2 worker processes", logs.output[-1])
+        self.assertEqual([(item.name, item.player) for item in in_order.itempool],
+                         [(item.name, item.player) for item in parallel.itempool])
+        for player in parallel.player_ids:
+            with self.subTest(player=player):
+                world = parallel.worlds[player]
+                self.assertEqual(in_order.worlds[player].gem_count, world.gem_count)
+                self.assertIs(parallel, world.get_region("Menu").multiworld)
+                self.assertIs(world.get_region("Vault Room"), world.get_location("Vault").parent_region)
+                # the Locations shipped back are indexed by the main process
+                self.assertEqual(list(parallel.get_locations(player)), parallel.get_unfilled_locations(player))
+                key = world.create_item("Key")
+                parallel.push_item(world.get_location("Chest"), key, False)
+                self.assertEqual([world.get_location("Chest")], parallel.get_filled_locations(player))
+                self.assertIs(world.get_location("Chest"), parallel.find_item("Key", player))
+
+    def test_rules_work_after_merge(self) -> None:
+        """Rules shipped back from a worker process check the state of the main process."""
+        multiworld = self.generate(2)
+        vault = multiworld.get_location("Vault", 3)
+        self.assertFalse(vault.can_reach(multiworld.state))
+        key = next(item for item in multiworld.itempool if item.player == 3 and item.name == "Key")
+        multiworld.state.collect(key, True)
+        self.assertTrue(vault.can_reach(multiworld.state))
+        self.assertTrue(multiworld.has_beaten_game(multiworld.state, 3))
+
+    def test_output(self) -> None:
+        """Output written in worker processes is the same as output written here."""
+        outputs = []
+        for processes in (0, 2):
+            multiworld = self.generate(processes)
+            with tempfile.TemporaryDirectory() as directory:
+                with ParallelOutput(multiworld, multiworld.player_ids, directory) as parallel_output:
+                    for player in multiworld.player_ids:
+                        if player in parallel_output.players:
+                            parallel_output.wait(player)
+                        else:
+                            multiworld.worlds[player].generate_output(parallel_output.get_output_directory(player))
+                output = {}
+                for player in multiworld.player_ids:
+                    with open(os.path.join(directory, str(player), f"{player}.txt")) as f:
+                        *content, pid = f.read().split()
+                    output[player] = content
+                    self.assertEqual(processes > 1, int(pid) != os.getpid())
+            outputs.append(output)
+        self.assertEqual(outputs[0], outputs[1])
@@ -1,11 +1,155 @@
-﻿import unittest
+﻿import os
+import tempfile
+import unittest
+import zipfile
+
+import bsdiff4
+
+from worlds import load_all_worlds
 from worlds.AutoWorld import AutoWorldRegister
-from worlds.Files import AutoPatchRegister
+from worlds.Files import (APDeltaPatch, APPatchExtension, APProcedurePatch, APTokenMixin, APTokenTypes,
+                          AutoPatchRegister, DeltaDiffService, OutputArchive, write_output_file)
 
 
 class TestPatches(unittest.TestCase):
     def test_patch_name_matches_game(self) -> None:
+        load_all_worlds()  # patch types are registered when their world is imported
         for game_name in AutoPatchRegister.patch_types:
             with self.subTest(game=game_name):
                 self.assertIn(game_name, AutoWorldRegister.world_types.keys(),
                               f"Patch '{game_name}' does not match the name of any world.")
+
+
+class TokenPatch(APProcedurePatch, APTokenMixin):
+    hash = "0123456789abcdef"
+    procedure = [("apply_tokens", ["token_data.bin"])]
+    result_file_ending = ".bin"
+
+    @classmethod
+    def get_source_data(cls) -> bytes:
+        return bytes(range(256)) * 4
+
+
+class DeltaPatch(APDeltaPatch):
+    hash = "0123456789abcdef"
+    result_file_ending = ".bin"
+    parallel_diff = True
+
+    @classmethod
+    def get_source_data(cls) -> bytes:
+        return bytes(range(256)) * 4
+
+
+class TestProcedurePatch(unittest.TestCase):
+    def test_tokens(self) -> None:
+        """Tokens are applied in order, from a container on disk and from one in memory."""
+        patch = TokenPatch(player=1, player_name="Player1")
+        patch.write_token(APTokenTypes.WRITE, 0, b"\xaa\xbb\xcc")
+        patch.write_token(APTokenTypes.COPY, 8, (4, 1))
+        patch.write_token(APTokenTypes.RLE, 16, (5, 0x11))
+        patch.write_token(APTokenTypes.AND_8, 32, 0x0F)
+        patch.write_token(APTokenTypes.OR_8, 33, 0xF0)
+        patch.write_token(APTokenTypes.XOR_8, 34, 0xFF)
+        patch.write_file("token_data.bin", patch.get_token_binary())
+        expected = bytearray(TokenPatch.get_source_data())
+        expected[0:3] = b"\xaa\xbb\xcc"
+        expected[8:12] = expected[1:5]
+        expected[16:21] = b"\x11" * 5
+        expected[32] &= 0x0F
+        expected[33] |= 0xF0
+        expected[34] ^= 0xFF
+
+        with tempfile.TemporaryDirectory() as directory:
+            patch.path = os.path.join(directory, "test.aptoken")
+            patch.write()
+            from_disk = TokenPatch(patch.path)
+            from_disk.read()
+            self.assertEqual({}, from_disk.files, "files of a container on disk should be read when used")
+            target = os.path.join(directory, "result.bin")
+            from_disk.patch(target)
+            with open(target, "rb") as f:
+                self.assertEqual(expected, f.read())
+
+        in_memory = TokenPatch()
+        in_memory.write_file("token_data.bin", patch.get_token_binary())
+        self.assertEqual(expected, APPatchExtension.apply_tokens(in_memory, TokenPatch.get_source_data(),
+                                                                 "token_data.bin"))
+
+    def test_delta_patch(self) -> None:
+        """A delta patch written from a patched file recreates it, also from data a previous step made mutable."""
+        patched = bytearray(DeltaPatch.get_source_data())
+        patched[100:110] = b"patched..."
+        with tempfile.TemporaryDirectory() as directory:
+            patched_path = os.path.join(directory, "patched.bin")
+            with open(patched_path, "wb") as f:
+                f.write(patched)
+            patch = DeltaPatch(os.path.join(directory, "1.apdelta"), player=1, player_name="Player1",
+                               patched_path=patched_path)
+            patch.write()
+
+            target = os.path.join(directory, "result.bin")
+            DeltaPatch(patch.path).patch(target)
+            with open(target, "rb") as f:
+                self.assertEqual(patched, f.read())
+
+        in_memory = DeltaPatch()
+        in_memory.write_file("delta.bsdiff4", bsdiff4.diff(DeltaPatch.get_source_data(), bytes(patched)))
+        self.assertEqual(patched, APPatchExtension.apply_bsdiff4(
+            in_memory, bytearray(DeltaPatch.get_source_data()), "delta.bsdiff4"))
+
+    def test_diff_service(self) -> None:
+        """Delta patches created through worker processes apply to the patched file, and their time is kept."""
+        with tempfile.TemporaryDirectory() as directory:
+            patched = bytearray(DeltaPatch.get_source_data())
+            patched[100:110] = b"patched..."
+            patched_path = os.path.join(directory, "patched.bin")
+            with open(patched_path, "wb") as f:
+                f.write(patched)
+            with DeltaDiffService(2) as service:
+                for player in (1, 2):
+                    patch = DeltaPatch(os.path.join(directory, f"{player}.apdelta"), player=player,
+                                       player_name=f"Player{player}", patched_path=patched_path)
+                    patch.write()
+            self.assertEqual({"DeltaPatch": 2}, service.counts)
+
+            target = os.path.join(directory, "result.bin")
+            DeltaPatch(os.path.join(directory, "2.apdelta")).patch(target)
+            with open(target, "rb") as f:
+                self.assertEqual(patched, f.read())
+
+
+class TestOutputArchive(unittest.TestCase):
+    def test_output_archive(self) -> None:
+        """Files go into the archive without a second compression of containers, and nothing stays on disk."""
+        with tempfile.TemporaryDirectory() as directory:
+            output_directory = os.path.join(directory, "output")
+            player_directory = os.path.join(output_directory, "1")
+            os.makedirs(player_directory)
+            archive_path = os.path.join(directory, "output.zip")
+            with OutputArchive(archive_path, output_directory) as archive:
+                patch = TokenPatch(os.path.join(player_directory, "1.aptoken"), player=1, player_name="Player1")
+                patch.write_file("token_data.bin", patch.get_token_binary())
+                patch.write()
+                write_output_file(player_directory, "1.txt", b"text" * 100)
+                with open(os.path.join(player_directory, "2.txt"), "wb") as f:
+                    f.write(b"more text")
+                archive.add_directory(player_directory)
+                self.assertEqual([], os.listdir(player_directory))
+
+            with zipfile.ZipFile(archive_path) as zf:
+                self.assertEqual({"1.aptoken": zipfile.ZIP_STORED, "1.txt": zipfile.ZIP_DEFLATED,
+                                  "2.txt": zipfile.ZIP_DEFLATED},
+                                 {info.filename: info.compress_type for info in zf.infolist()})
+                self.assertEqual(b"more text", zf.read("2.txt"))
+            # not written into an archive anymore
+            write_output_file(player_directory, "3.txt", b"")
+            self.assertEqual(["3.txt"], os.listdir(player_directory))
+
+    def test_failed_output(self) -> None:
+        """An archive of output that failed is removed."""
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, "output.zip")
+            with self.assertRaises(ValueError), OutputArchive(archive_path, directory) as archive:
+                archive.write_file("1.txt", b"text")
+                raise ValueError()
+            self.assertFalse(os.path.exists(archive_path))
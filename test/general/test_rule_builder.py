@@ -0,0 +1,137 @@
+import itertools
+import pickle
+import unittest
+
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, Location, MultiWorld, Region
+from rule_builder import (And, CanReachRegion, Count, False_, Has, HasAll, HasAny, HasGroup, Or, Rule, True_,
+                          get_rule)
+from worlds.generic.Rules import add_rule, set_rule
+from . import generate_test_multiworld
+
+
+class TestRuleBuilder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.multiworld.worlds[1].item_name_groups = {"Keys": {"Small Key", "Big Key"}}
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.multiworld.regions.append(self.cave)
+        self.multiworld.get_region("Menu", 1).connect(self.cave, rule=Has("Lamp", 1))
+
+    def create_item(self, name: str) -> Item:
+        return Item(name, ItemClassification.progression, None, 1)
+
+    def get_states(self):
+        names = ("Lamp", "Small Key", "Big Key")
+        for count in range(len(names) + 1):
+            for collected in itertools.combinations_with_replacement(names, count):
+                state = CollectionState(self.multiworld)
+                for name in collected:
+                    state.collect(self.create_item(name), True)
+                yield collected, state
+
+    def test_matches_state_methods(self) -> None:
+        """Rules and their compiled functions give the same results as the CollectionState methods."""
+        rules = [
+            (Has("Small Key", 1, 2), lambda state: state.has("Small Key", 1, 2)),
+            (HasAll(("Lamp", "Big Key"), 1), lambda state: state.has_all(("Lamp", "Big Key"), 1)),
+            (HasAny(("Lamp", "Big Key"), 1), lambda state: state.has_any(("Lamp", "Big Key"), 1)),
+            (HasGroup("Keys", 1, 2), lambda state: state.has_group("Keys", 1, 2)),
+            (CanReachRegion("Cave", 1), lambda state: state.can_reach_region("Cave", 1)),
+            (And(Has("Lamp", 1), Has("Small Key", 1), CanReachRegion("Cave", 1)),
+             lambda state: state.has_all(("Lamp", "Small Key"), 1)),
+            (Or(Has("Lamp", 1), Has("Big Key", 1), Has("Small Key", 1, 3)),
+             lambda state: state.has_any(("Lamp", "Big Key"), 1) or state.has("Small Key", 1, 3)),
+            (Count(2, Has("Lamp", 1), Has("Big Key", 1), Has("Small Key", 1)),
+             lambda state: state.has_from_list_unique(("Lamp", "Big Key", "Small Key"), 1, 2)),
+        ]
+        for collected, state in self.get_states():
+            for rule, expected in rules:
+                with self.subTest(rule=rule, collected=collected):
+                    self.assertEqual(expected(state), rule(state))
+                    self.assertEqual(expected(state), rule.compile()(state))
+                    self.assertEqual(expected(state), rule.simplify()(state))
+
+    def test_simplify(self) -> None:
+        """simplify flattens, merges item checks of a player and drops rules that can't change the result."""
+        lamp, key = Has("Lamp", 1), Has("Small Key", 1)
+        region = CanReachRegion("Cave", 1)
+        self.assertEqual(And(HasAll(("Lamp", "Small Key"), 1), region),
+                         And(region, And(lamp, True_()), key).simplify())
+        self.assertEqual(False_(), And(lamp, False_()).simplify())
+        self.assertEqual(And(lamp, Has("Small Key", 1, 3)), And(key, lamp, Has("Small Key", 1, 3)).simplify())
+        self.assertEqual(Or(HasAny(("Small Key", "Lamp"), 1), region),
+                         Or(region, key, Or(lamp, False_()), Has("Lamp", 1, 2)).simplify())
+        self.assertEqual(True_(), Or(region, True_()).simplify())
+        self.assertEqual(HasAll(("Lamp", "Small Key"), 1), Count(2, lamp, key).simplify())
+        self.assertEqual(region, Count(2, True_(), False_(), region).simplify())
+        self.assertEqual(False_(), Count(2, False_(), region).simplify())
+        self.assertEqual(Count(2, lamp, key, region), Count(2, region, lamp, key).simplify())
+        self.assertEqual(True_(), HasAll((), 1).simplify())
+        self.assertEqual(lamp, (lamp & True_()))
+        self.assertEqual(HasAny(("Lamp", "Small Key"), 1), lamp | key)
+
+    def test_dependencies(self) -> None:
+        """Rules report the item names and Regions they read."""
+        rule = Or(And(Has("Lamp", 1), CanReachRegion("Cave", 1)), HasGroup("Keys", 1), Has("Sword", 2))
+        self.assertEqual({1: {"Lamp", "Small Key", "Big Key"}, 2: {"Sword"}},
+                         rule.get_item_dependencies(self.multiworld))
+        self.assertEqual({1: {"Cave"}}, rule.get_region_dependencies())
+
+    def test_add_rule_merges(self) -> None:
+        """add_rule combines rule objects into one flat rule and everything else into a function."""
+        location = Location(1, "Chest", None, self.cave)
+        add_rule(location, Has("Lamp", 1))
+        add_rule(location, CanReachRegion("Cave", 1))
+        add_rule(location, Has("Small Key", 1))
+        self.assertNotIsInstance(location.access_rule, Rule)
+        self.assertEqual(And(HasAll(("Small Key", "Lamp"), 1), CanReachRegion("Cave", 1)),
+                         get_rule(location.access_rule))
+        add_rule(location, lambda state: state.has("Big Key", 1))
+        state = CollectionState(self.multiworld)
+        for name in ("Lamp", "Small Key"):
+            state.collect(self.create_item(name), True)
+        self.assertFalse(location.access_rule(state))
+        state.collect(self.create_item("Big Key"), True)
+        self.assertTrue(location.access_rule(state))
+
+        entrance = Entrance(1, "Door", self.cave)
+        add_rule(entrance, Has("Lamp", 1), "or")
+        self.assertIs(Entrance.access_rule, entrance.access_rule)
+        entrance.access_rule = Has("Lamp", 1)
+        add_rule(entrance, Has("Big Key", 1), "or")
+        self.assertEqual(HasAny(("Big Key", "Lamp"), 1), get_rule(entrance.access_rule))
+
+    def test_compiled(self) -> None:
+        """set_rule and Region.connect assign the compiled function of a rule, which keeps the rule."""
+        location = Location(1, "Chest", None, self.cave)
+        set_rule(location, HasGroup("Keys", 1, 2))
+        entrance = self.multiworld.get_entrance("Menu -> Cave", 1)
+        for spot, rule in ((location, HasGroup("Keys", 1, 2)), (entrance, Has("Lamp", 1))):
+            with self.subTest(spot=spot):
+                self.assertNotIsInstance(spot.access_rule, Rule)
+                self.assertEqual(rule, get_rule(spot.access_rule))
+        self.assertIsNone(get_rule(lambda state: True))
+
+    def test_pickle(self) -> None:
+        """Rules survive pickling, which is needed to ship them from worker processes."""
+        rule = Count(2, Has("Lamp", 1), HasAll(("Small Key", "Big Key"), 1), Or(CanReachRegion("Cave", 1), False_()))
+        unpickled = pickle.loads(pickle.dumps(rule))
+        self.assertEqual(rule, unpickled)
+        for collected, state in self.get_states():
+            with self.subTest(collected=collected):
+                self.assertEqual(rule(state), unpickled(state))
+
+    def test_incremental_reachability(self) -> None:
+        """Rule objects are traced like any other rule by incremental reachability."""
+        MultiWorld.debug_incremental_reachability = True
+        try:
+            self.multiworld.worlds[1].incremental_reachability = True
+            state = CollectionState(self.multiworld)
+            self.assertTrue(state.uses_incremental_reachability(1))
+            self.assertFalse(state.can_reach(self.cave))
+            state.collect(self.create_item("Small Key"), True)
+            self.assertFalse(state.can_reach(self.cave))
+            state.collect(self.create_item("Lamp"), True)
+            self.assertTrue(state.can_reach(self.cave))
+        finally:
+            MultiWorld.debug_incremental_reachability = False
@@ -0,0 +1,75 @@
+import json
+import threading
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region
+from rule_builder import Has
+from rule_profiler import RuleProfiler, get_rule_name
+from . import generate_test_multiworld
+
+
+class TestRuleProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.multiworld.regions.append(self.cave)
+        self.multiworld.get_region("Menu", 1).connect(self.cave, "Cave Entrance", Has("Lamp", 1))
+        self.chest = Location(1, "Chest", None, self.multiworld.get_region("Menu", 1))
+        self.chest.access_rule = lambda state: state.can_reach_entrance("Cave Entrance", 1)
+        self.multiworld.get_region("Menu", 1).locations.append(self.chest)
+
+    def test_records_nested_rules(self) -> None:
+        """Rules evaluated while evaluating another rule are attributed to both, with self time in the stacks."""
+        profiler = RuleProfiler()
+        profiler.install(self.multiworld)
+        self.multiworld.set_rule_profile_stage("test stage")
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.chest.can_reach(state))
+        state.collect(Item("Lamp", ItemClassification.progression, None, 1), True)
+        self.assertTrue(self.chest.can_reach(state))
+
+        world = "Tester1 (Test Game)"
+        chest_rule = f"access_rule {get_rule_name(self.chest.access_rule.__wrapped__)}"
+        entrance_rule = "access_rule Has('Lamp', 1, 1)"
+        report = json.loads(profiler.get_files("test")["test_Rule_Profile.json"])
+        calls = {(entry["world"], entry["rule"]): entry["calls"] for entry in report["rules"]
+                 if entry["stage"] == "test stage"}
+        self.assertEqual(2, calls[world, chest_rule])
+        # also evaluated when the reachable Regions are updated
+        self.assertGreater(calls[world, entrance_rule], 2)
+        self.assertEqual({f"{world}: access_rule of Chest", f"{world}: access_rule of Cave Entrance"},
+                         {f"{entry['world']}: {entry['spot']}" for entry in report["spots"]})
+        stacks = [line.rsplit(" ", 1)[0] for line in profiler.get_folded().splitlines()]
+        self.assertIn(f"test stage;{world};{chest_rule};{world};{entrance_rule}", stacks)
+
+    def test_default_rules_untouched(self) -> None:
+        """Only rules that were set are wrapped."""
+        location = Location(1, "Ground", None, self.cave)
+        self.cave.locations.append(location)
+        RuleProfiler().install(self.multiworld)
+        self.assertIs(Location.access_rule, location.access_rule)
+        self.assertIs(Location.item_rule, location.item_rule)
+        self.assertTrue(hasattr(self.chest.access_rule, "__wrapped__"))
+
+    def test_threads(self) -> None:
+        """Rules evaluated by several threads at once are attributed to the stack of their own thread."""
+        profiler = RuleProfiler()
+        # both threads are inside the inner rule at the same time
+        barrier = threading.Barrier(2, timeout=10)
+        inner = profiler.wrap(lambda: barrier.wait() >= 0, "World", "inner", "Inner")
+        outer = {kind: profiler.wrap(lambda: inner(), "World", kind, kind) for kind in ("first", "second")}
+        threads = [threading.Thread(target=rule) for rule in outer.values()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        inner_name = f"inner {get_rule_name(inner.__wrapped__)}"
+        expected = set()
+        for kind, rule in outer.items():
+            outer_stack = ("before fill", "World", f"{kind} {get_rule_name(rule.__wrapped__)}")
+            expected |= {outer_stack, (*outer_stack, "World", inner_name)}
+        self.assertEqual(expected, set(profiler.stacks))
+        for stack, taken in profiler.stacks.items():
+            with self.subTest(stack=stack):
+                self.assertGreaterEqual(taken, 0.)
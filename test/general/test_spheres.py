@@ -0,0 +1,64 @@
+import unittest
+from typing import List, Set
+
+from BaseClasses import CollectionState, Location, MultiWorld
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+def naive_spheres(multiworld: MultiWorld) -> List[Set[Location]]:
+    """Re-tests every remaining location each sphere, like get_spheres did before the spheres were cached."""
+    state = CollectionState(multiworld)
+    locations = set(multiworld.get_filled_locations())
+    spheres: List[Set[Location]] = []
+    while locations:
+        sphere = {location for location in locations if location.can_reach(state)}
+        spheres.append(sphere)
+        if not sphere:
+            spheres.append(locations)
+            break
+        for location in sphere:
+            state.collect(location.item, True, location)
+        locations -= sphere
+    return spheres
+
+
+class TestSpheres(unittest.TestCase):
+    games = ("Clique", "ChecksFinder", "Hollow Knight")
+
+    def setUp(self) -> None:
+        self.multiworld = setup_multiworld([AutoWorldRegister.world_types[game] for game in self.games], seed=1)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_matches_naive_sweep(self) -> None:
+        """The single sweep finds the same spheres as re-testing every location each sphere."""
+        self.assertEqual(naive_spheres(self.multiworld), list(self.multiworld.get_spheres()))
+
+    def test_cache(self) -> None:
+        """Answers from the cached spheres equal the ones computed on the fly."""
+        spheres = list(self.multiworld.get_spheres())
+        sendable_spheres = list(self.multiworld.get_sendable_spheres())
+        fulfilled = self.multiworld.fulfills_accessibility()
+        self.assertTrue(fulfilled)
+
+        cache = self.multiworld.cache_spheres()
+        self.assertIs(cache, self.multiworld.sphere_cache)
+        self.assertEqual(spheres, list(self.multiworld.get_spheres()))
+        self.assertEqual(sendable_spheres, list(self.multiworld.get_sendable_spheres()))
+        self.assertEqual(fulfilled, self.multiworld.fulfills_accessibility())
+        for number, sphere in enumerate(cache.spheres):
+            for location in sphere:
+                self.assertEqual(number, cache.sphere_of[location])
+
+    def test_unreachable(self) -> None:
+        """Locations holding items that can't be collected are reported after an empty sphere."""
+        victory = self.multiworld.get_location("The Big Red Button", 1)
+        victory.access_rule = lambda state: False
+        self.multiworld.cache_spheres()
+        spheres = list(self.multiworld.get_spheres())
+        self.assertEqual(set(), spheres[-2])
+        self.assertIn(victory, spheres[-1])
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(self.multiworld.fulfills_accessibility())
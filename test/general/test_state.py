@@ -1,7 +1,10 @@
+import pickle
 import unittest
+from collections import Counter
 
+from BaseClasses import CollectionState, CopyOnWriteDict, IndexedCounter, Item, ItemClassification, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +30,145 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, True))
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        for player in (1, 2):
+            menu = self.multiworld.get_region("Menu", player)
+            cave = Region("Cave", player, self.multiworld)
+            self.multiworld.regions.append(cave)
+            menu.connect(cave, rule=lambda state, player=player: state.has("Lamp", player))
+
+    def test_copy_shares_until_write(self) -> None:
+        """A copy only clones the data of a player once it is written to."""
+        state = CollectionState(self.multiworld)
+        copied = state.copy()
+        self.assertIs(state.prog_items.peek(1), copied.prog_items.peek(1))
+        copied.collect(Item("Lamp", ItemClassification.progression, None, 1), True)
+        self.assertIsNot(state.prog_items.peek(1), copied.prog_items.peek(1))
+        self.assertIs(state.prog_items.peek(2), copied.prog_items.peek(2))
+
+    def test_writes_do_not_leak(self) -> None:
+        """Items collected and regions reached in either copy are not visible in the other."""
+        cave = self.multiworld.get_region("Cave", 1)
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(cave))
+        copied = state.copy()
+        copied.collect(Item("Lamp", ItemClassification.progression, None, 1), True)
+        self.assertTrue(copied.can_reach(cave))
+        self.assertFalse(state.has("Lamp", 1))
+        self.assertFalse(state.can_reach(cave))
+
+        state.collect(Item("Lamp", ItemClassification.progression, None, 2), True)
+        self.assertTrue(state.can_reach(self.multiworld.get_region("Cave", 2)))
+        self.assertFalse(copied.can_reach(self.multiworld.get_region("Cave", 2)))
+
+    def test_lookup_clones(self) -> None:
+        """Looking up a shared container clones it into the looking dict, peek leaves it shared."""
+        state = CollectionState(self.multiworld)
+        copied = state.copy()
+        self.assertEqual(0, copied.prog_items.peek(1)["Lamp"])
+        self.assertIs(state.prog_items.peek(1), copied.prog_items.peek(1))
+        counter = copied.prog_items[1]
+        self.assertIs(counter, copied.prog_items[1])
+        self.assertIsNot(state.prog_items.peek(1), counter)
+        self.assertIs(state.prog_items.peek(2), copied.prog_items.peek(2))
+
+        counter["Lamp"] += 1
+        for player, counter in copied.prog_items.items():
+            counter["Sword"] += 1
+        copied.prog_items.get(2)["Shield"] += 1
+        for regions in copied.reachable_regions.values():
+            regions.add(self.multiworld.get_region("Cave", 1))
+        self.assertEqual(Counter(), state.prog_items[1])
+        self.assertEqual(Counter(), state.prog_items[2])
+        self.assertEqual(set(), state.reachable_regions[1] | state.reachable_regions[2])
+        self.assertEqual(Counter({"Lamp": 1, "Sword": 1}), copied.prog_items[1])
+        self.assertEqual(Counter({"Sword": 1, "Shield": 1}), copied.prog_items[2])
+
+    def test_dict_methods(self) -> None:
+        """The dict methods see shared and owned containers alike and keep shared ones shared."""
+        state = CollectionState(self.multiworld)
+        copied = state.copy()
+        copied.prog_items[1]["Lamp"] += 1
+        self.assertEqual([1, 2], list(copied.prog_items))
+        self.assertEqual(2, len(copied.prog_items.values()))
+        self.assertEqual({1: Counter({"Lamp": 1}), 2: Counter()}, copied.prog_items)
+        self.assertEqual(copied.prog_items, pickle.loads(pickle.dumps(copied.prog_items)))
+
+        merged = CopyOnWriteDict()
+        merged.update(copied.prog_items)
+        self.assertIs(copied.prog_items.peek(1), merged.peek(1))
+        merged[1]["Lamp"] += 1
+        self.assertEqual(1, copied.prog_items[1]["Lamp"])
+        self.assertEqual(Counter(), merged.pop(2))
+        self.assertNotIn(2, merged)
+        self.assertIn(2, copied.prog_items)
+
+    def test_plain_dict_assignment(self) -> None:
+        """Worlds replacing prog_items with a plain dict get a CopyOnWriteDict."""
+        state = CollectionState(self.multiworld)
+        state.prog_items = {1: Counter(), 2: Counter()}
+        self.assertIsInstance(state.prog_items, CopyOnWriteDict)
+        state.collect(Item("Lamp", ItemClassification.progression, None, 1), True)
+        self.assertTrue(state.can_reach(self.multiworld.get_region("Cave", 1)))
+        self.assertFalse(state.copy().can_reach(self.multiworld.get_region("Cave", 2)))
+
+
+class TestIndexedItemCounts(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.world.indexed_item_counts = True
+
+    def create_item(self, name: str) -> Item:
+        return Item(name, ItemClassification.progression, None, 1)
+
+    def test_index_matches_name(self) -> None:
+        """Counts read by index follow the counts read by name through collect, remove and copy."""
+        sword = self.world.get_item_index("Sword")
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.has_index(sword, 1))
+        state.collect(self.create_item("Sword"), True)
+        state.collect(self.create_item("Sword"), True)
+        shield = self.world.get_item_index("Shield")  # indices can still be added once states exist
+        self.assertEqual(2, state.count_index(sword, 1))
+        self.assertEqual(state.count("Sword", 1), state.count_index(sword, 1))
+        self.assertTrue(state.has_all_indices((sword,), 1))
+        self.assertFalse(state.has_all_indices((sword, shield), 1))
+        self.assertTrue(state.has_any_indices((sword, shield), 1))
+
+        copied = state.copy()
+        copied.remove(self.create_item("Sword"))
+        copied.remove(self.create_item("Sword"))
+        self.assertFalse(copied.has_index(sword, 1))
+        self.assertFalse(copied.has("Sword", 1))
+        self.assertTrue(state.has_index(sword, 1, 2))
+
+    def test_counter_update(self) -> None:
+        """Counts written through update, subtract and the constructor can be read by index."""
+        sword, shield = self.world.get_item_index("Sword"), self.world.get_item_index("Shield")
+        state = CollectionState(self.multiworld)
+        state.prog_items[1].update({"Sword": 2})
+        state.prog_items[1].update(["Shield"])
+        self.assertEqual(2, state.count_index(sword, 1))
+        self.assertEqual(1, state.count_index(shield, 1))
+        state.prog_items[1].subtract({"Sword": 1})
+        self.assertEqual(1, state.count_index(sword, 1))
+
+        counter = IndexedCounter({"Sword": 3})
+        self.assertEqual(3, counter.counts[counter.indices["Sword"]])
+
+    def test_incremental_reachability(self) -> None:
+        """Index reads are followed by incremental reachability, which treats them as untraceable."""
+        self.world.incremental_reachability = True
+        lamp = self.world.get_item_index("Lamp")
+        cave = Region("Cave", 1, self.multiworld)
+        self.multiworld.regions.append(cave)
+        self.multiworld.get_region("Menu", 1).connect(cave, rule=lambda state: state.has_index(lamp, 1))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(cave))
+        state.collect(self.create_item("Lamp"), True)
+        self.assertTrue(state.can_reach(cave))
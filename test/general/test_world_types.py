@@ -0,0 +1,23 @@
+import unittest
+from typing import List
+
+from worlds.AutoWorld import WorldTypes
+
+
+class FailingSource:
+    def load(self) -> bool:
+        return False
+
+
+class TestWorldTypes(unittest.TestCase):
+    def test_failed_load(self) -> None:
+        """A pending game whose source fails to load is dropped instead of staying listed."""
+        world_types = WorldTypes()
+        dropped: List[str] = []
+        world_types.on_pending_failed = dropped.append
+        world_types.add_pending("Broken Game", FailingSource())
+        self.assertIn("Broken Game", world_types)
+        with self.assertRaises(KeyError):
+            world_types["Broken Game"]
+        self.assertNotIn("Broken Game", world_types)
+        self.assertEqual(["Broken Game"], dropped)
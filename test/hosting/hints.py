@@ -0,0 +1,47 @@
+# Benchmark for checking locations and reading hints in a room with many hints.
+# Run with `python -m test.hosting.hints [hints] [checks]` from the Archipelago directory.
+import asyncio
+import logging
+import sys
+import time
+
+from test.hosting.release import create_multidata
+
+__all__ = [
+    "run_hints_benchmark",
+]
+
+
+def run_hints_benchmark(hints: int = 10_000, checks: int = 2_000, slots: int = 100) -> None:
+    from MultiServer import Context, register_location_checks
+    from Utils import init_logging
+
+    init_logging("Hints Benchmark")
+    logger = logging.getLogger("Benchmark")
+
+    async def check_all() -> None:
+        ctx = Context("", 0, "", "", 0, 0, False, logger=logging.getLogger("Server"))
+        ctx.logger.setLevel(logging.WARNING)  # every sent item is logged
+        locations_per_slot = max(hints, checks) // slots + 1
+        ctx._load(create_multidata(slots, locations_per_slot, hints=hints), {}, False)
+
+        start = time.perf_counter()
+        for check in range(checks):
+            # in the same order as the hints got created, so every check finds a hint while there are some
+            register_location_checks(ctx, 0, check % slots + 1, [check // slots + 1])
+            await asyncio.sleep(0)
+        checked = time.perf_counter()
+        for slot in ctx.slot_info:
+            ctx.read_data[f"hints_0_{slot}"]()
+        read = time.perf_counter()
+
+        found = len({hint for hints in ctx.hints.values() for hint in hints if hint.found})
+        logger.info(f"{checks} checks one at a time with {hints} hints in {checked - start:.4f} seconds, "
+                    f"{found} hints are found.")
+        logger.info(f"Reading the hints of {slots} slots took {read - checked:.4f} seconds.")
+
+    asyncio.run(check_all())
+
+
+if __name__ == "__main__":
+    run_hints_benchmark(*map(int, sys.argv[1:]))
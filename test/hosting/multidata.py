@@ -0,0 +1,52 @@
+# Benchmark for compressing and loading multidata with each codec.
+# Run with `python -m test.hosting.multidata [.archipelago files]` from the Archipelago directory.
+# Without files, multidata of 10, 50 and 200 slots is created like test.hosting.release does.
+import logging
+import sys
+import time
+from typing import Any, List, Mapping, Optional, Tuple
+
+from test.hosting.release import create_multidata
+
+__all__ = [
+    "run_multidata_benchmark",
+]
+
+codecs: List[Tuple[str, Optional[int]]] = [("zlib", 9), ("zlib", 6), ("zlib", 1), ("lzma", None), ("zstd", 3),
+                                           ("zstd", 19)]
+
+
+def run_multidata_benchmark(files: List[str]) -> None:
+    from Utils import MultiDataCodec, dump_multidata, init_logging, load_multidata
+
+    init_logging("Multidata Benchmark")
+    logger = logging.getLogger("Benchmark")
+
+    seeds: List[Tuple[str, Mapping[str, Any]]] = []
+    for file in files:
+        with open(file, "rb") as f:
+            seeds.append((file, dict(load_multidata(f.read()))))
+    if not seeds:
+        for slots in (10, 50, 200):
+            seeds.append((f"{slots} slots", create_multidata(slots, 500, hints=slots * 20)))
+
+    for name, multidata in seeds:
+        for codec_name, level in codecs:
+            codec = MultiDataCodec[codec_name.upper()]
+            try:
+                start = time.perf_counter()
+                data = dump_multidata(multidata, codec, level)
+            except ImportError as e:
+                logger.info(f"{name}, {codec_name} level {level}: skipped, {e}")
+                continue
+            dumped = time.perf_counter()
+            loaded = load_multidata(data)
+            for key in loaded:
+                loaded[key]
+            done = time.perf_counter()
+            logger.info(f"{name}, {codec_name} level {level}: {len(data) / 1024 / 1024:.2f} MiB, "
+                        f"compressed in {dumped - start:.4f} seconds, decompressed in {done - dumped:.4f} seconds.")
+
+
+if __name__ == "__main__":
+    run_multidata_benchmark(sys.argv[1:])
@@ -0,0 +1,126 @@
+# Benchmark for delivering items to clients when many slots release at once.
+# Run with `python -m test.hosting.release [slots] [locations per slot]` from the Archipelago directory.
+import asyncio
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List, Set
+
+__all__ = [
+    "create_multidata",
+    "run_release_benchmark",
+]
+
+game = "Release Benchmark"
+
+
+class CountingSocket:
+    """Stands in for a client's websocket, counting what the server sends."""
+    open = True
+    _fragmented_message_waiter = None
+
+    def __init__(self) -> None:
+        from websockets.protocol import State
+        self.state = State.OPEN
+        self.packets = 0
+        self.received_items_packets = 0
+        self.size = 0
+
+    async def send(self, msg: str) -> None:
+        self.packets += 1
+        self.received_items_packets += msg.count('"cmd":"ReceivedItems"')
+        self.size += len(msg)
+
+    def write_frame_sync(self, fin: bool, opcode: int, data: bytes) -> None:
+        """Called by websockets.broadcast"""
+        self.packets += 1
+        self.size += len(data)
+
+
+def create_multidata(slots: int, locations_per_slot: int, seed: int = 0, hints: int = 0) -> Dict[str, Any]:
+    """Returns decoded multidata of a single game where every location holds an item of a random slot.
+    The first 'hints' locations, going through the slots in turn, start out hinted."""
+    from NetUtils import Hint, NetworkSlot, SlotType
+    from Utils import version_tuple
+
+    rng = random.Random(seed)
+    location_ids = range(1, locations_per_slot + 1)
+    item_ids = range(1, 101)
+    locations = {slot: {location: (rng.choice(item_ids), rng.randint(1, slots), 0) for location in location_ids}
+                 for slot in range(1, slots + 1)}
+    precollected_hints: Dict[int, Set[Hint]] = {slot: set() for slot in range(1, slots + 1)}
+    for location in location_ids:
+        for slot in range(1, slots + 1):
+            if hints <= 0:
+                break
+            hints -= 1
+            item, receiving_slot, flags = locations[slot][location]
+            hint = Hint(receiving_slot, slot, location, item, False, "", flags)
+            precollected_hints[slot].add(hint)
+            precollected_hints[receiving_slot].add(hint)
+    return {
+        "version": tuple(version_tuple),
+        "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+        "slot_info": {slot: NetworkSlot(f"Player{slot}", game, SlotType.player) for slot in range(1, slots + 1)},
+        "connect_names": {f"Player{slot}": (0, slot) for slot in range(1, slots + 1)},
+        "locations": locations,
+        "slot_data": {},
+        "er_hint_data": {},
+        "precollected_items": {slot: [] for slot in range(1, slots + 1)},
+        "precollected_hints": precollected_hints,
+        "seed_name": "release benchmark",
+        "spheres": [],
+        "datapackage": {game: {
+            "item_name_to_id": {f"Item {item}": item for item in item_ids},
+            "location_name_to_id": {f"Location {location}": location for location in location_ids},
+            "item_name_groups": {},
+            "checksum": "release benchmark",
+        }},
+    }
+
+
+def run_release_benchmark(slots: int = 200, locations_per_slot: int = 100) -> None:
+    from MultiServer import Client, Context, release_player
+    from Utils import init_logging
+
+    init_logging("Release Benchmark")
+    logger = logging.getLogger("Benchmark")
+
+    async def release_all() -> None:
+        ctx = Context("", 0, "", "", 0, 0, False, logger=logging.getLogger("Server"))
+        ctx.logger.setLevel(logging.WARNING)  # every sent item is logged
+        ctx._load(create_multidata(slots, locations_per_slot), {}, False)
+        sockets: List[CountingSocket] = []
+        for slot in ctx.slot_info:
+            socket = CountingSocket()
+            client = Client(socket, ctx)  # type: ignore[arg-type]
+            client.auth = True
+            client.team, client.slot = 0, slot
+            client.remote_items = client.remote_start_inventory = True
+            client.no_items = client.no_locations = client.no_text = False
+            ctx.clients[0][slot].append(client)
+            ctx.endpoints.append(client)
+            sockets.append(socket)
+
+        start = time.perf_counter()
+        for slot in ctx.slot_info:
+            release_player(ctx, 0, slot)
+        released = time.perf_counter()
+        while len(asyncio.all_tasks()) > 1:
+            await asyncio.sleep(0)
+        sent = time.perf_counter()
+
+        logger.info(f"{slots} slots with {locations_per_slot} locations each released in {released - start:.4f} "
+                    f"seconds, packets sent after another {sent - released:.4f} seconds.")
+        logger.info(f"{sum(socket.received_items_packets for socket in sockets)} ReceivedItems in "
+                    f"{sum(socket.packets for socket in sockets)} packets, "
+                    f"{sum(socket.size for socket in sockets) / 1024 / 1024:.2f} MiB total.")
+        for cmd, seconds in ctx.encode_times.most_common():
+            logger.info(f"  {seconds:.4f} seconds encoding {ctx.encode_counts[cmd]} {cmd}")
+
+    asyncio.run(release_all())
+
+
+if __name__ == "__main__":
+    run_release_benchmark(*map(int, sys.argv[1:]))
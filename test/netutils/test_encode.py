@@ -0,0 +1,27 @@
+import unittest
+from unittest import mock
+
+import NetUtils
+from NetUtils import ClientStatus, Hint, HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode, encode
+
+
+class TestEncode(unittest.TestCase):
+    msgs = [
+        {"cmd": "PrintJSON", "data": [{"text": 1, "type": "player_id"}, {"text": " sent \"é☃\"\n"}],
+         "type": "ItemSend", "receiving": 2, "item": NetworkItem(1, 2, 1, 0b101)},
+        {"cmd": "SetReply", "key": "_read_hints_0_1", "value": {Hint(1, 2, 3, 4, False, "", 0, HintStatus.HINT_FOUND)}},
+        {"cmd": "RoomUpdate", "players": [NetworkPlayer(0, 1, "Alias", "Player1")], "hint_points": 1.5,
+         "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player, [2, 3])},
+         "client_status": {1: ClientStatus.CLIENT_GOAL}, "checked_locations": frozenset((1,)), "password": None},
+        {"cmd": "Bounced", "data": {"time": 2 ** 80, "nested": (1, [2, (3,)])}},
+        {"cmd": "SetReply", "key": "ratios", "value": [float("nan"), {"max": float("inf")}, -float("inf"), None]},
+    ]
+
+    def test_backends_match(self) -> None:
+        """The orjson backend encodes to the same text as the json module."""
+        for msg in self.msgs:
+            with self.subTest(cmd=msg["cmd"]):
+                encoded = encode([msg])
+                with mock.patch.object(NetUtils, "orjson", None):
+                    self.assertEqual(encode([msg]), encoded)
+                self.assertEqual(msg["cmd"], decode(encoded)[0]["cmd"])
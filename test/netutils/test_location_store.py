@@ -170,6 +170,14 @@ class Base:
             locations.intersection_update(self.store[1])
             self.assertEqual(locations, {11, 12})
 
+        def test_buffer(self) -> None:
+            store = type(self.store).from_buffer(self.store.to_buffer())
+            self.assertEqual(len(store), 5)
+            for slot, locations in self.store.items():
+                self.assertEqual(dict(store[slot].items()), dict(locations.items()))
+            self.assertEqual(sorted(store.find_item({3, 4}, 99)), sorted(self.store.find_item({3, 4}, 99)))
+            self.assertEqual(store.get_remaining(one_state, 0, 1), self.store.get_remaining(one_state, 0, 1))
+
     class TestLocationStoreConstructor(unittest.TestCase):
         """Test constructors for a given store type."""
         type: type
@@ -232,6 +240,22 @@ class Base:
             self.assertEqual(len(store[1]), 0)
             self.assertEqual(len(store[2]), 1)
 
+        def test_invalid_buffer(self) -> None:
+            buffer = self.type(sample_data).to_buffer()
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(buffer[:-1])
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(b"\0" + buffer[1:])
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(b"")
+
+        def test_empty_buffer(self) -> None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                store = self.type.from_buffer(self.type({1: {}}).to_buffer())
+            self.assertEqual(len(store), 1)
+            self.assertEqual(len(store[1]), 0)
+
         def test_no_locations_for_last(self) -> None:
             store = self.type({
                 1: {1: (1, 2, 3)},
@@ -293,6 +317,10 @@ class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
                 1 << 32: {1: (1, 1, 1)},
             })
 
+    def test_buffer_compatible(self) -> None:
+        """Both implementations read each other's buffers."""
+        self.assertEqual(self.type(sample_data).to_buffer(), _LocationStore(sample_data).to_buffer())
+
     def test_not_a_tuple(self) -> None:
         with self.assertRaises(Exception):
             self.type({
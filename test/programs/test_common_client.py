@@ -104,3 +104,17 @@ class TestCommonContext(unittest.IsolatedAsyncioTestCase):
         assert self.ctx.item_names.lookup_in_slot(-1, 3) == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame1") == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+
+    async def test_data_package_file_lookups(self):
+        from Utils import DataPackageFile
+        self.ctx.update_game(DataPackageFile(DataPackageFile.dump({
+            "location_name_to_id": {"Test Location 4 - File": 2**54 + 4},
+            "item_name_to_id": {"Test Item 4 - File": 2**54 + 4, "Test Item 5 - File": 2**54 + 5},
+            "checksum": "file",
+        })), "__TestGame2")
+
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 5, "__TestGame2") == "Test Item 5 - File"
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 2, "__TestGame2") == f"Unknown item (ID: {2 ** 54 + 2})"
+        assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+        assert self.ctx.location_names.lookup_in_slot(2 ** 54 + 4, 3) == "Test Location 4 - File"
+        assert self.ctx.checksums["__TestGame2"] == "file"
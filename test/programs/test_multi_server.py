@@ -1,5 +1,22 @@
+# tests look at the private members of Context
+# pyright: reportPrivateUsage=false
+import asyncio
+import copy
+import os
+import tempfile
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from typing_extensions import override
+
+from MultiServer import (Client, Context, SaveJournal, ServerCommandProcessor, decode_save_journal, get_received_items,
+                         register_location_checks, replay_save_journal)
+from NetUtils import Hint, NetworkItem
+from Utils import dump_multidata, get_intended_text, load_multidata, restricted_loads
+from worlds import AutoWorldRegister, network_data_package
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +55,207 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestLoadMultidata(unittest.TestCase):
+    def test_sectioned_format(self) -> None:
+        """A multidata file converted to the sectioned format loads the same as the original."""
+        with (Path(__file__).parent.parent / "webhost" / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            data = f.read()
+        # Context takes the groups out of the global data package, so it can only be created from a fresh one
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        loaded: typing.List[typing.Tuple[object, ...]] = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name, contents in (("old", data), ("new", dump_multidata(load_multidata(data)))):
+                path = os.path.join(temp_dir, f"{name}.archipelago")
+                with open(path, "wb") as f:
+                    f.write(contents)
+                ctx.load(path)
+                race_mode = ctx.read_data["race_mode"]
+                assert callable(race_mode)
+                loaded.append((ctx.seed_name, ctx.slot_info, ctx.slot_data, dict(ctx.player_names),
+                               ctx.locations.to_buffer(), race_mode(), ctx.spheres))
+        self.assertEqual(loaded[0], loaded[1])
+
+
+class TestSaveJournal(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+            self.ctx = Context("", 0, "", "", 0, 0, False, journal_save=True)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.save_filename = self.ctx.save_filename = os.path.join(temp_dir.name, "test.apsave")
+        self.journal = self.ctx.save_journal = SaveJournal()
+        self.journal.compact_ratio = 100  # the empty save is tiny, so records would quickly compact
+        self.ctx.location_checks[0, 1] = set()
+        self.ctx.hints[0, 1] = set()
+        self.assertTrue(self.ctx._save())
+
+    def change(self, location: int) -> None:
+        self.ctx.location_checks[0, 1].add(location)
+        self.journal.add_location_checks(0, 1, {location})
+        self.ctx.received_items.setdefault((0, 1, True), []).append(NetworkItem(location, location, 1, 0))
+        self.ctx.hints[0, 1].add(Hint(1, 1, location, location, False))
+        self.ctx.stored_data[f"key{location}"] = location
+        self.journal.set_stored_data(f"key{location}", location)
+        self.ctx.client_game_state[0, 1] = location
+
+    def load(self) -> typing.Dict[str, typing.Any]:
+        with open(self.save_filename, "rb") as f:
+            save = restricted_loads(zlib.decompress(f.read()))
+        with open(self.save_filename + ".journal", "rb") as f:
+            return replay_save_journal(save, decode_save_journal(f.read()))
+
+    def test_replay(self) -> None:
+        """The full save with its journal replayed equals the save at the time of the last record."""
+        for location in range(1, 4):
+            self.change(location)
+            self.assertTrue(self.ctx._save())
+        self.assertEqual(self.ctx.get_save(), self.load())
+
+    def test_record_state_changes(self) -> None:
+        """Records only contain the keys that aren't journaled if they changed."""
+        self.change(1)
+        self.ctx._save()
+        self.ctx.name_aliases[0, 1] = "Alias"
+        self.ctx._save()
+        with open(self.save_filename + ".journal", "rb") as f:
+            first, second = decode_save_journal(f.read())
+        self.assertIn("client_game_state", first["state"])
+        self.assertEqual({"name_aliases"}, set(second["state"]))
+        self.assertEqual(self.ctx.get_save(), self.load())
+
+    def test_truncated_record(self) -> None:
+        """A record that was only partially written is ignored."""
+        self.change(1)
+        self.ctx._save()
+        expected = copy.deepcopy(self.ctx.get_save())
+        self.change(2)
+        self.ctx._save()
+        with open(self.save_filename + ".journal", "r+b") as f:
+            f.truncate(f.seek(0, os.SEEK_END) - 1)
+        self.assertEqual(expected, self.load())
+
+    def test_compaction(self) -> None:
+        """A full save starts a new generation, so records of an older generation are ignored."""
+        self.change(1)
+        self.ctx._save()
+        with open(self.save_filename + ".journal", "rb") as f:
+            old_journal = f.read()
+        self.change(2)
+        self.ctx._save(exit_save=True)
+        with open(self.save_filename + ".journal", "rb") as f:
+            self.assertEqual(b"", f.read())
+        with open(self.save_filename + ".journal", "wb") as f:
+            f.write(old_journal)
+        self.assertEqual(self.ctx.get_save(), self.load())
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    async def test_merged(self) -> None:
+        """Items received from checks in the same event loop iteration are sent to each client in one packet."""
+        from test.hosting.release import CountingSocket, create_multidata
+
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+            ctx = Context("", 0, "", "", 0, 0, False)
+            with mock.patch.object(ctx.logger, "info"):
+                ctx._load(create_multidata(3, 10), {}, False)
+        sockets: typing.Dict[int, CountingSocket] = {}
+        for slot in ctx.slot_info:
+            client = Client(sockets.setdefault(slot, CountingSocket()), ctx)  # type: ignore[arg-type]
+            client.team, client.slot = 0, slot
+            client.remote_items = client.remote_start_inventory = True
+            client.no_items = client.no_locations = client.no_text = False
+            ctx.clients[0][slot].append(client)
+
+        with mock.patch.object(ctx.logger, "info"):
+            for location in range(1, 11):
+                register_location_checks(ctx, 0, 1, [location])
+        while len(asyncio.all_tasks()) > 1:  # the flush happens in the next iteration, sending in the one after
+            await asyncio.sleep(0)
+        for slot, client in ((slot, clients[0]) for slot, clients in ctx.clients[0].items()):
+            received = get_received_items(ctx, 0, slot, True)
+            self.assertEqual(len(received), client.send_index)
+            self.assertEqual(1 if received else 0, sockets[slot].received_items_packets)
+
+
+class TestHintIndex(unittest.IsolatedAsyncioTestCase):
+    async def test_checks_update_hints(self) -> None:
+        """Checking locations updates the same hints as rechecking all of them, through the location index."""
+        from test.hosting.release import create_multidata
+
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+            ctx = Context("", 0, "", "", 0, 0, False)
+            with mock.patch.object(ctx.logger, "info"):
+                ctx._load(create_multidata(4, 20, hints=50), {}, False)
+        hint = ctx.get_hint(0, 2, 3)
+        assert hint
+        self.assertEqual((2, 3), (hint.finding_player, hint.location))
+        self.assertIsNone(ctx.get_hint(0, 2, 20))
+
+        with mock.patch.object(ctx.logger, "info"):
+            for slot, locations in ((1, range(1, 11)), (2, [3, 15]), (4, range(5, 21))):
+                register_location_checks(ctx, 0, slot, locations)
+        found_hint, unfound_hint = ctx.get_hint(0, 2, 3), ctx.get_hint(0, 3, 3)
+        assert found_hint and unfound_hint
+        self.assertTrue(found_hint.found)
+        self.assertFalse(unfound_hint.found)
+        hints = {key: set(slot_hints) for key, slot_hints in ctx.hints.items()}
+        hints_by_location = ctx.hints_by_location
+        ctx.recheck_hints()
+        ctx.index_hints()
+        self.assertEqual(hints, ctx.hints)
+        self.assertEqual(hints_by_location, ctx.hints_by_location)
+
+
+class TestSpheres(unittest.TestCase):
+    def test_sphere_queries(self) -> None:
+        """Spheres of locations are looked up from the index built on load."""
+        from test.hosting.release import create_multidata
+
+        multidata = create_multidata(2, 5)
+        multidata["spheres"] = [{1: {1, 2}, 2: {1}}, {1: {3}, 2: {2, 3}}, {2: {4}}]
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+            ctx = Context("", 0, "", "", 0, 0, False)
+            with mock.patch.object(ctx.logger, "info"):
+                ctx._load(multidata, {}, False)
+        self.assertEqual(0, ctx.get_sphere(2, 1))
+        self.assertEqual(2, ctx.get_sphere(2, 4))
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(1, 5)
+
+        ctx.location_checks[0, 1] = {1, 3, 5}
+        ctx.location_checks[0, 2] = {3}
+        self.assertEqual({1: 0, 3: 1}, ctx.get_checked_spheres(0, 1))
+        self.assertEqual([(1, 3), (2, 3), (0, 1)], ctx.get_sphere_completion(0))
+
+
+class TestNameIndices(unittest.TestCase):
+    def test_shared(self) -> None:
+        """Rooms of the same data package share name indices, which answer like the names they index."""
+        from test.hosting.release import create_multidata, game
+
+        contexts: typing.List[Context] = []
+        archipelago = AutoWorldRegister.world_types["Archipelago"]
+        for _ in range(2):
+            with mock.patch.dict(network_data_package, {"games": {"Archipelago": archipelago.get_data_package_data()}}):
+                ctx = Context("", 0, "", "", 0, 0, False)
+                with mock.patch.object(ctx.logger, "info"):
+                    ctx._load(create_multidata(2, 5), {}, False)
+            contexts.append(ctx)
+        index = contexts[0].get_name_index(game, "items")
+        self.assertIs(index, contexts[1].get_name_index(game, "items"))
+        self.assertIsNot(index, contexts[0].get_name_index(game, "items_and_groups"))
+        item_names = contexts[0].item_names_for_game(game)
+        assert item_names
+        self.assertEqual(set(item_names), set(index.names))
+        self.assertEqual(("Item 12", True, "Perfect Match"), get_intended_text("item 12", index))
+        with self.assertRaises(ValueError):
+            contexts[0].get_name_index(game, "players")
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import Utils
+from Utils import DataPackageFile, DataPackageNames, load_data_package_for_checksum, store_data_package_for_checksum
+
+
+class TestDataPackageFile(unittest.TestCase):
+    data = {
+        "item_name_to_id": {"Sword": 3, "Bow": 1, "Ünïcödé ✨": 2**53, "Arrows": -5},
+        "location_name_to_id": {"Chest": 10, "Boss": 7},
+        "item_name_groups": {"Weapons": ["Bow", "Sword"]},
+        "location_name_groups": {},
+        "checksum": "0123456789abcdef",
+    }
+
+    def test_round_trip(self) -> None:
+        """Every part of the data package reads back as it was dumped, names in their original order."""
+        loaded = DataPackageFile(DataPackageFile.dump(self.data))
+        self.assertEqual(self.data, dict(loaded))
+        self.assertEqual(list(self.data["item_name_to_id"]), list(loaded["item_name_to_id"]))
+        self.assertIsInstance(loaded["item_name_to_id"], DataPackageNames)
+
+    def test_lookups(self) -> None:
+        """Names and ids are looked up in both directions, missing ones raise KeyError."""
+        items = DataPackageFile(DataPackageFile.dump(self.data))["item_name_to_id"]
+        for name, code in self.data["item_name_to_id"].items():
+            self.assertEqual(code, items[name])
+            self.assertEqual(name, items.id_to_name[code])
+        self.assertNotIn("Shield", items)
+        self.assertNotIn(4, items.id_to_name)
+        with self.assertRaises(KeyError):
+            items.id_to_name[100]
+        empty = DataPackageFile(DataPackageFile.dump({"item_name_to_id": {}, "location_name_to_id": {}}))
+        self.assertNotIn("Sword", empty["item_name_to_id"])
+
+    def test_cache(self) -> None:
+        """Stored data packages are found by checksum and written only once."""
+        with tempfile.TemporaryDirectory() as folder, mock.patch.object(Utils.cache_path, "cached_path", folder):
+            self.assertEqual({}, dict(load_data_package_for_checksum("Test Game", self.data["checksum"])))
+            store_data_package_for_checksum("Test Game", self.data)
+            loaded = load_data_package_for_checksum("Test Game", self.data["checksum"])
+            self.assertIsInstance(loaded, DataPackageFile)
+            self.assertEqual(self.data, dict(loaded))
+
+            path = os.path.join(folder, "datapackage", "Test Game", f"{self.data['checksum']}.apdp")
+            modified = os.stat(path).st_mtime_ns
+            store_data_package_for_checksum("Test Game", self.data)
+            self.assertEqual(modified, os.stat(path).st_mtime_ns)
+            del loaded
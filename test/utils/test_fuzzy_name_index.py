@@ -0,0 +1,33 @@
+import unittest
+
+from Utils import FuzzyNameIndex, get_fuzzy_results, get_intended_text
+
+
+class TestFuzzyNameIndex(unittest.TestCase):
+    names = ["Progressive Sword", "Progressive Shield", "Progressive Bow", "Bow", "Silver Arrows", "Boss Key",
+             "Small Key (Eastern Palace)", "Small Key (Desert Palace)", "Big Key (Eastern Palace)", "sword",
+             "Magic Mirror", "Moon Pearl", "Ocarina", "Hookshot", "Fire Rod", "Ice Rod", "Bombos", "Ether", "Quake"]
+    inputs = ["progressive sword", "Sword", "swrod", "Small Key Eastern", "key", "Ice", "rod", "Moon Perl", "zzz", "",
+              "Progressive Sword Progressive Shield", "PEARL", "Quaek", "bo"]
+
+    def test_same_results(self) -> None:
+        """The index finds the same names in the same order as comparing with every name."""
+        index = FuzzyNameIndex(self.names)
+        for input_word in self.inputs:
+            for limit in (None, 1, 2, 3, len(self.names)):
+                with self.subTest(input_word=input_word, limit=limit):
+                    self.assertEqual(get_fuzzy_results(input_word, self.names, limit),
+                                     index.get_fuzzy_results(input_word, limit))
+
+    def test_intended_text(self) -> None:
+        """get_intended_text answers the same for the index as for the names."""
+        index = FuzzyNameIndex(self.names)
+        for input_word in self.inputs:
+            with self.subTest(input_word=input_word):
+                self.assertEqual(get_intended_text(input_word, self.names), get_intended_text(input_word, index))
+
+    def test_exact(self) -> None:
+        """Exact lookups ignore case and prefer the first of equal names."""
+        index = FuzzyNameIndex(["Sword", "sword", "Bow"])
+        self.assertEqual("Sword", index.get_exact("SWORD"))
+        self.assertIsNone(index.get_exact("Swords"))
@@ -0,0 +1,66 @@
+import pickle
+import sys
+import unittest
+import zlib
+from unittest import mock
+
+from Utils import (MultiData, MultiDataCodec, VersionException, dump_multidata, load_multidata,
+                   parse_multidata_compression)
+
+
+class TestMultiData(unittest.TestCase):
+    multidata = {
+        "seed_name": "12345",
+        "locations": {1: {100: (200, 1, 0)}},
+        "slot_data": {1: {"option": [1, 2, 3]}},
+    }
+
+    def test_round_trip(self) -> None:
+        """Each section decodes back to the value that was dumped."""
+        loaded = load_multidata(dump_multidata(self.multidata))
+        self.assertIsInstance(loaded, MultiData)
+        self.assertEqual(list(self.multidata), list(loaded))
+        self.assertEqual(self.multidata, dict(loaded))
+
+    def test_lazy(self) -> None:
+        """Only sections that are accessed get decompressed, untouched ones are dumped as they were."""
+        loaded = load_multidata(dump_multidata(self.multidata))
+        self.assertIn("slot_data", loaded)
+        self.assertEqual("12345", loaded["seed_name"])
+        self.assertEqual({"seed_name"}, set(loaded._decoded))
+
+        loaded["seed_name"] = "67890"
+        self.assertEqual(self.multidata["locations"], loaded.pop("locations"))
+        dumped = load_multidata(loaded.dump())
+        self.assertEqual({"seed_name": "67890", "slot_data": self.multidata["slot_data"]}, dict(dumped))
+
+    def test_versions(self) -> None:
+        """Single blob multidata of format 3 still loads, newer formats are rejected."""
+        old = bytes([3]) + zlib.compress(pickle.dumps(self.multidata), 9)
+        self.assertEqual(self.multidata, load_multidata(old))
+        self.assertEqual(self.multidata, dict(load_multidata(dump_multidata(load_multidata(old)))))
+        with self.assertRaises(VersionException):
+            load_multidata(bytes([255]) + dump_multidata(self.multidata)[1:])
+
+    def test_codecs(self) -> None:
+        """Each codec round trips, and loaded multidata is recompressed for another codec without decoding it."""
+        for codec in (MultiDataCodec.ZLIB, MultiDataCodec.LZMA):
+            with self.subTest(codec=codec.name):
+                loaded = load_multidata(dump_multidata(self.multidata, codec, 1))
+                self.assertEqual(codec, loaded.codec)
+                self.assertEqual(self.multidata, dict(loaded))
+                loaded = load_multidata(dump_multidata(self.multidata, codec))
+                converted = load_multidata(loaded.dump(MultiDataCodec.ZLIB if codec != MultiDataCodec.ZLIB
+                                                       else MultiDataCodec.LZMA))
+                self.assertEqual({}, loaded._decoded)
+                self.assertEqual(self.multidata, dict(converted))
+
+    def test_parse_compression(self) -> None:
+        """The host.yaml setting is a codec name with an optional level."""
+        self.assertEqual((MultiDataCodec.ZLIB, 6), parse_multidata_compression("zlib:6"))
+        self.assertEqual((MultiDataCodec.LZMA, None), parse_multidata_compression("LZMA"))
+        for invalid in ("zlip", "zlib:high"):
+            with self.subTest(invalid=invalid), self.assertRaises(ValueError):
+                parse_multidata_compression(invalid)
+        with mock.patch.dict(sys.modules, {"zstandard": None}), self.assertLogs(level="WARNING"):
+            self.assertEqual((MultiDataCodec.ZLIB, None), parse_multidata_compression("zstd:3"))
@@ -58,6 +58,8 @@ class AutoSNIClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: SNIContext) -> Optional[SNIClient]:
+        from . import load_all_worlds
+        load_all_worlds()  # handlers are registered by their worlds
         for _game, handler in AutoSNIClientRegister.game_handlers.items():
             try:
                 if await handler.validate_rom(ctx):
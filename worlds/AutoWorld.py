@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import concurrent.futures
+import copy
 import hashlib
+import io
 import logging
+import multiprocessing
+import os
 import pathlib
+import pickle
 import sys
 import time
+from collections.abc import ItemsView, KeysView, ValuesView
 from random import Random
 from dataclasses import make_dataclass
-from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, TextIO, Tuple,
-                    TYPE_CHECKING, Type, Union)
+from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Protocol,
+                    Set, TextIO, Tuple, TYPE_CHECKING, Type, Union)
 
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
 from BaseClasses import CollectionState
@@ -21,8 +28,113 @@ if TYPE_CHECKING:
 perf_logger = logging.getLogger("performance")
 
 
+class _WorldLoader(Protocol):
+    def load(self) -> bool: ...
+
+
+class WorldTypes(Dict[str, Type["World"]]):
+    """
+    World classes by game. Games can be added as pending with the source that registers them when loaded,
+    which happens when the World class of one of them is first looked up.
+    Checking for a game or listing the games doesn't load anything, iterating the World classes loads all of them.
+    """
+    _games: Dict[str, Optional[_WorldLoader]]
+    """all games in order, with the source to load for pending ones"""
+    on_pending_registered: Optional[Callable[[str, Type[World]], None]]
+    """called when the World class of a pending game gets created"""
+    on_pending_failed: Optional[Callable[[str], None]]
+    """called when loading the source of a pending game didn't create its World class, the game is dropped"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._games = {}
+        self.on_pending_registered = None
+        self.on_pending_failed = None
+
+    def add_pending(self, game: str, source: _WorldLoader) -> None:
+        if game not in self._games:
+            self._games[game] = source
+
+    def is_registered(self, game: str) -> bool:
+        """Whether the World class of game has already been created, not just known from a source."""
+        return super().__contains__(game)
+
+    def get_registered(self) -> Dict[str, Type[World]]:
+        """The World classes created so far, without loading any."""
+        return dict(super().items())
+
+    def load(self, game: str) -> None:
+        source = self._games.get(game)
+        if source is not None:
+            source.load()
+            if self._games.get(game) is source:  # loading failed or the game is gone from the source
+                del self._games[game]
+                if self.on_pending_failed:
+                    self.on_pending_failed(game)
+
+    def load_all(self) -> None:
+        for game in list(self._games):
+            self.load(game)
+
+    def __getitem__(self, game: str) -> Type[World]:
+        self.load(game)
+        try:
+            return super().__getitem__(game)
+        except KeyError:
+            raise KeyError(f"No World for {game}, if it was installed, see failed_world_loads") from None
+
+    def get(self, game: str, default: Any = None) -> Any:
+        self.load(game)
+        return super().get(game, default)
+
+    def __setitem__(self, game: str, world: Type[World]) -> None:
+        pending = self._games.get(game) is not None
+        super().__setitem__(game, world)
+        self._games[game] = None
+        if pending and self.on_pending_registered:
+            self.on_pending_registered(game, world)
+
+    def __delitem__(self, game: str) -> None:
+        del self._games[game]
+        if super().__contains__(game):
+            super().__delitem__(game)
+
+    def pop(self, game: str, *default: Any) -> Any:
+        if game not in self._games and default:
+            return default[0]
+        world = self[game]
+        del self[game]
+        return world
+
+    def __contains__(self, game: object) -> bool:
+        return game in self._games
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._games))
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self._games)})"
+
+    def keys(self) -> KeysView[str]:  # type: ignore[override]
+        return KeysView(self)
+
+    def values(self) -> ValuesView[Type[World]]:  # type: ignore[override]
+        self.load_all()
+        return ValuesView(self)
+
+    def items(self) -> ItemsView[str, Type[World]]:  # type: ignore[override]
+        self.load_all()
+        return ItemsView(self)
+
+    def copy(self) -> Dict[str, Type[World]]:
+        return dict(self.items())
+
+
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: Dict[str, Type[World]] = WorldTypes()
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -84,7 +196,9 @@ class AutoWorldRegister(type):
         # construct class
         new_class = super().__new__(mcs, name, bases, dct)
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            world_types = AutoWorldRegister.world_types
+            if (world_types.is_registered(dct["game"]) if isinstance(world_types, WorldTypes)
+                    else dct["game"] in world_types):
                 raise RuntimeError(f"""Game {dct["game"]} already registered.""")
             AutoWorldRegister.world_types[dct["game"]] = new_class
         new_class.__file__ = sys.modules[new_class.__module__].__file__
@@ -176,23 +290,254 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
+def _check_new_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
-    for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+    start = time.perf_counter()
+    parallel_players: List[int] = []
+    if multiworld.generation_processes > 1 and method_name in parallel_stages and not args \
+            and "fork" in multiprocessing.get_all_start_methods():
+        parallel_players = [player for player in multiworld.player_ids if multiworld.worlds[player].parallel_generation]
+
+    if len(parallel_players) > 1:
+        parallel_time, parallel_count = _call_all_parallel(multiworld, method_name, parallel_players)
+        perf_logger.info(f"Took {time.perf_counter() - start:.4f} seconds in {method_name} for all players, "
+                         f"{parallel_time:.4f} seconds of it for {parallel_count} players ran "
+                         f"in {min(multiworld.generation_processes, len(parallel_players))} worker processes.")
+    else:
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                _check_new_items(multiworld, player, multiworld.itempool[prev_item_count:])
+        taken = time.perf_counter() - start
+        if taken > 1.0:
+            perf_logger.info(f"Took {taken:.4f} seconds in {method_name} for all players.")
 
     call_stage(multiworld, method_name, *args)
 
 
+parallel_stages: FrozenSet[str] = frozenset(("generate_early", "create_regions", "create_items", "set_rules",
+                                             "generate_basic"))
+"""stages that call_all can run in worker processes for Worlds with parallel_generation"""
+
+_parallel_multiworld: Optional["MultiWorld"] = None
+"""the MultiWorld inherited by forked worker processes"""
+
+_player_attributes = ("completion_condition", "precollected_items", "early_items", "local_early_items",
+                      "plando_items", "plando_texts", "plando_connections")
+"""per-player MultiWorld attributes a World may set during the parallel stages"""
+
+
+class _PlayerPickler(pickle.Pickler):
+    """Pickles the data of one player, keeping references to the MultiWorld and its Worlds as such."""
+    def __init__(self, file: io.BytesIO, multiworld: "MultiWorld") -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.references: Dict[int, Tuple[str, int]] = {id(multiworld): ("multiworld", 0),
+                                                       id(multiworld.regions): ("regions", 0)}
+        for player, world in multiworld.worlds.items():
+            self.references[id(world)] = ("world", player)
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple[str, int]]:
+        return self.references.get(id(obj))
+
+
+class _PlayerUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, multiworld: "MultiWorld") -> None:
+        super().__init__(file)
+        self.multiworld = multiworld
+
+    def persistent_load(self, pid: Tuple[str, int]) -> Any:
+        kind, player = pid
+        if kind == "multiworld":
+            return self.multiworld
+        if kind == "regions":
+            return self.multiworld.regions
+        return self.multiworld.worlds[player]
+
+
+def _run_parallel_stage(method_name: str, player: int) -> Tuple[float, bytes]:
+    """Runs in a forked worker process. Calls the stage of player and returns its time and the player's data."""
+    multiworld = _parallel_multiworld
+    assert multiworld, "parallel stage run outside of a worker process"
+    previous_items = {id(item): index for index, item in enumerate(multiworld.itempool) if item.player == player}
+    previous_attributes = {attribute: getattr(multiworld, attribute)[player] for attribute in _player_attributes}
+    previous_contents = {attribute: copy.copy(value) for attribute, value in previous_attributes.items()}
+    start = time.perf_counter()
+    call_single(multiworld, method_name, player)
+    taken = time.perf_counter() - start
+
+    kept_items: List[Tuple[int, "Item"]] = []
+    new_items: List["Item"] = []
+    for item in multiworld.itempool:
+        if id(item) in previous_items:
+            kept_items.append((previous_items[id(item)], item))
+        elif item.player == player:
+            new_items.append(item)
+    regions = multiworld.regions
+    data = {
+        "world": multiworld.worlds[player].__dict__,
+        "caches": (regions.region_cache[player], regions.entrance_cache[player], regions.location_cache[player]),
+        "kept_items": kept_items,
+        "new_items": new_items,
+        # only the changed ones, as the defaults include lambdas
+        "attributes": {attribute: value for attribute, value in
+                       ((attribute, getattr(multiworld, attribute)[player]) for attribute in _player_attributes)
+                       if value is not previous_attributes[attribute] or value != previous_contents[attribute]},
+        "indirect_connections": {region: entrances for region, entrances in multiworld.indirect_connections.items()
+                                 if region.player == player},
+        "prog_items": multiworld.state.prog_items.peek(player),
+        "item_indices": multiworld.item_indices[player],
+    }
+    buffer = io.BytesIO()
+    _PlayerPickler(buffer, multiworld).dump(data)
+    return taken, buffer.getvalue()
+
+
+def _apply_parallel_stage(multiworld: "MultiWorld", player: int, previous_items: List["Item"],
+                          replaced_items: Dict[int, Optional["Item"]], result: bytes) -> None:
+    """Replaces the data of player with the data the worker process shipped back from its copy."""
+    data = _PlayerUnpickler(io.BytesIO(result), multiworld).load()
+    multiworld.worlds[player].__dict__.update(data["world"])
+    regions = multiworld.regions
+    regions.region_cache[player], regions.entrance_cache[player], regions.location_cache[player] = data["caches"]
+    regions.reindex_locations(player)
+    for item in previous_items:
+        if item.player == player:
+            replaced_items[id(item)] = None
+    for index, item in data["kept_items"]:
+        replaced_items[id(previous_items[index])] = item
+    if __debug__:
+        _check_new_items(multiworld, player, data["new_items"])
+    multiworld.itempool += data["new_items"]
+    for attribute, value in data["attributes"].items():
+        getattr(multiworld, attribute)[player] = value
+    for region in [region for region in multiworld.indirect_connections if region.player == player]:
+        del multiworld.indirect_connections[region]
+    multiworld.indirect_connections.update(data["indirect_connections"])
+    state = multiworld.state
+    state.prog_items[player] = data["prog_items"]
+    multiworld.item_indices[player] = data["item_indices"]
+    state.reachable_regions[player] = set()
+    state.blocked_connections[player] = set()
+    state.failed_connections[player] = set()
+    state.stale[player] = True
+    multiworld.entrance_dependencies.pop(player, None)
+    multiworld.location_dependencies.pop(player, None)
+
+
+def _call_all_parallel(multiworld: "MultiWorld", method_name: str, parallel_players: List[int]) -> Tuple[float, int]:
+    """Runs method_name of parallel_players in forked worker processes, while the other players run here.
+    Results are merged in player order, so the itempool keeps the order it gets when running every player in order.
+    Anything a worker draws from multiworld.random is lost, so worlds using it generate differently than in order.
+    If a player's stage fails or its data can't be pickled, that player is run again here instead.
+    Returns the time the stages took in worker processes, and for how many players."""
+    global _parallel_multiworld
+    _parallel_multiworld = multiworld
+    previous_items = list(multiworld.itempool)
+    replaced_items: Dict[int, Optional["Item"]] = {}
+    parallel_time = 0.0
+    parallel_count = 0
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(min(multiworld.generation_processes, len(parallel_players))) as pool:
+            results = {player: pool.apply_async(_run_parallel_stage, (method_name, player))
+                       for player in parallel_players}
+            for player in multiworld.player_ids:
+                if player in results:
+                    try:
+                        taken, result = results[player].get()
+                    except Exception as e:
+                        logging.warning(f"Running {method_name} for player {player} in a worker process failed "
+                                        f"with {e!r}, running it in the main process instead.")
+                    else:
+                        parallel_time += taken
+                        parallel_count += 1
+                        _apply_parallel_stage(multiworld, player, previous_items, replaced_items, result)
+                        continue
+                prev_item_count = len(multiworld.itempool)
+                call_single(multiworld, method_name, player)
+                if __debug__:
+                    _check_new_items(multiworld, player, multiworld.itempool[prev_item_count:])
+    finally:
+        _parallel_multiworld = None
+    if replaced_items:
+        multiworld.itempool[:] = [replaced_items.get(id(item), item) for item in multiworld.itempool
+                                  if replaced_items.get(id(item), item) is not None]
+    return parallel_time, parallel_count
+
+
+def _run_parallel_output(player: int, output_directory: str) -> float:
+    """Runs in a forked worker process. Writes the output of player and returns the time it took."""
+    multiworld = _parallel_multiworld
+    assert multiworld, "parallel output run outside of a worker process"
+    start = time.perf_counter()
+    call_single(multiworld, "generate_output", player, output_directory)
+    return time.perf_counter() - start
+
+
+class ParallelOutput:
+    """Runs generate_output of Worlds with parallel_output in forked worker processes, see Main.main.
+    The worker processes are forked from the finished fill when entering, which has to happen before output threads
+    are started. They are kept in pool for the rest of the output, so the DeltaDiffService can share them instead of
+    forking its own while output threads exist. Each player writes into its own directory within output_directory,
+    see get_output_directory."""
+    players: List[int]
+    """players whose output is written by worker processes"""
+    processes: int
+    pool: Optional[concurrent.futures.ProcessPoolExecutor]
+    """the worker processes while entered, if multiworld.generation_processes allows them"""
+
+    def __init__(self, multiworld: "MultiWorld", players: Iterable[int], output_directory: str) -> None:
+        self.multiworld = multiworld
+        self.output_directory = output_directory
+        self.players = []
+        self._forks = multiworld.generation_processes > 1 and "fork" in multiprocessing.get_all_start_methods()
+        if self._forks:
+            self.players = [player for player in players if multiworld.worlds[player].parallel_output]
+        self.processes = min(multiworld.generation_processes, len(self.players))
+        self.pool = None
+        self._results: Dict[int, concurrent.futures.Future[float]] = {}
+
+    def __enter__(self) -> ParallelOutput:
+        global _parallel_multiworld
+        if self._forks:
+            _parallel_multiworld = self.multiworld
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.multiworld.generation_processes,
+                                                               multiprocessing.get_context("fork"))
+            self._results = {player: self.pool.submit(_run_parallel_output,
+                                                      player, self.get_output_directory(player))
+                             for player in self.players}
+            if not self._results:
+                # forked pools start all of their processes with the first job
+                self.pool.submit(time.perf_counter).result()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        global _parallel_multiworld
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        _parallel_multiworld = None
+
+    def get_output_directory(self, player: int) -> str:
+        """Creates and returns the directory player writes its output into, so it can be collected on its own."""
+        directory = os.path.join(self.output_directory, str(player))
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def wait(self, player: int) -> float:
+        """Waits for the output of player and returns the time it took in its worker process.
+        Raises the exception of generate_output if there was one."""
+        return self._results[player].result()
+
+
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types = {multiworld.worlds[player].__class__ for player in multiworld.player_ids}
     for world_type in sorted(world_types, key=lambda world: world.__name__):
@@ -303,6 +648,32 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    incremental_reachability: bool = False
+    """If True, the item names read by this world's Entrance and Location access rules are recorded when evaluated,
+    and after items are collected only rules that read a changed item name get re-evaluated.
+    Requires explicit_indirect_conditions, and all access rules to only depend on this player's
+    `state.prog_items` and on Regions registered through MultiWorld.register_indirect_condition().
+    Set MultiWorld.debug_incremental_reachability to check the results against a full search."""
+
+    indexed_item_counts: ClassVar[bool] = False
+    """If True, CollectionState.prog_items of this world also keeps its counts in an array, so that rules can use
+    CollectionState.has_index and related methods with indices from get_item_index() instead of item names.
+    Item counts then have to be integers. The item name based methods keep working as before."""
+
+    parallel_output: ClassVar[bool] = False
+    """If True, generate_output of this world may run in a worker process forked after fill, when
+    MultiWorld.generation_processes is above 1. generate_output may then only write its files into output_directory,
+    as changes it makes to this World or the MultiWorld are lost. fill_slot_data, modify_multidata and the spoiler
+    methods run in the main process and can't depend on generate_output."""
+
+    parallel_generation: ClassVar[bool] = False
+    """If True, generate_early, create_regions, create_items, set_rules and generate_basic of this world may run in a
+    forked worker process when MultiWorld.generation_processes is above 1. The stages may then only change this World,
+    this player's Regions, Entrances, Locations and items, and this player's entries of the MultiWorld, and everything
+    they reach has to be picklable. So access rules can't be lambdas or local functions. Worlds that fail to pickle
+    are run in the main process instead. Randomness has to come from self.random, as multiworld.random is not
+    advanced by worker processes, so a world using it generates differently depending on generation_processes."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
@@ -553,6 +924,11 @@ class World(metaclass=AutoWorldRegister):
     def get_regions(self) -> "Iterable[Region]":
         return self.multiworld.get_regions(self.player)
 
+    def get_item_index(self, item_name: str) -> int:
+        """Returns the index of item_name for CollectionState.has_index and related methods.
+        Only useful with indexed_item_counts."""
+        return self.multiworld.get_item_index(item_name, self.player)
+
     def push_precollected(self, item: Item) -> None:
         self.multiworld.push_precollected(item)
 
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
 import abc
+import concurrent.futures
+import contextlib
+import io
 import json
+import multiprocessing
+import struct
+import time
 import zipfile
 from enum import IntEnum
 import os
 import threading
+from threading import Lock
 
-from typing import ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence
+from typing import (ClassVar, Dict, Iterator, List, Literal, Tuple, Type, Any, Optional, Union, BinaryIO, overload,
+                    Sequence)
 
 import bsdiff4
 
 semaphore = threading.Semaphore(os.cpu_count() or 4)
 
 del threading
-del os
 
 
 class AutoPatchRegister(abc.ABCMeta):
@@ -33,6 +40,8 @@ class AutoPatchRegister(abc.ABCMeta):
 
     @staticmethod
     def get_handler(file: str) -> Optional[AutoPatchRegister]:
+        from . import load_all_worlds
+        load_all_worlds()  # patch types are registered by their worlds
         for file_ending, handler in AutoPatchRegister.file_endings.items():
             if file.endswith(file_ending):
                 return handler
@@ -54,6 +63,8 @@ class AutoPatchExtensionRegister(abc.ABCMeta):
     def get_handler(game: Optional[str]) -> Union[AutoPatchExtensionRegister, List[AutoPatchExtensionRegister]]:
         if not game:
             return APPatchExtension
+        from . import load_all_worlds
+        load_all_worlds()  # extensions are registered by their worlds
         handler = AutoPatchExtensionRegister.extension_types.get(game, APPatchExtension)
         if handler.required_extensions:
             handlers = [handler]
@@ -77,6 +88,84 @@ class InvalidDataError(Exception):
     """
 
 
+class OutputArchive:
+    """
+    The zip archive the output of a generation is written into, see Main.main.
+    Files can be added from any thread as soon as they are finished. Zip archives, like containers and Factorio mods,
+    are stored as they are instead of being compressed a second time.
+    While entered, containers written into output_directory and files written with write_output_file go into the
+    archive directly, without being written to disk first.
+    """
+    path: str
+    output_directory: str
+
+    def __init__(self, path: str, output_directory: str, compresslevel: int = 9) -> None:
+        self.path = path
+        self.output_directory = output_directory
+        self._zip_file = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._lock = Lock()
+        self._pid = os.getpid()  # forked processes write their files to disk instead
+
+    def __enter__(self) -> OutputArchive:
+        _output_archives[os.path.abspath(self.output_directory)] = self
+        return self
+
+    def __exit__(self, exc_type: Optional[type], *args: Any) -> None:
+        del _output_archives[os.path.abspath(self.output_directory)]
+        self._zip_file.close()
+        if exc_type:
+            os.remove(self.path)  # don't leave an incomplete archive behind
+
+    def write_file(self, name: str, data: bytes, compress: Optional[bool] = None) -> None:
+        """Adds data to the archive as name. By default, data is compressed unless it is a zip archive."""
+        if compress is None:
+            compress = not data.startswith(b"PK\x03\x04")
+        with self._lock:
+            self._zip_file.writestr(name, data, zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+
+    def add_file(self, path: str) -> None:
+        """Moves the file at path into the archive."""
+        with open(path, "rb") as f:
+            data = f.read()
+        self.write_file(os.path.basename(path), data)
+        os.remove(path)
+
+    def add_directory(self, directory: str) -> None:
+        """Moves the files in directory into the archive."""
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                self.add_file(entry.path)
+
+
+_output_archives: Dict[str, OutputArchive] = {}
+"""the entered OutputArchives, by the absolute path of their output directory"""
+
+
+def get_output_archive(path: str) -> Optional[OutputArchive]:
+    """Returns the entered OutputArchive that takes files written to path, or None."""
+    if not _output_archives:
+        return None
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory not in _output_archives:
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+    archive = _output_archives[directory]
+    return archive if archive._pid == os.getpid() else None
+
+
+def write_output_file(output_directory: str, name: str, data: bytes) -> None:
+    """Writes an output file of generate_output, into the output archive directly if there is one."""
+    path = os.path.join(output_directory, name)
+    archive = get_output_archive(path)
+    if archive:
+        archive.write_file(name, data)
+    else:
+        with open(path, "wb") as f:
+            f.write(data)
+
+
 class APContainer:
     """A zipfile containing at least archipelago.json"""
     version: int = container_version
@@ -101,6 +190,15 @@ class APContainer:
         zip_file = file if file else self.path
         if not zip_file:
             raise FileNotFoundError(f"Cannot write {self.__class__.__name__} due to no path provided.")
+        archive = get_output_archive(zip_file) if isinstance(zip_file, str) else None
+        if archive:
+            buffer = io.BytesIO()
+            with semaphore:
+                with zipfile.ZipFile(buffer, "w", self.compression_method, True, self.compression_level) as zf:
+                    self.write_contents(zf)
+            self.path = zip_file
+            archive.write_file(os.path.basename(zip_file), buffer.getvalue(), compress=False)
+            return
         with semaphore:  # TODO: remove semaphore once generate_output has a thread limit
             with zipfile.ZipFile(
                     zip_file, "w", self.compression_method, True, self.compression_level) as zf:
@@ -194,6 +292,8 @@ class APProcedurePatch(APAutoPatchInterface):
     source_data: bytes
     patch_file_ending: str = ""
     files: Dict[str, bytes]
+    container_files: List[str]
+    """files of the container read from a path, which are only read from it when needed"""
 
     @classmethod
     def get_source_data(cls) -> bytes:
@@ -209,6 +309,7 @@ class APProcedurePatch(APAutoPatchInterface):
     def __init__(self, *args: Any, **kwargs: Any):
         super(APProcedurePatch, self).__init__(*args, **kwargs)
         self.files = {}
+        self.container_files = []
 
     def get_manifest(self) -> Dict[str, Any]:
         manifest = super(APProcedurePatch, self).get_manifest()
@@ -229,21 +330,40 @@ class APProcedurePatch(APAutoPatchInterface):
             self.procedure = [("apply_bsdiff4", ["delta.bsdiff4"])]
         else:
             self.procedure = manifest["procedure"]
+        # files of a container on disk are opened again when needed, instead of being held in memory
+        from_path = self.path is not None and opened_zipfile.filename == self.path
+        self.container_files = []
         for file in opened_zipfile.namelist():
             if file not in ["archipelago.json"]:
-                self.files[file] = opened_zipfile.read(file)
+                if from_path:
+                    self.container_files.append(file)
+                else:
+                    self.files[file] = opened_zipfile.read(file)
 
     def write_contents(self, opened_zipfile: zipfile.ZipFile) -> None:
         super(APProcedurePatch, self).write_contents(opened_zipfile)
-        for file in self.files:
-            opened_zipfile.writestr(file, self.files[file],
+        for file in [*self.files, *(file for file in self.container_files if file not in self.files)]:
+            opened_zipfile.writestr(file, self.get_file(file),
                                     compress_type=zipfile.ZIP_STORED if file.endswith(".bsdiff4") else None)
 
+    @contextlib.contextmanager
+    def open_file(self, file: str) -> Iterator[BinaryIO]:
+        """Opens a file of the patch container for reading, without reading it into memory as a whole."""
+        if file not in self.files and file not in self.container_files:
+            self.read()
+        if file in self.files:
+            yield io.BytesIO(self.files[file])
+        else:
+            assert self.path, "container files are only kept when read from a path"
+            with zipfile.ZipFile(self.path, "r") as zf, zf.open(file, "r") as f:
+                yield f  # type: ignore[misc]
+
     def get_file(self, file: str) -> bytes:
         """ Retrieves a file from the patch container."""
-        if file not in self.files:
-            self.read()
-        return self.files[file]
+        if file in self.files:
+            return self.files[file]
+        with self.open_file(file) as f:
+            return f.read()
 
     def write_file(self, file_name: str, file: bytes) -> None:
         """ Writes a file to the patch container, to be retrieved upon patching. """
@@ -251,9 +371,12 @@ class APProcedurePatch(APAutoPatchInterface):
 
     def patch(self, target: str) -> None:
         self.read()
-        base_data = self.get_source_data_with_cache()
         patch_extender = AutoPatchExtensionRegister.get_handler(self.game)
         assert not isinstance(self.procedure, str), f"{type(self)} must define procedures"
+        # the source data is only kept around if something else cached it already, steps copy it into a bytearray
+        # once if they change the data in place
+        base_data: Union[bytes, bytearray] = \
+            self.source_data if hasattr(type(self), "source_data") else self.get_source_data()
         for step, args in self.procedure:
             if isinstance(patch_extender, list):
                 extension = next((item for item in [getattr(extender, step, None) for extender in patch_extender]
@@ -275,17 +398,88 @@ class APDeltaPatch(APProcedurePatch):
     procedure = [
         ("apply_bsdiff4", ["delta.bsdiff4"])
     ]
+    parallel_diff: ClassVar[bool] = False
+    """If True, the diff may be created in a worker process of the active DeltaDiffService.
+    get_source_data then has to work in a forked process without asking the user for anything."""
 
     def __init__(self, *args: Any, patched_path: str = "", **kwargs: Any) -> None:
         super(APDeltaPatch, self).__init__(*args, **kwargs)
         self.patched_path = patched_path
 
     def write_contents(self, opened_zipfile: zipfile.ZipFile) -> None:
-        self.write_file("delta.bsdiff4",
-                        bsdiff4.diff(self.get_source_data_with_cache(), open(self.patched_path, "rb").read()))
+        if delta_diff_service:
+            self.write_file("delta.bsdiff4", delta_diff_service.diff(type(self), self.patched_path))
+        else:
+            self.write_file("delta.bsdiff4", _diff(type(self), self.patched_path))
         super(APDeltaPatch, self).write_contents(opened_zipfile)
 
 
+def _diff(patch_type: Type[APDeltaPatch], patched_path: str) -> bytes:
+    with open(patched_path, "rb") as f:
+        return bsdiff4.diff(patch_type.get_source_data_with_cache(), f.read())
+
+
+def _timed_diff(patch_type: Type[APDeltaPatch], patched_path: str) -> Tuple[float, bytes]:
+    start = time.perf_counter()
+    delta = _diff(patch_type, patched_path)
+    return time.perf_counter() - start, delta
+
+
+class DeltaDiffService:
+    """
+    Creates the diffs of APDeltaPatch while it is active, see Main.main.
+    With more than one process, diffs of patch types with parallel_diff are created in forked worker processes,
+    each of which reads the source data of a patch type once and keeps it for all following diffs.
+    Keeps the time taken per game.
+    """
+    processes: int
+    times: Dict[str, float]
+    counts: Dict[str, int]
+    _pool: Optional[concurrent.futures.ProcessPoolExecutor]
+
+    def __init__(self, processes: int = 0,
+                 pool: Optional[concurrent.futures.ProcessPoolExecutor] = None) -> None:
+        """Either forks processes itself or shares the worker processes of pool, which stays open on exit."""
+        self.processes = processes
+        self.times = {}
+        self.counts = {}
+        self._lock = Lock()
+        self._pool = pool
+        self._owns_pool = False
+        if not pool and processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            self._pool = concurrent.futures.ProcessPoolExecutor(processes, multiprocessing.get_context("fork"))
+            self._owns_pool = True
+            # forked pools start all of their processes with the first job, which should happen before any output
+            # threads exist, as forking copies the locks they might be holding
+            self._pool.submit(time.perf_counter).result()
+
+    def __enter__(self) -> DeltaDiffService:
+        global delta_diff_service
+        delta_diff_service = self
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        global delta_diff_service
+        delta_diff_service = None
+        if self._pool and self._owns_pool:
+            self._pool.shutdown()
+
+    def diff(self, patch_type: Type[APDeltaPatch], patched_path: str) -> bytes:
+        if self._pool and patch_type.parallel_diff:
+            taken, delta = self._pool.submit(_timed_diff, patch_type, patched_path).result()
+        else:
+            taken, delta = _timed_diff(patch_type, patched_path)
+        game = patch_type.game or patch_type.__name__
+        with self._lock:
+            self.times[game] = self.times.get(game, 0.0) + taken
+            self.counts[game] = self.counts.get(game, 0) + 1
+        return delta
+
+
+delta_diff_service: Optional[DeltaDiffService] = None
+"""the DeltaDiffService that APDeltaPatch uses, if one is active"""
+
+
 class APTokenTypes(IntEnum):
     WRITE = 0
     COPY = 1
@@ -370,59 +564,62 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
 
     caller: APProcedurePatch (used to retrieve files from the patch container)
 
-    rom: bytes (the data to patch)
+    rom: bytes or bytearray (the data to patch)
 
     Further arguments are passed in from the procedure as defined.
 
-    Patch extension functions must return the changed bytes.
+    Patch extension functions must return the changed bytes. They may change a bytearray rom in place and return it,
+    which avoids copying the whole file.
     """
     game: str
     required_extensions: ClassVar[Tuple[str, ...]] = ()
 
     @staticmethod
-    def apply_bsdiff4(caller: APProcedurePatch, rom: bytes, patch: str) -> bytes:
+    def apply_bsdiff4(caller: APProcedurePatch, rom: Union[bytes, bytearray], patch: str) -> bytes:
         """Applies the given bsdiff4 from the patch onto the current file."""
-        return bsdiff4.patch(rom, caller.get_file(patch))
+        return bsdiff4.patch(bytes(rom) if isinstance(rom, bytearray) else rom, caller.get_file(patch))
 
     @staticmethod
-    def apply_tokens(caller: APProcedurePatch, rom: bytes, token_file: str) -> bytes:
-        """Applies the given token file from the patch onto the current file."""
-        token_data = caller.get_file(token_file)
-        rom_data = bytearray(rom)
-        token_count = int.from_bytes(token_data[0:4], "little")
-        bpr = 4
-        for _ in range(token_count):
-            token_type = token_data[bpr:bpr + 1][0]
-            offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
-            size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
-            data = token_data[bpr + 9:bpr + 9 + size]
-            if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
-                arg = data[0]
-                if token_type == APTokenTypes.AND_8:
-                    rom_data[offset] = rom_data[offset] & arg
-                elif token_type == APTokenTypes.OR_8:
-                    rom_data[offset] = rom_data[offset] | arg
-                else:
-                    rom_data[offset] = rom_data[offset] ^ arg
-            elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
-                length = int.from_bytes(data[:4], "little")
-                value = int.from_bytes(data[4:], "little")
-                if token_type == APTokenTypes.COPY:
-                    rom_data[offset: offset + length] = rom_data[value: value + length]
+    def apply_tokens(caller: APProcedurePatch, rom: Union[bytes, bytearray], token_file: str) -> bytearray:
+        """Applies the given token file from the patch onto the current file, reading the tokens as it goes."""
+        rom_data = rom if isinstance(rom, bytearray) else bytearray(rom)
+        with caller.open_file(token_file) as tokens:
+            read = io.BufferedReader(tokens, 1024 * 1024).read  # type: ignore[arg-type]
+            token_count = int.from_bytes(read(4), "little")
+            for _ in range(token_count):
+                token_type, offset, size = _token_header.unpack(read(_token_header.size))
+                if token_type in (APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8):
+                    arg = read(size)[0]
+                    if token_type == APTokenTypes.AND_8:
+                        rom_data[offset] = rom_data[offset] & arg
+                    elif token_type == APTokenTypes.OR_8:
+                        rom_data[offset] = rom_data[offset] | arg
+                    else:
+                        rom_data[offset] = rom_data[offset] ^ arg
+                elif token_type in (APTokenTypes.COPY, APTokenTypes.RLE):
+                    data = read(size)
+                    length = int.from_bytes(data[:4], "little")
+                    value = int.from_bytes(data[4:], "little")
+                    if token_type == APTokenTypes.COPY:
+                        rom_data[offset: offset + length] = rom_data[value: value + length]
+                    else:
+                        rom_data[offset: offset + length] = bytes((value,)) * length
                 else:
-                    rom_data[offset: offset + length] = bytes([value] * length)
-            else:
-                rom_data[offset:offset + len(data)] = data
-            bpr += 9 + size
-        return bytes(rom_data)
+                    data = read(size)
+                    rom_data[offset:offset + len(data)] = data
+        return rom_data
 
     @staticmethod
-    def calc_snes_crc(caller: APProcedurePatch, rom: bytes) -> bytes:
+    def calc_snes_crc(caller: APProcedurePatch, rom: Union[bytes, bytearray]) -> bytearray:
         """Calculates and applies a valid CRC for the SNES rom header."""
-        rom_data = bytearray(rom)
+        rom_data = rom if isinstance(rom, bytearray) else bytearray(rom)
         if len(rom) < 0x8000:
             raise Exception("Tried to calculate SNES CRC on file too small to be a SNES ROM.")
-        crc = (sum(rom_data[:0x7FDC] + rom_data[0x7FE0:]) + 0x01FE) & 0xFFFF
+        crc = (sum(rom_data) - sum(rom_data[0x7FDC:0x7FE0]) + 0x01FE) & 0xFFFF
         inv = crc ^ 0xFFFF
         rom_data[0x7FDC:0x7FE0] = [inv & 0xFF, (inv >> 8) & 0xFF, crc & 0xFF, (crc >> 8) & 0xFF]
-        return bytes(rom_data)
+        return rom_data
+
+
+_token_header = struct.Struct("<BII")
+"""type, offset and size of a token"""
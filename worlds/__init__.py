@@ -1,5 +1,7 @@
 import importlib
+import importlib.abc
 import importlib.util
+import json
 import logging
 import os
 import sys
@@ -7,9 +9,10 @@ import warnings
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict
+from importlib.machinery import ModuleSpec
+from typing import Any, Dict, List, Optional, TypedDict
 
-from Utils import local_path, user_path
+from Utils import __version__, cache_path, local_path, user_path
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,6 +30,9 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "world_manifest",
+    "GameManifest",
+    "load_all_worlds",
 }
 
 
@@ -45,6 +51,20 @@ class DataPackage(TypedDict):
     games: Dict[str, GamesPackage]
 
 
+class GameManifest(TypedDict):
+    """What is known about a game without loading its world, cached between runs."""
+    world: str
+    """module and name of the World class"""
+    data_package: GamesPackage
+    hint_blacklist: List[str]
+    settings_key: str
+    has_settings: bool
+    """whether the World declares its own settings class"""
+    hidden: bool
+    web: Dict[str, Any]
+    """theme, bug_report_page, game_info_languages and rich_text_options_doc of the WebWorld"""
+
+
 @dataclasses.dataclass(order=True)
 class WorldSource:
     path: str  # typically relative path from this module
@@ -61,6 +81,25 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def module_name(self) -> str:
+        return f"worlds.{os.path.basename(self.path).rsplit('.', 1)[0]}"
+
+    def get_stamp(self) -> List[int]:
+        """Changes whenever a file of the source does, newest modification time, file count and total size."""
+        if self.is_zip:
+            stat = os.stat(self.resolved_path)
+            return [stat.st_mtime_ns, 1, stat.st_size]
+        newest = count = size = 0
+        for root, dirs, files in os.walk(self.resolved_path):
+            dirs[:] = [directory for directory in dirs if directory != "__pycache__"]
+            for file in files:
+                stat = os.stat(os.path.join(root, file))
+                newest = max(newest, stat.st_mtime_ns)
+                count += 1
+                size += stat.st_size
+        return [newest, count, size]
+
     def load(self) -> bool:
         try:
             start = time.perf_counter()
@@ -115,15 +154,126 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
+
+from .AutoWorld import AutoWorldRegister, World, WorldTypes
+
+manifest_path = cache_path("world_manifest.json")
+
+
+def get_game_manifest(world: "type[World]") -> GameManifest:
+    settings_annotation = world.__annotations__.get("settings", None)
+    return {
+        "world": f"{world.__module__}.{world.__name__}",
+        "data_package": world.get_data_package_data(),
+        "hint_blacklist": sorted(world.hint_blacklist),
+        "settings_key": world.settings_key,
+        "has_settings": settings_annotation is not None and settings_annotation != "ClassVar[Optional['Group']]",
+        "hidden": world.hidden,
+        "web": {
+            "theme": world.web.theme,
+            "bug_report_page": getattr(world.web, "bug_report_page", None),
+            "game_info_languages": world.web.game_info_languages,
+            "rich_text_options_doc": world.web.rich_text_options_doc,
+        },
+    }
+
+
+def _read_manifest() -> Dict[str, Any]:
+    try:
+        with open(manifest_path, encoding="utf-8-sig") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == __version__:
+            return manifest["sources"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def _write_manifest(sources: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": __version__, "sources": sources}, f)
+        os.replace(temp_path, manifest_path)
+    except OSError as e:
+        logging.warning(f"Could not write world manifest: {e}")
+
+
+def load_all_worlds() -> None:
+    """Imports every world that hasn't been yet, for everything that's registered by the world modules themselves,
+    like launcher components, patch handlers and client handlers."""
+    world_types = AutoWorldRegister.world_types
+    if isinstance(world_types, WorldTypes):
+        world_types.load_all()
+
+
+class _PendingWorldFinder(importlib.abc.MetaPathFinder):
+    """Lets other modules, like other worlds, import a .apworld that isn't loaded yet."""
+    sources: Dict[str, WorldSource] = {}
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Optional[ModuleSpec]:
+        source = self.sources.get(fullname)
+        if source is None:
+            return None
+        return zipimport.zipimporter(source.resolved_path).find_spec(fullname)
+
+
+# Worlds whose files didn't change since the manifest was written get imported when first used,
+# others are imported now to trigger AutoWorldRegister and get their manifest.
+sys.meta_path.append(_PendingWorldFinder())
+world_manifest: Dict[str, GameManifest] = {}
+_cached_sources = _read_manifest()
+_sources: Dict[str, Any] = {}
 for world_source in world_sources:
-    world_source.load()
+    stamp = world_source.get_stamp()
+    cached = _cached_sources.get(world_source.resolved_path)
+    if cached and cached["stamp"] == stamp and cached["games"] and \
+            not any(game in world_manifest for game in cached["games"]):
+        for game in cached["games"]:
+            AutoWorldRegister.world_types.add_pending(game, world_source)  # type: ignore[attr-defined]
+        if world_source.is_zip:
+            _PendingWorldFinder.sources[world_source.module_name] = world_source
+        world_manifest.update(cached["games"])
+        _sources[world_source.resolved_path] = cached
+    elif world_source.load():
+        games = {game: get_game_manifest(world) for game, world in
+                 AutoWorldRegister.world_types.get_registered().items()  # type: ignore[attr-defined]
+                 if world.__module__ == world_source.module_name
+                 or world.__module__.startswith(world_source.module_name + ".")}
+        world_manifest.update(games)
+        _sources[world_source.resolved_path] = {"stamp": stamp, "games": games}
+if _sources != _cached_sources:
+    _write_manifest(_sources)
+del _cached_sources, _sources
+for game, world in AutoWorldRegister.world_types.get_registered().items():  # type: ignore[attr-defined]
+    if game not in world_manifest:  # registered outside of its own source, not cached
+        world_manifest[game] = get_game_manifest(world)
 
 # Build the data package for each game.
-from .AutoWorld import AutoWorldRegister
-
 network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    # copies, as MultiServer removes the groups from them
+    "games": {game: dict(world_manifest[game]["data_package"]) for game in AutoWorldRegister.world_types},
 }
 
+
+def _update_data_package(game: str, world: "type[World]") -> None:
+    """Some worlds order their names differently each run, which changes their checksum.
+    Once imported, the data package has to be the one of the World class."""
+    data_package = world.get_data_package_data()
+    if data_package["checksum"] != world_manifest[game]["data_package"]["checksum"]:
+        world_manifest[game]["data_package"] = data_package
+        network_data_package["games"][game] = dict(data_package)
+
+
+def _drop_game(game: str) -> None:
+    """A pending game whose source failed to load is gone, so its cached data shouldn't be served anymore."""
+    world_manifest.pop(game, None)
+    network_data_package["games"].pop(game, None)
+
+
+if isinstance(AutoWorldRegister.world_types, WorldTypes):
+    AutoWorldRegister.world_types.on_pending_registered = _update_data_package
+    AutoWorldRegister.world_types.on_pending_failed = _drop_game
+
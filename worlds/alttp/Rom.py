@@ -3014,6 +3014,7 @@ class LttPDeltaPatch(worlds.Files.APDeltaPatch):
     hash = LTTPJPN10HASH
     game = "A Link to the Past"
     patch_file_ending = ".aplttp"
+    parallel_diff = True
 
     @classmethod
     def get_source_data(cls) -> bytes:
@@ -125,6 +125,7 @@ class Factorio(World):
         self.tech_tree_layout_prerequisites = {}
 
     generate_output = generate_mod
+    parallel_output = True
 
     def generate_early(self) -> None:
         # if max < min, then swap max and min
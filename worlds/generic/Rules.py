@@ -3,6 +3,7 @@ import logging
 import typing
 
 from BaseClasses import LocationProgressType, MultiWorld, Location, Region, Entrance
+from rule_builder import And, Or, Rule, compile_rule, get_rule
 
 if typing.TYPE_CHECKING:
     import BaseClasses
@@ -14,6 +15,18 @@ else:
     ItemRule = typing.Callable[[object], bool]
 
 
+def item_only_rule(rule: ItemRule) -> ItemRule:
+    """Marks an item rule as only depending on the Item it is given, so that fill can remember its results per
+    Location for Items of the same name, player and classification. Rules reading anything else, such as the Items
+    placed in other Locations, must not be marked."""
+    rule.item_only = True  # type: ignore[attr-defined]
+    return rule
+
+
+def is_item_only_rule(rule: ItemRule) -> bool:
+    return rule is Location.item_rule or getattr(rule, "item_only", False)
+
+
 def locality_needed(multiworld: MultiWorld) -> bool:
     for player in multiworld.player_ids:
         if multiworld.worlds[player].options.local_items.value:
@@ -70,16 +83,18 @@ def locality_rules(multiworld: MultiWorld):
                 location.item_rule = func_cache[location.player, location.item_rule]
             # empty rule that just returns True, overwrite
             elif location.item_rule is Location.item_rule:
-                func_cache[location.player, location.item_rule] = location.item_rule = \
+                func_cache[location.player, location.item_rule] = location.item_rule = item_only_rule(
                     lambda i, sending_blockers = forbid_data[location.player], \
                                             old_rule = location.item_rule: \
-                    i.name not in sending_blockers[i.player]
+                    i.name not in sending_blockers[i.player])
             # special rule, needs to also be fulfilled.
             else:
-                func_cache[location.player, location.item_rule] = location.item_rule = \
-                    lambda i, sending_blockers = forbid_data[location.player], \
+                rule = lambda i, sending_blockers = forbid_data[location.player], \
                                             old_rule = location.item_rule: \
                     i.name not in sending_blockers[i.player] and old_rule(i)
+                if is_item_only_rule(location.item_rule):
+                    item_only_rule(rule)
+                func_cache[location.player, location.item_rule] = location.item_rule = rule
 
 
 def exclusion_rules(multiworld: MultiWorld, player: int, exclude_locations: typing.Set[str]) -> None:
@@ -97,14 +112,21 @@ def exclusion_rules(multiworld: MultiWorld, player: int, exclude_locations: typi
 
 
 def set_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule):
-    spot.access_rule = rule
+    spot.access_rule = compile_rule(rule) if isinstance(rule, Rule) else rule
 
 
 def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule, combine="and"):
     old_rule = spot.access_rule
+    if isinstance(rule, Rule):
+        rule = compile_rule(rule)
+    new_rule_object, old_rule_object = get_rule(rule), get_rule(old_rule)
     # empty rule, replace instead of add
     if old_rule is Location.access_rule or old_rule is Entrance.access_rule:
         spot.access_rule = rule if combine == "and" else old_rule
+    elif new_rule_object is not None and old_rule_object is not None:
+        # merged into one flat rule, keeping it introspectable
+        spot.access_rule = compile_rule((And(new_rule_object, old_rule_object) if combine == "and"
+                                         else Or(new_rule_object, old_rule_object)).simplify())
     else:
         if combine == "and":
             spot.access_rule = lambda state: rule(state) and old_rule(state)
@@ -116,20 +138,26 @@ def forbid_item(location: "BaseClasses.Location", item: str, player: int):
     old_rule = location.item_rule
     # empty rule
     if old_rule is Location.item_rule:
-        location.item_rule = lambda i: i.name != item or i.player != player
+        location.item_rule = item_only_rule(lambda i: i.name != item or i.player != player)
     else:
         location.item_rule = lambda i: (i.name != item or i.player != player) and old_rule(i)
+        if is_item_only_rule(old_rule):
+            item_only_rule(location.item_rule)
 
 
 def forbid_items_for_player(location: "BaseClasses.Location", items: typing.Set[str], player: int):
     old_rule = location.item_rule
     location.item_rule = lambda i: (i.player != player or i.name not in items) and old_rule(i)
+    if is_item_only_rule(old_rule):
+        item_only_rule(location.item_rule)
 
 
 def forbid_items(location: "BaseClasses.Location", items: typing.Set[str]):
     """unused, but kept as a debugging tool."""
     old_rule = location.item_rule
     location.item_rule = lambda i: i.name not in items and old_rule(i)
+    if is_item_only_rule(old_rule):
+        item_only_rule(location.item_rule)
 
 
 def add_item_rule(location: "BaseClasses.Location", rule: ItemRule, combine: str = "and"):
@@ -142,6 +170,8 @@ def add_item_rule(location: "BaseClasses.Location", rule: ItemRule, combine: str
             location.item_rule = lambda item: rule(item) and old_rule(item)
         else:
             location.item_rule = lambda item: rule(item) or old_rule(item)
+        if is_item_only_rule(rule) and is_item_only_rule(old_rule):
+            item_only_rule(location.item_rule)
 
 
 def item_name_in_location_names(state: "BaseClasses.CollectionState", item: str, player: int,
@@ -1,4 +1,3 @@
-import os
 import json
 import settings
 import typing
@@ -7,6 +6,7 @@ from typing import Dict, Any
 
 from BaseClasses import Region, Entrance, Item, Tutorial, ItemClassification, Location
 from worlds.AutoWorld import World, WebWorld
+from worlds.Files import write_output_file
 
 from . import Constants
 from .Options import MinecraftOptions
@@ -173,8 +173,7 @@ class MinecraftWorld(World):
     def generate_output(self, output_directory: str) -> None:
         data = self._get_mc_data()
         filename = f"{self.multiworld.get_out_file_name_base(self.player)}.apmc"
-        with open(os.path.join(output_directory, filename), 'wb') as f:
-            f.write(b64encode(bytes(json.dumps(data), 'utf-8')))
+        write_output_file(output_directory, filename, b64encode(bytes(json.dumps(data), 'utf-8')))
 
     def fill_slot_data(self) -> dict:
         return self._get_mc_data()